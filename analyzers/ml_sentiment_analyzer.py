@@ -5,6 +5,8 @@
 import logging
 from typing import Dict, List, Optional
 
+from analyzers.sentiment_cache import SentimentCache, get_default_cache
+
 logger = logging.getLogger(__name__)
 
 class MLSentimentAnalyzer:
@@ -17,14 +19,25 @@ class MLSentimentAnalyzer:
     5. Словарный (fallback)
     """
     
-    def __init__(self, model_type='auto'):
+    # Версии моделей для ключа кэша
+    MODEL_VERSIONS = {
+        'rubert': 'blanchefort/rubert-base-cased-sentiment',
+        'dostoevsky': 'fasttext-social-network-model',
+        'vader': 'vaderSentiment',
+        'textblob': 'textblob',
+        'dictionary': 'dictionary-v1'
+    }
+    
+    def __init__(self, model_type='auto', cache=None):
         """
         model_type: 'rubert', 'dostoevsky', 'vader', 'textblob', 'dictionary', 'auto'
         auto - автоматический выбор лучшей доступной модели
+        cache: SentimentCache; None - общий кэш процесса, False - без кэша
         """
         self.model_type = model_type
         self.model = None
         self.tokenizer = None
+        self.cache = get_default_cache() if cache is None else (cache or None)
         
         if model_type == 'auto':
             self._init_best_available()
@@ -68,7 +81,7 @@ class MLSentimentAnalyzer:
             from transformers import AutoTokenizer, AutoModelForSequenceClassification
             import torch
             
-            model_name = "blanchefort/rubert-base-cased-sentiment"
+            model_name = self.MODEL_VERSIONS['rubert']
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
             self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
             self.model_type = 'rubert'
@@ -167,6 +180,24 @@ class MLSentimentAnalyzer:
                 'model': self.model_type
             }
         
+        key = None
+        if self.cache is not None:
+            key = SentimentCache.make_key(
+                'ml_' + self.model_type, self.MODEL_VERSIONS.get(self.model_type, 'unknown'), text
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        result = self._analyze_uncached(text)
+        
+        # Fallback-результаты (словарь после ошибки модели) не кэшируем
+        if key is not None and result.get('model') == self.model_type:
+            self.cache.set(key, result)
+        
+        return result
+    
+    def _analyze_uncached(self, text: str) -> Dict:
         if self.model_type == 'rubert':
             return self._analyze_rubert(text)
         elif self.model_type == 'dostoevsky':
@@ -372,7 +403,8 @@ class MLSentimentAnalyzer:
         return {
             'model_type': self.model_type,
             'model_loaded': self.model is not None,
-            'description': self._get_model_description()
+            'description': self._get_model_description(),
+            'cache': self.cache.stats() if self.cache is not None else None
         }
     
     def _get_model_description(self) -> str:
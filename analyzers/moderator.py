@@ -1,108 +1,170 @@
 from config import Config
+from utils.text_matcher import compile_phrases
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
 class Moderator:
+    PROFANITY_PATTERNS = [
+        r'\b(хуй|пизд|ебл|еба|еби|бля|сук|дура|дурак|идиот|мудак|гавно|говно|жоп)\w*\b',
+        r'\b(fuck|shit|bitch|ass|damn|hell|crap|bastard)\w*\b'
+    ]
+
+    SPAM_PATTERNS = [
+        r'(https?://\S+){3,}',
+        r'(\b\w+\b\s*){50,}',
+        r'([А-ЯA-Z]{10,})',
+        r'(!!!+|\.\.\.+){3,}'
+    ]
+
+    SUSPICIOUS_PHRASES = [
+        'займ', 'кредит', 'заработок', 'скидка', 'акция', 'промокод',
+        'переходи по ссылке', 'жми на ссылку', 'регистрируйся',
+        'loan', 'credit', 'discount', 'promo', 'click here'
+    ]
+
     def __init__(self):
         self.block_words = Config.BLOCK_WORDS
         self.negative_threshold = Config.NEGATIVE_THRESHOLD
-        
-        self.profanity_patterns = [
-            r'\b(хуй|пизд|ебл|еба|еби|бля|сук|дура|дурак|идиот|мудак|гавно|говно|жоп)\w*\b',
-            r'\b(fuck|shit|bitch|ass|damn|hell|crap|bastard)\w*\b'
-        ]
-        
-        self.spam_patterns = [
-            r'(https?://\S+){3,}',
-            r'(\b\w+\b\s*){50,}',
-            r'([А-ЯA-Z]{10,})',
-            r'(!!!+|\.\.\.+){3,}'
-        ]
-    
-    def check_profanity(self, text):
-        """Check for profanity in text"""
-        text_lower = text.lower()
-        
+
+        self.profanity_patterns = list(self.PROFANITY_PATTERNS)
+        self.spam_patterns = list(self.SPAM_PATTERNS)
+
+        self._compile()
+
+    def _compile(self):
+        """Build matchers once; every check below reuses them"""
+        # Block words keep config order so the reported word matches the old behaviour
+        self._block_order = {}
         for word in self.block_words:
-            if word.strip() and word.lower() in text_lower:
-                return True, f"Blocked word detected: {word}"
-        
-        for pattern in self.profanity_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                return True, "Profanity detected"
-        
+            if word.strip():
+                self._block_order.setdefault(word.lower(), word)
+        self._block_re = compile_phrases(self._block_order)
+
+        self._profanity_re = re.compile(
+            '|'.join(f'(?:{p})' for p in self.profanity_patterns), re.IGNORECASE
+        )
+        self._spam_re = re.compile('|'.join(f'(?:{p})' for p in self.spam_patterns))
+        self._suspicious_re = compile_phrases(self.SUSPICIOUS_PHRASES)
+
+    def _blocked_word(self, text_lower):
+        """First configured block word present in text (only called after the trie matched)"""
+        for key, word in self._block_order.items():
+            if key in text_lower:
+                return word
+        return None
+
+    def check_profanity(self, text, text_lower=None):
+        """Check for profanity in text"""
+        if text_lower is None:
+            text_lower = text.lower()
+
+        if self._block_re is not None and self._block_re.search(text_lower):
+            return True, f"Blocked word detected: {self._blocked_word(text_lower)}"
+
+        if self._profanity_re.search(text_lower):
+            return True, "Profanity detected"
+
         return False, None
-    
+
     def check_spam(self, text):
         """Check if text looks like spam"""
-        for pattern in self.spam_patterns:
-            if re.search(pattern, text):
-                return True, "Spam pattern detected"
-        
+        if self._spam_re.search(text):
+            return True, "Spam pattern detected"
+
         if len(text) > 3000:
             return True, "Text too long"
-        
-        unique_chars = len(set(text.replace(' ', '')))
-        if len(text) > 100 and unique_chars < 10:
-            return True, "Low character diversity (possible spam)"
-        
+
+        if len(text) > 100:
+            unique_chars = len(set(text.replace(' ', '')))
+            if unique_chars < 10:
+                return True, "Low character diversity (possible spam)"
+
         return False, None
-    
+
     def check_sentiment(self, sentiment_score):
         """Check if sentiment is too negative"""
         if sentiment_score < self.negative_threshold:
             return True, f"Highly negative sentiment: {sentiment_score:.2f}"
         return False, None
-    
-    def moderate(self, text, sentiment_score=None):
-        """
-        Moderate a review
-        Returns: (status, reason, requires_manual_review)
-        Status: 'approved', 'rejected', 'pending'
-        """
-        
-        is_profane, profanity_reason = self.check_profanity(text)
+
+    def check_promotional(self, text_lower):
+        """Promotional phrase together with a link"""
+        return 'http' in text_lower and self._suspicious_re.search(text_lower) is not None
+
+    def _moderate_normalized(self, text, text_lower, sentiment_score):
+        """Moderation with the text already lowercased once"""
+        is_profane, profanity_reason = self.check_profanity(text, text_lower)
         if is_profane:
             return 'rejected', profanity_reason, False
-        
+
         is_spam, spam_reason = self.check_spam(text)
         if is_spam:
             return 'rejected', spam_reason, False
-        
+
         if sentiment_score is not None:
             is_negative, sentiment_reason = self.check_sentiment(sentiment_score)
             if is_negative:
                 return 'pending', sentiment_reason, True
-        
-        suspicious_phrases = [
-            'займ', 'кредит', 'заработок', 'скидка', 'акция', 'промокод',
-            'переходи по ссылке', 'жми на ссылку', 'регистрируйся',
-            'loan', 'credit', 'discount', 'promo', 'click here'
-        ]
-        
-        text_lower = text.lower()
-        for phrase in suspicious_phrases:
-            if phrase in text_lower and 'http' in text_lower:
-                return 'pending', 'Suspicious promotional content', True
-        
+
+        if self.check_promotional(text_lower):
+            return 'pending', 'Suspicious promotional content', True
+
         return 'approved', None, False
-    
+
+    def moderate(self, text, sentiment_score=None):
+        """
+        Moderate a review
+        Returns: (status, reason, requires_manual_review)
+        Status: 'approved', 'rejected', 'pending'
+        """
+        text = text or ''
+        return self._moderate_normalized(text, text.lower(), sentiment_score)
+
+    def moderate_texts(self, texts, sentiment_scores=None):
+        """
+        Moderate many texts at once
+
+        All checks share the patterns compiled in __init__; each text is
+        lowercased once and identical texts are checked only once.
+
+        Args:
+            texts: List of texts
+            sentiment_scores: Optional list of sentiment scores (same length)
+
+        Returns:
+            List of (status, reason, requires_manual_review), same order as texts
+        """
+        if sentiment_scores is None:
+            sentiment_scores = [None] * len(texts)
+
+        # Reposts and duplicated comments are moderated once per (text, score)
+        verdicts = {}
+        results = []
+        for text, score in zip(texts, sentiment_scores):
+            key = (text or '', score)
+            verdict = verdicts.get(key)
+            if verdict is None:
+                verdict = self._moderate_normalized(key[0], key[0].lower(), score)
+                verdicts[key] = verdict
+            results.append(verdict)
+
+        return results
+
     def moderate_batch(self, reviews):
         """Moderate multiple reviews"""
-        results = []
-        for review in reviews:
-            text = review.get('text', '')
-            sentiment_score = review.get('sentiment_score')
-            
-            status, reason, requires_manual = self.moderate(text, sentiment_score)
-            
-            results.append({
+        verdicts = self.moderate_texts(
+            [review.get('text', '') for review in reviews],
+            [review.get('sentiment_score') for review in reviews]
+        )
+
+        return [
+            {
                 'review_id': review.get('id'),
                 'status': status,
                 'reason': reason,
                 'requires_manual_review': requires_manual
-            })
-        
-        return results
+            }
+            for review, (status, reason, requires_manual) in zip(reviews, verdicts)
+        ]
@@ -0,0 +1,115 @@
+"""
+Единый этап анализа собранных записей
+Тональность, ключевые слова и модерация считаются ровно один раз - после дедупликации
+"""
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewAnalysisStage:
+    """
+    Этап анализа в конвейере монитора: коллекторы только собирают,
+    дедупликация (ReviewStore.split_new) отбрасывает уже сохраненное,
+    а здесь новые записи оцениваются одним батчем.
+
+    Запись, уже оцененная тем же анализатором той же версии
+    (поля sentiment_analyzer / sentiment_model_version совпадают),
+    повторно не оценивается.
+    """
+
+    def __init__(self, sentiment_analyzer, moderator):
+        self.sentiment_analyzer = sentiment_analyzer
+        self.moderator = moderator
+        self.stats = {'scored': 0, 'reused': 0, 'analysis_ms': 0.0}
+
+    @property
+    def analyzer_name(self):
+        return self.sentiment_analyzer.analyzer_type
+
+    @property
+    def analyzer_version(self):
+        return getattr(self.sentiment_analyzer, 'model_version', None)
+
+    def is_scored(self, review_data):
+        """Запись уже оценена текущим анализатором"""
+        return (
+            review_data.get('sentiment_score') is not None
+            and review_data.get('sentiment_label')
+            and review_data.get('sentiment_analyzer') == self.analyzer_name
+            and review_data.get('sentiment_model_version') == self.analyzer_version
+        )
+
+    def score(self, reviews):
+        """
+        Проставить тональность записям, которые еще не оценены,
+        и промодерировать всю пачку
+
+        Args:
+            reviews: Список словарей от коллектора (поля тональности
+                проставляются на месте)
+
+        Returns:
+            Вердикты модерации (status, reason, requires_manual) в порядке reviews
+        """
+        started = time.perf_counter()
+
+        pending = [r for r in reviews if not self.is_scored(r)]
+        self.stats['reused'] += len(reviews) - len(pending)
+
+        if pending:
+            sentiments = self.sentiment_analyzer.analyze_sentiments([r['text'] for r in pending])
+            for review_data, sentiment in zip(pending, sentiments):
+                # При сбое модели результат дает запасной анализатор - записываем его,
+                # а версию только для основного (версия запасного не отслеживается)
+                analyzer = sentiment.get('analyzer') or self.analyzer_name
+                review_data['sentiment_score'] = sentiment['sentiment_score']
+                review_data['sentiment_label'] = sentiment['sentiment_label']
+                review_data['sentiment_analyzer'] = analyzer
+                review_data['sentiment_model_version'] = self.analyzer_version if analyzer == self.analyzer_name else None
+            self.stats['scored'] += len(pending)
+
+        # Модерация всей пачки одним проходом; вердикты передаются в build_row
+        verdicts = self.moderator.moderate_texts(
+            [r['text'] for r in reviews],
+            [r['sentiment_score'] for r in reviews]
+        )
+
+        self.stats['analysis_ms'] += (time.perf_counter() - started) * 1000
+        return verdicts
+
+    def build_row(self, review_data, verdict=None):
+        """
+        Строка для вставки в reviews: ключевые слова и модерация
+        для уже оцененной записи
+
+        Args:
+            verdict: Вердикт модерации из score(); без него запись модерируется здесь
+        """
+        text = review_data['text']
+        keywords = self.sentiment_analyzer.extract_keywords(text)
+
+        if verdict is None:
+            verdict = self.moderator.moderate(text, review_data['sentiment_score'])
+        moderation_status, moderation_reason, requires_manual = verdict
+
+        return {
+            'source': review_data['source'],
+            'source_id': review_data['source_id'],
+            'author': review_data.get('author'),
+            'author_id': review_data.get('author_id'),
+            'text': text,
+            'url': review_data.get('url'),
+            'published_date': review_data.get('published_date'),
+            'sentiment_score': review_data['sentiment_score'],
+            'sentiment_label': review_data['sentiment_label'],
+            'sentiment_analyzer': review_data.get('sentiment_analyzer'),
+            'sentiment_model_version': review_data.get('sentiment_model_version'),
+            'keywords': ','.join(keywords) if keywords else None,
+            'moderation_status': moderation_status,
+            'moderation_reason': moderation_reason,
+            'requires_manual_review': requires_manual,
+            'processed': not requires_manual,
+            'is_comment': review_data.get('is_comment', False)
+        }
@@ -1,14 +1,28 @@
 import logging
 import re
 from collections import Counter
+from config import Config
+from analyzers.sentiment_cache import SentimentCache, get_default_cache
+from utils.text_matcher import PhraseMatcher
 
 logger = logging.getLogger(__name__)
 
 class SentimentAnalyzer:
-    def __init__(self):
+    RUSENTIMENT_MODEL = 'blanchefort/rubert-base-cased-sentiment'
+    DOSTOEVSKY_MODEL = 'fasttext-social-network-model'
+    
+    def __init__(self, batch_size=None, cache=None):
+        """
+        Args:
+            batch_size: Размер батча для analyze_batch (по умолчанию из Config)
+            cache: SentimentCache; None - общий кэш процесса, False - без кэша
+        """
         self.analyzer_type = None
+        self.model_version = None
         self.model = None
         self.tokenizer = None
+        self.batch_size = batch_size or Config.SENTIMENT_BATCH_SIZE
+        self.cache = get_default_cache() if cache is None else (cache or None)
         
         # Попытка 1: RuSentiment (Transformers + BERT)
         try:
@@ -16,11 +30,12 @@ class SentimentAnalyzer:
             logger.info("Attempting to load RuSentiment (Transformers)...")
             self.model = pipeline(
                 "sentiment-analysis",
-                model="blanchefort/rubert-base-cased-sentiment",
+                model=self.RUSENTIMENT_MODEL,
                 truncation=True,
                 max_length=512
             )
             self.analyzer_type = 'rusentiment'
+            self.model_version = self.RUSENTIMENT_MODEL
             logger.info("✓ Sentiment analyzer initialized with RuSentiment (Transformers)")
             return
         except ImportError:
@@ -36,6 +51,7 @@ class SentimentAnalyzer:
             self.tokenizer = RegexTokenizer()
             self.model = FastTextSocialNetworkModel(tokenizer=self.tokenizer)
             self.analyzer_type = 'dostoevsky'
+            self.model_version = self.DOSTOEVSKY_MODEL
             logger.info("✓ Sentiment analyzer initialized with Dostoevsky")
             return
         except ImportError:
@@ -46,6 +62,7 @@ class SentimentAnalyzer:
         # Попытка 3: Rule-based (fallback)
         self.analyzer_type = 'rule_based'
         self._init_simple_analyzer()
+        self.model_version = self._lexicon_version()
         logger.info("✓ Sentiment analyzer initialized with Rule-Based method")
     
     def _init_simple_analyzer(self):
@@ -277,9 +294,44 @@ class SentimentAnalyzer:
             'не', 'ни', 'нет', 'без', 'никогда', 'никак', 'ничуть',
             'нисколько', 'отнюдь', 'вовсе не', 'далеко не'
         }
+        
+        # Автоматы для поиска всех фраз словаря за один проход по тексту
+        self.positive_matcher = PhraseMatcher(self.positive_words, lowercase=False)
+        self.negative_matcher = PhraseMatcher(self.negative_words, lowercase=False)
+    
+    def _lexicon_version(self):
+        """Версия словарей: меняется при любом изменении списков слов"""
+        import hashlib
+        
+        lexicon = '|'.join(
+            ','.join(sorted(words))
+            for words in (self.positive_words, self.negative_words, self.intensifiers, self.negations)
+        )
+        return 'rules-' + hashlib.blake2b(lexicon.encode('utf-8'), digest_size=4).hexdigest()
+    
+    def _cache_key(self, text):
+        if self.cache is None:
+            return None
+        return SentimentCache.make_key(self.analyzer_type, self.model_version, text)
+    
+    def _cache_store(self, key, result):
+        # Fallback-результаты (например, rule_based после ошибки BERT) не кэшируем
+        if key is not None and result.get('analyzer') == self.analyzer_type:
+            self.cache.set(key, result)
     
     def analyze(self, text):
         """Analyze sentiment of text"""
+        key = self._cache_key(text)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        result = self._analyze_uncached(text)
+        self._cache_store(key, result)
+        return result
+    
+    def _analyze_uncached(self, text):
         if self.analyzer_type == 'rusentiment':
             return self._analyze_with_rusentiment(text)
         elif self.analyzer_type == 'dostoevsky':
@@ -302,74 +354,83 @@ class SentimentAnalyzer:
             text_truncated = text[:2000]  # Увеличил лимит
             
             result = self.model(text_truncated)[0]
-            
-            # RuSentiment (rubert-base-cased-sentiment) возвращает: 
-            # neutral, positive, negative (в нижнем регистре)
-            raw_label = result['label'].lower()
-            score_value = result['score']  # уверенность от 0 до 1
-            
-            # Определяем sentiment_label и base_score
-            if raw_label == 'positive':
-                sentiment_label = 'positive'
-                base_score = 1.0
-            elif raw_label == 'negative':
-                sentiment_label = 'negative'
-                base_score = -1.0
-            else:  # neutral или любой другой
-                sentiment_label = 'neutral'
-                base_score = 0.0
-            
-            # Итоговый score: направление * уверенность
-            sentiment_score = base_score * score_value
-            
-            return {
-                'sentiment_score': float(sentiment_score),
-                'sentiment_label': sentiment_label,
-                'confidence': float(score_value),
-                'analyzer': 'rusentiment',
-                'raw_result': result
-            }
+            return self._rusentiment_result(result)
         except Exception as e:
             logger.error(f"Error analyzing sentiment with RuSentiment: {e}")
             logger.debug(f"Text that caused error: {text[:100]}")
             # Fallback к rule-based
             return self._analyze_simple(text)
     
+    def _rusentiment_result(self, result):
+        """Преобразует ответ pipeline RuSentiment в общий формат"""
+        # RuSentiment (rubert-base-cased-sentiment) возвращает: 
+        # neutral, positive, negative (в нижнем регистре)
+        raw_label = result['label'].lower()
+        score_value = result['score']  # уверенность от 0 до 1
+        
+        # Определяем sentiment_label и base_score
+        if raw_label == 'positive':
+            sentiment_label = 'positive'
+            base_score = 1.0
+        elif raw_label == 'negative':
+            sentiment_label = 'negative'
+            base_score = -1.0
+        else:  # neutral или любой другой
+            sentiment_label = 'neutral'
+            base_score = 0.0
+        
+        # Итоговый score: направление * уверенность
+        sentiment_score = base_score * score_value
+        
+        return {
+            'sentiment_score': float(sentiment_score),
+            'sentiment_label': sentiment_label,
+            'confidence': float(score_value),
+            'analyzer': 'rusentiment',
+            'raw_result': result
+        }
+    
     def _analyze_with_dostoevsky(self, text):
         """Анализ с помощью Dostoevsky"""
         try:
             results = self.model.predict([text], k=1)
             if results and len(results) > 0:
-                result = results[0]
-                
-                sentiment_label = 'neutral'
-                sentiment_score = 0.0
-                
-                if 'positive' in result:
-                    sentiment_label = 'positive'
-                    sentiment_score = result['positive']
-                elif 'negative' in result:
-                    sentiment_label = 'negative'
-                    sentiment_score = -result['negative']
-                elif 'neutral' in result:
-                    sentiment_label = 'neutral'
-                    sentiment_score = 0.0
-                
-                return {
-                    'sentiment_score': sentiment_score,
-                    'sentiment_label': sentiment_label,
-                    'confidence': max(result.values()) if result else 0.0,
-                    'analyzer': 'dostoevsky',
-                    'raw_result': result
-                }
+                return self._dostoevsky_result(results[0])
         except Exception as e:
             logger.error(f"Error analyzing sentiment with Dostoevsky: {e}")
         
+        return self._neutral_result('dostoevsky')
+    
+    def _dostoevsky_result(self, result):
+        """Преобразует ответ Dostoevsky в общий формат"""
+        sentiment_label = 'neutral'
+        sentiment_score = 0.0
+        
+        if 'positive' in result:
+            sentiment_label = 'positive'
+            sentiment_score = result['positive']
+        elif 'negative' in result:
+            sentiment_label = 'negative'
+            sentiment_score = -result['negative']
+        elif 'neutral' in result:
+            sentiment_label = 'neutral'
+            sentiment_score = 0.0
+        
+        return {
+            'sentiment_score': sentiment_score,
+            'sentiment_label': sentiment_label,
+            'confidence': max(result.values()) if result else 0.0,
+            'analyzer': 'dostoevsky',
+            'raw_result': result
+        }
+    
+    @staticmethod
+    def _neutral_result(analyzer):
         return {
             'sentiment_score': 0.0,
             'sentiment_label': 'neutral',
             'confidence': 0.0,
-            'analyzer': 'dostoevsky'
+            'analyzer': analyzer
         }
     
     def _analyze_simple(self, text):
@@ -385,33 +446,21 @@ class SentimentAnalyzer:
         text_lower = text.lower()
         words = text_lower.split()
         
-        # Подсчет с учетом усилителей
-        positive_score = 0.0
-        negative_score = 0.0
+        # Все фразы словарей, встречающиеся в тексте (подстрочный поиск)
+        positive_found = self.positive_matcher.find_all(text_lower)
+        negative_found = self.negative_matcher.find_all(text_lower)
         
-        for i, word in enumerate(words):
-            # Проверяем усилитель перед словом
-            multiplier = 1.0
-            if i > 0 and words[i-1] in self.intensifiers:
-                multiplier = 1.5
-            
-            # Проверяем полные фразы
-            for phrase in self.positive_words:
-                if phrase in text_lower:
-                    positive_score += multiplier * len(phrase.split())
-            
-            for phrase in self.negative_words:
-                if phrase in text_lower:
-                    negative_score += multiplier * len(phrase.split())
+        # Каждая найденная фраза засчитывается за каждое слово текста
+        # с весом len(phrase.split()); слово после усилителя весит 1.5
+        intensified = sum(1 for prev in words[:-1] if prev in self.intensifiers)
+        multiplier_sum = len(words) + 0.5 * intensified
         
-        # Также проверяем отдельные слова
-        for word in self.positive_words:
-            if ' ' not in word and word in text_lower:
-                positive_score += 1.0
+        positive_score = multiplier_sum * sum(len(phrase.split()) for phrase in positive_found)
+        negative_score = multiplier_sum * sum(len(phrase.split()) for phrase in negative_found)
         
-        for word in self.negative_words:
-            if ' ' not in word and word in text_lower:
-                negative_score += 1.0
+        # Также учитываем отдельные слова
+        positive_score += sum(1.0 for phrase in positive_found if ' ' not in phrase)
+        negative_score += sum(1.0 for phrase in negative_found if ' ' not in phrase)
         
         # Нормализация
         total_words = max(len(words), 1)
@@ -470,29 +519,134 @@ class SentimentAnalyzer:
         
         return keywords
     
-    def analyze_batch(self, texts):
-        """Analyze multiple texts"""
+    def analyze_batch(self, texts, batch_size=None):
+        """
+        Analyze multiple texts
+        
+        Модель вызывается один раз на батч из batch_size текстов,
+        а не на каждый текст отдельно.
+        """
+        sentiments = self.analyze_sentiments(texts, batch_size=batch_size)
+        
         results = []
-        for text in texts:
-            sentiment = self.analyze(text)
-            keywords = self.extract_keywords(text)
+        for text, sentiment in zip(texts, sentiments):
             results.append({
                 'sentiment': sentiment,
-                'keywords': keywords
+                'keywords': self.extract_keywords(text or '')
             })
         return results
     
+    def analyze_sentiments(self, texts, batch_size=None):
+        """
+        Батчевый анализ тональности
+        
+        Args:
+            texts: Список текстов
+            batch_size: Размер батча (по умолчанию Config.SENTIMENT_BATCH_SIZE)
+        
+        Returns:
+            Список результатов в том же порядке, что и texts
+        """
+        texts = list(texts)
+        batch_size = max(1, batch_size or self.batch_size)
+        results = [None] * len(texts)
+        
+        # В модель уходят только тексты, которых нет в кэше (и каждый один раз)
+        pending = {}
+        for i, text in enumerate(texts):
+            key = self._cache_key(text)
+            if key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.setdefault(key if key is not None else i, []).append(i)
+        
+        if not pending:
+            return results
+        
+        keys = list(pending)
+        to_analyze = [texts[pending[key][0]] for key in keys]
+        
+        if self.analyzer_type == 'rusentiment':
+            analyzed = self._analyze_batch_rusentiment(to_analyze, batch_size)
+        elif self.analyzer_type == 'dostoevsky':
+            analyzed = self._analyze_batch_dostoevsky(to_analyze, batch_size)
+        else:
+            analyzed = [self._analyze_simple(text) for text in to_analyze]
+        
+        for key, result in zip(keys, analyzed):
+            if isinstance(key, str):
+                self._cache_store(key, result)
+            for i in pending[key]:
+                results[i] = result
+        
+        return results
+    
+    def _analyze_batch_rusentiment(self, texts, batch_size):
+        """
+        Батчи для BERT: тексты сортируются по длине, чтобы в одном батче
+        оказывались тексты близкой длины и паддинг до самого длинного
+        в батче был минимальным
+        """
+        results = [None] * len(texts)
+        
+        pending = []
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                results[i] = self._neutral_result('rusentiment')
+            else:
+                pending.append(i)
+        
+        pending.sort(key=lambda i: len(texts[i]))
+        
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            try:
+                outputs = self.model(
+                    [texts[i][:2000] for i in chunk],
+                    batch_size=len(chunk),
+                    truncation=True,
+                    max_length=512
+                )
+                for i, output in zip(chunk, outputs):
+                    results[i] = self._rusentiment_result(output)
+            except Exception as e:
+                logger.error(f"Error analyzing batch with RuSentiment: {e}")
+                for i in chunk:
+                    results[i] = self._analyze_with_rusentiment(texts[i])
+        
+        return results
+    
+    def _analyze_batch_dostoevsky(self, texts, batch_size):
+        """Батчи для Dostoevsky: predict принимает список текстов"""
+        results = []
+        
+        for start in range(0, len(texts), batch_size):
+            chunk = [text or '' for text in texts[start:start + batch_size]]
+            try:
+                outputs = self.model.predict(chunk, k=1)
+                for output in outputs:
+                    results.append(self._dostoevsky_result(output) if output else self._neutral_result('dostoevsky'))
+            except Exception as e:
+                logger.error(f"Error analyzing batch with Dostoevsky: {e}")
+                results.extend(self._analyze_with_dostoevsky(text) for text in chunk)
+        
+        return results
+    
     def get_analyzer_info(self):
         """Получить информацию о текущем анализаторе"""
         info = {
             'type': self.analyzer_type,
-            'available': True
+            'version': self.model_version,
+            'available': True,
+            'cache': self.cache.stats() if self.cache is not None else None
         }
         
         if self.analyzer_type == 'rusentiment':
             info.update({
                 'name': 'RuSentiment (Transformers + BERT)',
-                'model': 'blanchefort/rubert-base-cased-sentiment',
+                'model': self.RUSENTIMENT_MODEL,
                 'language': 'Russian',
                 'description': 'Современная нейросетевая модель на основе BERT для анализа тональности русскоязычных текстов',
                 'accuracy': 'Высокая (~85-90%)',
@@ -0,0 +1,180 @@
+"""
+Кэш результатов анализа тональности
+Ключ: (тип анализатора, версия модели, хэш нормализованного текста)
+Два уровня: ограниченный LRU в памяти и опциональная SQLite-база на диске
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """
+    Нормализация перед хэшированием: NFC и схлопывание пробелов
+
+    Регистр не меняется - BERT-модель чувствительна к регистру.
+    """
+    if not text:
+        return ''
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def text_hash(text):
+    """blake2b-хэш нормализованного текста"""
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class SentimentCache:
+    """
+    Двухуровневый кэш результатов анализатора
+
+    Args:
+        max_size: Максимум записей в памяти (0 - кэш в памяти отключен)
+        db_path: Путь к SQLite-файлу для постоянного кэша (None - только память)
+    """
+
+    def __init__(self, max_size=10000, db_path=None):
+        self.max_size = max_size
+        self.db_path = db_path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._init_disk(db_path)
+
+    def _init_disk(self, db_path):
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS sentiment_cache ('
+                'key TEXT PRIMARY KEY, result TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            self._conn.commit()
+            logger.info(f"[SENTIMENT CACHE] Постоянный кэш: {db_path}")
+        except Exception as e:
+            logger.warning(f"[SENTIMENT CACHE] Не удалось открыть {db_path}: {e}, используем только память")
+            self._conn = None
+
+    @staticmethod
+    def make_key(analyzer_type, model_version, text):
+        """Ключ кэша для текста"""
+        return f"{analyzer_type}:{model_version}:{text_hash(text)}"
+
+    def get(self, key):
+        """Результат из кэша или None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return dict(self._memory[key])
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        'SELECT result FROM sentiment_cache WHERE key = ?', (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.debug(f"[SENTIMENT CACHE] Ошибка чтения: {e}")
+                    row = None
+
+                if row:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return dict(result)
+
+            self.misses += 1
+            return None
+
+    def set(self, key, result):
+        """Сохранить результат в оба уровня"""
+        with self._lock:
+            self._remember(key, result)
+
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO sentiment_cache (key, result, created_at) VALUES (?, ?, ?)',
+                        (key, json.dumps(result, ensure_ascii=False, default=float), time.time())
+                    )
+                    self._conn.commit()
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    logger.debug(f"[SENTIMENT CACHE] Ошибка записи: {e}")
+
+    def _remember(self, key, result):
+        if self.max_size <= 0:
+            return
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Очистить оба уровня и счетчики"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM sentiment_cache')
+                self._conn.commit()
+            self.hits = self.memory_hits = self.disk_hits = self.misses = 0
+
+    def stats(self):
+        """Счетчики попаданий для подбора размера кэша"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'memory_size': len(self._memory),
+            'max_size': self.max_size,
+            'disk_path': self.db_path if self._conn is not None else None
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Общий кэш процесса, настроенный из Config
+
+    Возвращает None, если кэш отключен (SENTIMENT_CACHE_SIZE=0 и нет пути к файлу).
+    """
+    global _default_cache
+
+    if Config.SENTIMENT_CACHE_SIZE <= 0 and not Config.SENTIMENT_CACHE_PATH:
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SentimentCache(
+                max_size=Config.SENTIMENT_CACHE_SIZE,
+                db_path=Config.SENTIMENT_CACHE_PATH or None
+            )
+        return _default_cache
@@ -1,12 +1,23 @@
 """
 Улучшенное Flask приложение с WebSocket поддержкой
 """
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import (
+    Flask, render_template, request, jsonify, redirect, url_for, make_response, Response, stream_with_context
+)
 from flask_sqlalchemy import SQLAlchemy
 from flask_socketio import SocketIO, emit
 from models import db, Review, MonitoringLog
 from config import Config
-from datetime import datetime, timedelta
+from utils.text_filter import settings_changed
+from utils.dashboard_stats import dashboard_stats
+from utils.review_rollups import clear_rollups, ensure_rollups
+from utils.telegram_watermarks import clear_watermarks
+from utils.review_search import install_for_engine
+from utils.review_query import (
+    ReviewFilters, InvalidCursor, MAX_PER_PAGE, filter_reviews, keyset_page, approximate_total
+)
+from utils.review_export import EXPORT_FORMATS, ExportError, export_filename, export_reviews
+from datetime import datetime
 import logging
 import threading
 import time
@@ -33,6 +44,10 @@ monitoring_state = {
 
 with app.app_context():
     db.create_all()
+    # Почасовые агрегаты для базы, созданной до появления review_rollups
+    ensure_rollups()
+    # FTS5-индекс для поиска на странице отзывов
+    install_for_engine(db.engine)
 
 # ==================== ТЕСТОВЫЙ РОУТ ====================
 @app.route('/ping')
@@ -46,41 +61,22 @@ def index():
     """Современный Dashboard"""
     try:
         with app.app_context():
-            total_reviews = Review.query.count()
-            
-            today = datetime.utcnow().date()
-            today_count = Review.query.filter(
-                db.func.date(Review.collected_date) == today
-            ).count()
-            
-            # Вчера для расчета изменения
-            yesterday = today - timedelta(days=1)
-            yesterday_count = Review.query.filter(
-                db.func.date(Review.collected_date) == yesterday
-            ).count()
+            counters = dashboard_stats.get()
+            total_reviews = counters['total']
+            today_count = counters['today']
             
             # Изменение за 24 часа
-            today_change = today_count - yesterday_count
+            today_change = today_count - counters['yesterday']
             
-            week_ago = today - timedelta(days=7)
-            week_count = Review.query.filter(
-                db.func.date(Review.collected_date) >= week_ago
-            ).count()
-            
-            positive = Review.query.filter(Review.sentiment_label == 'positive').count()
-            negative = Review.query.filter(Review.sentiment_label == 'negative').count()
-            neutral = Review.query.filter(Review.sentiment_label == 'neutral').count()
+            positive = counters['by_sentiment'].get('positive', 0)
+            negative = counters['by_sentiment'].get('negative', 0)
+            neutral = counters['by_sentiment'].get('neutral', 0)
             
             # Расчет процентов
             positive_percent = round((positive / total_reviews * 100) if total_reviews > 0 else 0, 1)
             negative_percent = round((negative / total_reviews * 100) if total_reviews > 0 else 0, 1)
             neutral_percent = round((neutral / total_reviews * 100) if total_reviews > 0 else 0, 1)
             
-            by_source = db.session.query(
-                Review.source, 
-                db.func.count(Review.id)
-            ).group_by(Review.source).all()
-            
             recent_reviews = Review.query.order_by(
                 Review.collected_date.desc()
             ).limit(10).all()
@@ -93,14 +89,14 @@ def index():
                 'total': total_reviews,
                 'today': today_count,
                 'today_change': today_change,
-                'week': week_count,
+                'week': counters['week'],
                 'positive': positive,
                 'negative': negative,
                 'neutral': neutral,
                 'positive_percent': positive_percent,
                 'negative_percent': negative_percent,
                 'neutral_percent': neutral_percent,
-                'by_source': dict(by_source),
+                'by_source': dict(counters['by_source']),
                 'last_monitoring': last_monitoring,
                 'is_running': monitoring_state['is_running']
             }
@@ -119,59 +115,46 @@ def index():
 @app.route('/reviews')
 def reviews_list():
     """Страница со списком отзывов и фильтрами"""
-    page = request.args.get('page', 1, type=int)
     per_page = 20
+    cursor = request.args.get('cursor') or None
+    fragment = request.args.get('fragment')
+    filters = ReviewFilters.from_args(request.args)
     
-    source = request.args.get('source', '')
-    sentiment = request.args.get('sentiment', '')
-    time_filter = request.args.get('time', 'all')
-    search = request.args.get('search', '')
-    kind = request.args.get('kind', 'all')
+    # Фильтры по источнику, тональности, типу, времени и поиск (FTS5 с ранжированием)
+    query, rank = filter_reviews(filters)
     
-    query = Review.query
-    
-    # Фильтр по источнику
-    if source:
-        query = query.filter_by(source=source)
-    
-    # Фильтр по тональности
-    if sentiment:
-        query = query.filter_by(sentiment_label=sentiment)
-
-    # Фильтр по типу записи
-    if kind == 'comments':
-        query = query.filter(Review.is_comment.is_(True))
-    elif kind == 'posts':
-        query = query.filter((Review.is_comment.is_(False)) | (Review.is_comment.is_(None)))
-    
-    # Фильтр по времени
-    now = datetime.utcnow()
-    if time_filter == 'hour':
-        query = query.filter(Review.collected_date >= now - timedelta(hours=1))
-    elif time_filter == 'day':
-        query = query.filter(Review.collected_date >= now - timedelta(days=1))
-    elif time_filter == 'week':
-        query = query.filter(Review.collected_date >= now - timedelta(weeks=1))
-    elif time_filter == 'month':
-        query = query.filter(Review.collected_date >= now - timedelta(days=30))
-    elif time_filter == 'year':
-        query = query.filter(Review.collected_date >= now - timedelta(days=365))
+    # Постранично по курсору: без OFFSET глубокие страницы не медленнее первой
+    try:
+        page = keyset_page(query, cursor, per_page, rank)
+    except InvalidCursor:
+        if fragment:
+            return jsonify({'error': 'Неверный курсор'}), 400
+        args = request.args.to_dict()
+        args.pop('cursor', None)
+        return redirect(url_for('reviews_list', **args))
     
-    # Поиск по тексту
-    if search:
-        query = query.filter(Review.text.contains(search))
+    # Подгрузка при прокрутке: только карточки, курсор следующей порции - в заголовке
+    if fragment:
+        response = make_response(render_template('_review_cards.html', reviews=page.items))
+        response.headers['X-Next-Cursor'] = page.next_cursor or ''
+        return response
     
-    pagination = query.order_by(Review.collected_date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    # Общее число - по почасовым агрегатам; при поиске - COUNT по FTS-индексу
+    total, total_approximate = approximate_total(filters)
+    if total is None:
+        total = query.count()
     
     return render_template('reviews_enhanced.html', 
-                         pagination=pagination,
-                         source=source,
-                         sentiment=sentiment,
-                         time_filter=time_filter,
-                         search=search,
-                         kind=kind)
+                         reviews=page.items,
+                         next_cursor=page.next_cursor,
+                         cursor=cursor,
+                         total=total,
+                         total_approximate=total_approximate,
+                         source=filters.source,
+                         sentiment=filters.sentiment,
+                         time_filter=filters.time_filter,
+                         search=filters.search,
+                         kind=filters.kind)
 
 # ==================== МОНИТОРИНГ ====================
 @app.route('/monitoring')
@@ -202,31 +185,14 @@ def help_page():
 @app.route('/api/stats')
 def api_stats():
     """API статистики"""
-    today = datetime.utcnow().date()
-    week_ago = today - timedelta(days=7)
-    
-    total = Review.query.count()
-    today_count = Review.query.filter(
-        db.func.date(Review.collected_date) == today
-    ).count()
-    week_count = Review.query.filter(
-        db.func.date(Review.collected_date) >= week_ago
-    ).count()
-    
-    by_source = db.session.query(
-        Review.source, db.func.count(Review.id)
-    ).group_by(Review.source).all()
-    
-    by_sentiment = db.session.query(
-        Review.sentiment_label, db.func.count(Review.id)
-    ).group_by(Review.sentiment_label).all()
+    counters = dashboard_stats.get()
     
     return jsonify({
-        'total': total,
-        'today': today_count,
-        'week': week_count,
-        'by_source': dict(by_source),
-        'by_sentiment': dict(by_sentiment)
+        'total': counters['total'],
+        'today': counters['today'],
+        'week': counters['week'],
+        'by_source': counters['by_source'],
+        'by_sentiment': counters['by_sentiment']
     })
 
 @app.route('/api/monitoring/start', methods=['POST'])
@@ -297,6 +263,8 @@ def clear_database():
         if clear_type == 'reviews':
             count = Review.query.count()
             Review.query.delete()
+            clear_rollups()
+            clear_watermarks()
             message = f'Удалено отзывов: {count}'
         elif clear_type == 'logs':
             count = MonitoringLog.query.count()
@@ -306,12 +274,15 @@ def clear_database():
             reviews_count = Review.query.count()
             logs_count = MonitoringLog.query.count()
             Review.query.delete()
+            clear_rollups()
+            clear_watermarks()
             MonitoringLog.query.delete()
             message = f'Удалено отзывов: {reviews_count}, логов: {logs_count}'
         else:
             return jsonify({'success': False, 'message': 'Неверный тип очистки'}), 400
         
         db.session.commit()
+        dashboard_stats.invalidate()
         
         return jsonify({
             'success': True,
@@ -345,47 +316,62 @@ def stop_monitoring():
 
 @app.route('/api/reviews/filtered', methods=['GET'])
 def get_filtered_reviews():
-    """Получение отзывов с фильтрацией"""
-    time_filter = request.args.get('time', 'all')
-    source = request.args.get('source', '')
-    sentiment = request.args.get('sentiment', '')
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 50, type=int)
+    """
+    Получение отзывов с фильтрацией
     
-    query = Review.query
+    Постранично по курсору: next_cursor из ответа передается в ?cursor=.
+    count=approximate (по умолчанию) - total по почасовым агрегатам,
+    count=exact - точный COUNT, count=none - без total.
+    """
+    filters = ReviewFilters.from_args(request.args)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), MAX_PER_PAGE)
+    cursor = request.args.get('cursor') or None
+    count_mode = request.args.get('count', 'approximate')
     
-    # Фильтр по времени
-    now = datetime.utcnow()
-    if time_filter == 'hour':
-        query = query.filter(Review.collected_date >= now - timedelta(hours=1))
-    elif time_filter == 'day':
-        query = query.filter(Review.collected_date >= now - timedelta(days=1))
-    elif time_filter == 'week':
-        query = query.filter(Review.collected_date >= now - timedelta(weeks=1))
-    elif time_filter == 'month':
-        query = query.filter(Review.collected_date >= now - timedelta(days=30))
-    elif time_filter == 'year':
-        query = query.filter(Review.collected_date >= now - timedelta(days=365))
+    query, rank = filter_reviews(filters)
     
-    # Дополнительные фильтры
-    if source:
-        query = query.filter_by(source=source)
-    if sentiment:
-        query = query.filter_by(sentiment_label=sentiment)
+    try:
+        page = keyset_page(query, cursor, per_page, rank)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     
-    total = query.count()
-    reviews = query.order_by(Review.collected_date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    total, total_approximate = None, False
+    if count_mode == 'exact':
+        total = query.count()
+    elif count_mode == 'approximate':
+        total, total_approximate = approximate_total(filters)
     
     return jsonify({
         'total': total,
-        'page': page,
+        'total_approximate': total_approximate,
         'per_page': per_page,
-        'pages': reviews.pages,
-        'reviews': [r.to_dict() for r in reviews.items]
+        'next_cursor': page.next_cursor,
+        'has_more': page.has_more,
+        'reviews': [r.to_dict() for r in page.items]
     })
 
+@app.route('/api/reviews/export')
+def export_reviews_api():
+    """
+    Потоковая выгрузка отзывов: ?format=csv|jsonl|parquet и фильтры /api/reviews/filtered
+    
+    Строки читаются из БД порциями и отдаются по мере записи, без загрузки всей таблицы.
+    """
+    export_format = request.args.get('format', 'csv')
+    filters = ReviewFilters.from_args(request.args)
+    
+    try:
+        chunks = export_reviews(filters, export_format)
+    except ExportError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    mimetype = EXPORT_FORMATS[export_format][0]
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{export_filename(export_format)}"'}
+    )
+
 @app.route('/api/settings/save', methods=['POST'])
 def save_settings():
     """Сохранение настроек в .env файл"""
@@ -452,6 +438,14 @@ def save_settings():
                 for key, value in other_vars.items():
                     f.write(f'{key}={value}\n')
         
+        # Ключевые слова применяются сразу, без перезапуска: списки меняются на месте
+        # (их держат коллекторы), а фильтры пересобирают наборы при следующей проверке
+        if isinstance(data.get('COMPANY_KEYWORDS'), str) and data['COMPANY_KEYWORDS'].strip():
+            Config.COMPANY_KEYWORDS[:] = [k.strip() for k in data['COMPANY_KEYWORDS'].split(',')]
+        if isinstance(data.get('GEO_KEYWORDS'), str) and data['GEO_KEYWORDS'].strip():
+            Config.GEO_KEYWORDS[:] = data['GEO_KEYWORDS'].split(',')
+        settings_changed()
+        
         logger.info('Settings saved successfully')
         
         return jsonify({
@@ -574,30 +568,22 @@ def get_posts_without_comments_api():
 def get_comments_stats_api():
     """Общая статистика комментариев"""
     try:
-        from utils.comment_helper import CommentHelper
-        
-        total_comments = CommentHelper.get_all_comments_count()
-        total_posts = Review.query.filter_by(is_comment=False).count()
-        
-        # Статистика по источникам
-        sources_stats = db.session.query(
-            Review.source,
-            db.func.count(Review.id).label('count')
-        ).filter_by(is_comment=True).group_by(Review.source).all()
+        comments = dashboard_stats.get()['comments']
+        total_comments = comments['total']
+        total_posts = comments['posts']
         
-        # Статистика по тональности комментариев
-        sentiment_stats = db.session.query(
-            Review.sentiment_label,
-            db.func.count(Review.id).label('count')
-        ).filter_by(is_comment=True).group_by(Review.sentiment_label).all()
+        # Без тональности считаются нейтральными
+        by_sentiment = {}
+        for label, count in comments['by_sentiment'].items():
+            by_sentiment[label or 'neutral'] = by_sentiment.get(label or 'neutral', 0) + count
         
         return jsonify({
             'success': True,
             'total_comments': total_comments,
             'total_posts': total_posts,
             'avg_comments_per_post': round(total_comments / total_posts, 2) if total_posts > 0 else 0,
-            'by_source': {source: count for source, count in sources_stats},
-            'by_sentiment': {label or 'neutral': count for label, count in sentiment_stats}
+            'by_source': comments['by_source'],
+            'by_sentiment': by_sentiment
         })
     except Exception as e:
         logger.error(f"Error getting comments stats: {e}")
@@ -3,8 +3,9 @@
 """
 import asyncio
 import logging
+import time
 from datetime import datetime
-from models import db, Review, MonitoringLog
+from models import db, MonitoringLog
 from collectors.vk_collector import VKCollector
 try:
     from collectors.telegram_user_collector import TelegramUserCollector as TelegramCollector
@@ -13,6 +14,8 @@ except ImportError:
 from collectors.news_collector import NewsCollector
 from analyzers.sentiment_analyzer import SentimentAnalyzer
 from analyzers.moderator import Moderator
+from analyzers.review_analysis import ReviewAnalysisStage
+from utils.review_store import ReviewStore
 from config import Config
 from app import app
 import threading
@@ -26,18 +29,24 @@ logger = logging.getLogger(__name__)
 class AsyncReviewMonitor:
     def __init__(self):
         self.sentiment_analyzer = SentimentAnalyzer()
+        self.moderator = Moderator()
+        self.analysis_stage = ReviewAnalysisStage(self.sentiment_analyzer, self.moderator)
+        
+        # Коллекторы только собирают данные: тональность считается один раз
+        # в ReviewAnalysisStage после дедупликации
         self.vk_collector = VKCollector()
         self.telegram_collector = TelegramCollector()
-        self.news_collector = NewsCollector(sentiment_analyzer=self.sentiment_analyzer)
-        self.moderator = Moderator()
+        self.news_collector = NewsCollector()
         self.is_running = False
-        
-        # Передаем sentiment_analyzer во все коллекторы
-        self.vk_collector.sentiment_analyzer = self.sentiment_analyzer
-        self.telegram_collector.sentiment_analyzer = self.sentiment_analyzer
     
-    async def collect_from_source_async(self, source_name, collect_callable):
-        """Асинхронный сбор отзывов из одного источника"""
+    async def collect_from_source_async(self, source_name, collect_callable, on_saved=None):
+        """
+        Асинхронный сбор отзывов из одного источника
+        
+        Args:
+            on_saved: Вызывается после записи отзывов в БД (например, сохранение
+                отметок синхронизации Telegram)
+        """
         log = None
         log_id = None
         
@@ -65,50 +74,26 @@ class AsyncReviewMonitor:
             logger.info(f"[{source_name.upper()}] ЭТАП 3/4: Анализ и модерация...")
             
             reviews_added = 0
+            store = ReviewStore()
             
             with app.app_context():
+                new_reviews, existing = store.split_new(reviews)
+                logger.info(f"[{source_name.upper()}]   Новых записей: {len(new_reviews)}, уже в БД: {len(existing)}")
+                
+                # Все новые тексты цикла оцениваются за один проход батчами
+                analysis_started = time.perf_counter()
+                verdicts = self.analysis_stage.score(new_reviews)
+                logger.info(f"[{source_name.upper()}]   Анализ тональности: {len(new_reviews)} текстов за {time.perf_counter() - analysis_started:.2f} с")
+                
+                rows = []
                 processed_count = 0
-                for review_data in reviews:
+                for review_data, verdict in zip(new_reviews, verdicts):
                     processed_count += 1
                     try:
                         if processed_count % 5 == 0:
-                            logger.info(f"[{source_name.upper()}]   → Обработано: {processed_count}/{len(reviews)}")
+                            logger.info(f"[{source_name.upper()}]   → Обработано: {processed_count}/{len(new_reviews)}")
                         
-                        existing = Review.query.filter_by(
-                            source_id=review_data['source_id']
-                        ).first()
-                        
-                        if existing:
-                            logger.debug(f"[{source_name.upper()}] Отзыв {review_data['source_id']} уже существует")
-                            continue
-                        
-                        sentiment = self.sentiment_analyzer.analyze(review_data['text'])
-                        keywords = self.sentiment_analyzer.extract_keywords(review_data['text'])
-                        
-                        moderation_status, moderation_reason, requires_manual = self.moderator.moderate(
-                            review_data['text'],
-                            sentiment['sentiment_score']
-                        )
-                        
-                        review = Review(
-                            source=review_data['source'],
-                            source_id=review_data['source_id'],
-                            author=review_data.get('author'),
-                            author_id=review_data.get('author_id'),
-                            text=review_data['text'],
-                            url=review_data.get('url'),
-                            published_date=review_data.get('published_date'),
-                            sentiment_score=sentiment['sentiment_score'],
-                            sentiment_label=sentiment['sentiment_label'],
-                            keywords=','.join(keywords) if keywords else None,
-                            moderation_status=moderation_status,
-                            moderation_reason=moderation_reason,
-                            requires_manual_review=requires_manual,
-                            processed=not requires_manual
-                        )
-                        
-                        db.session.add(review)
-                        reviews_added += 1
+                        rows.append(self.analysis_stage.build_row(review_data, verdict))
                         
                     except Exception as e:
                         logger.error(f"[{source_name.upper()}] Ошибка обработки отзыва: {e}")
@@ -117,7 +102,12 @@ class AsyncReviewMonitor:
                 logger.info(f"")
                 logger.info(f"[{source_name.upper()}] ЭТАП 4/4: Сохранение в базу данных...")
                 
+                reviews_added = store.insert_rows(rows)
                 db.session.commit()
+                logger.info(f"[{source_name.upper()}]   {store.format_stats()}")
+                
+                if on_saved:
+                    on_saved()
                 
                 if log_id:
                     log = MonitoringLog.query.get(log_id)
@@ -187,7 +177,10 @@ class AsyncReviewMonitor:
 
         tasks = [
             self.collect_from_source_async('vk', lambda: self.vk_collector.collect()),
-            self.collect_from_source_async('telegram', call_with_comments(self.telegram_collector)),
+            self.collect_from_source_async(
+                'telegram', call_with_comments(self.telegram_collector),
+                on_saved=getattr(self.telegram_collector, 'commit_watermarks', None)
+            ),
             self.collect_from_source_async('news', lambda: self.news_collector.collect_with_comments()),
         ]
         
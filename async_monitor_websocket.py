@@ -4,7 +4,7 @@
 import asyncio
 import logging
 from datetime import datetime
-from models import db, Review, MonitoringLog
+from models import db, MonitoringLog
 from collectors.vk_collector import VKCollector
 
 # Настройка логгера
@@ -44,7 +44,9 @@ except ImportError as e:
             logger.warning("[MONITOR] OK коллектор недоступен")
 from analyzers.sentiment_analyzer import SentimentAnalyzer
 from analyzers.moderator import Moderator
+from analyzers.review_analysis import ReviewAnalysisStage
 from analyzers.dostoevsky_analyzer import DostoevskyAnalyzer
+from utils.review_store import ReviewStore
 from config import Config
 from app_enhanced import app
 
@@ -77,6 +79,7 @@ class AsyncReviewMonitorWebSocket:
         self.zen_collector = None
         self.ok_collector = None
         self.moderator = None
+        self.analysis_stage = None
         self.is_running = False
         
     def _init_collectors(self):
@@ -86,17 +89,19 @@ class AsyncReviewMonitorWebSocket:
         
         logger.info("[MONITOR] Инициализация коллекторов...")
         
-        self.vk_collector = VKCollector(sentiment_analyzer=self.sentiment_analyzer)
+        # Коллекторы создаются без анализатора: тональность считается один раз
+        # в ReviewAnalysisStage после дедупликации
+        self.vk_collector = VKCollector()
         logger.info("[MONITOR] ✓ VK коллектор инициализирован")
         
-        self.telegram_collector = TelegramCollector(sentiment_analyzer=self.sentiment_analyzer)
+        self.telegram_collector = TelegramCollector()
         logger.info("[MONITOR] ✓ Telegram коллектор инициализирован")
         
-        self.news_collector = NewsCollector(sentiment_analyzer=self.sentiment_analyzer)
+        self.news_collector = NewsCollector()
         logger.info("[MONITOR] ✓ News коллектор инициализирован")
         
         try:
-            self.zen_collector = ZenCollector(sentiment_analyzer=self.sentiment_analyzer) if ZenCollector else None
+            self.zen_collector = ZenCollector() if ZenCollector else None
             if self.zen_collector:
                 logger.info("[MONITOR] ✓ Zen коллектор инициализирован")
             else:
@@ -106,7 +111,7 @@ class AsyncReviewMonitorWebSocket:
             self.zen_collector = None
         
         try:
-            self.ok_collector = OKCollector(sentiment_analyzer=self.sentiment_analyzer) if OKCollector else None
+            self.ok_collector = OKCollector() if OKCollector else None
             if self.ok_collector:
                 logger.info("[MONITOR] ✓ OK коллектор инициализирован")
             else:
@@ -116,6 +121,7 @@ class AsyncReviewMonitorWebSocket:
             self.ok_collector = None
         
         self.moderator = Moderator()
+        self.analysis_stage = ReviewAnalysisStage(self.sentiment_analyzer, self.moderator)
         logger.info("[MONITOR] ✓ Все коллекторы инициализированы")
     
     def _calculate_since_date(self, period):
@@ -195,8 +201,14 @@ class AsyncReviewMonitorWebSocket:
         self.socketio.emit('monitoring_progress', progress_data)
         logger.info(f"[{source.upper()}] {stage}: {message}")
     
-    async def collect_from_source_async(self, source_name, collect_callable):
-        """Асинхронный сбор с отправкой прогресса"""
+    async def collect_from_source_async(self, source_name, collect_callable, on_saved=None):
+        """
+        Асинхронный сбор с отправкой прогресса
+        
+        Args:
+            on_saved: Вызывается после записи отзывов в БД (например, сохранение
+                отметок синхронизации Telegram)
+        """
         log = None
         log_id = None
         
@@ -242,89 +254,42 @@ class AsyncReviewMonitorWebSocket:
             })
             
             reviews_added = 0
+            store = ReviewStore()
             
             with app.app_context():
+                # Один IN-запрос вместо SELECT на каждую запись
+                new_reviews, existing = store.split_new(reviews)
+                
+                # Все новые тексты оцениваются за один проход батчами
+                verdicts = self.analysis_stage.score(new_reviews)
+                
+                post_rows = []
+                comment_rows = []
                 processed_count = 0
-                # Сначала создаем словарь для хранения созданных постов по source_id
-                created_posts = {}
                 
-                for review_data in reviews:
+                for review_data, verdict in zip(new_reviews, verdicts):
                     processed_count += 1
                     
                     # Обновление прогресса каждые 5 записей
                     if processed_count % 5 == 0:
-                        progress_pct = 60 + (30 * processed_count / len(reviews))
+                        progress_pct = 60 + (30 * processed_count / len(new_reviews))
                         self.emit_progress(source_name, 'analyzing', 
-                                         f'Обработано: {processed_count}/{len(reviews)}', {
+                                         f'Обработано: {processed_count}/{len(new_reviews)}', {
                             'progress': int(progress_pct),
                             'processed': processed_count,
-                            'total': len(reviews)
+                            'total': len(new_reviews)
                         })
                     
                     try:
-                        existing = Review.query.filter_by(
-                            source_id=review_data['source_id']
-                        ).first()
-                        
-                        if existing:
-                            logger.debug(f"[{source_name}] Пропуск дубликата: {review_data['source_id']}")
-                            # Сохраняем существующий пост для связи с комментариями
-                            if not review_data.get('is_comment', False):
-                                created_posts[review_data['source_id']] = existing
-                            continue
-                        
                         logger.info(f"[{source_name}] Новая запись: {review_data.get('text', '')[:60]}...")
                         
-                        sentiment = self.sentiment_analyzer.analyze(review_data['text'])
-                        keywords = self.sentiment_analyzer.extract_keywords(review_data['text'])
-                        
-                        moderation_status, moderation_reason, requires_manual = self.moderator.moderate(
-                            review_data['text'],
-                            sentiment['sentiment_score']
-                        )
-                        
-                        # Определяем parent_id если это комментарий
-                        parent_id = None
-                        is_comment = review_data.get('is_comment', False)
-                        
-                        if is_comment and 'parent_source_id' in review_data:
-                            parent_source_id = review_data['parent_source_id']
-                            # Ищем родительский пост в созданных или в БД
-                            if parent_source_id in created_posts:
-                                parent_id = created_posts[parent_source_id].id
-                            else:
-                                parent_post = Review.query.filter_by(source_id=parent_source_id).first()
-                                if parent_post:
-                                    parent_id = parent_post.id
-                                    created_posts[parent_source_id] = parent_post
-                        
-                        review = Review(
-                            source=review_data['source'],
-                            source_id=review_data['source_id'],
-                            author=review_data.get('author'),
-                            author_id=review_data.get('author_id'),
-                            text=review_data['text'],
-                            url=review_data.get('url'),
-                            published_date=review_data.get('published_date'),
-                            sentiment_score=sentiment['sentiment_score'],
-                            sentiment_label=sentiment['sentiment_label'],
-                            keywords=','.join(keywords) if keywords else None,
-                            moderation_status=moderation_status,
-                            moderation_reason=moderation_reason,
-                            requires_manual_review=requires_manual,
-                            processed=not requires_manual,
-                            is_comment=is_comment,
-                            parent_id=parent_id
-                        )
+                        row = self.analysis_stage.build_row(review_data, verdict)
+                        is_comment = row['is_comment']
                         
-                        db.session.add(review)
-                        db.session.flush()  # Получаем ID для возможной связи с комментариями
-                        
-                        # Сохраняем созданный пост для связи с комментариями
-                        if not is_comment:
-                            created_posts[review_data['source_id']] = review
-                        
-                        reviews_added += 1
+                        if is_comment:
+                            comment_rows.append((row, review_data.get('parent_source_id')))
+                        else:
+                            post_rows.append(row)
                         
                     except Exception as e:
                         logger.error(f"[{source_name}] Ошибка обработки: {e}")
@@ -335,7 +300,28 @@ class AsyncReviewMonitorWebSocket:
                     'progress': 90
                 })
                 
+                # Сначала посты, чтобы комментарии могли сослаться на их ID
+                reviews_added += store.insert_rows(post_rows)
+                
+                if comment_rows:
+                    parent_ids = dict(existing)
+                    missing_parents = [
+                        parent_source_id for _, parent_source_id in comment_rows
+                        if parent_source_id and parent_source_id not in parent_ids
+                    ]
+                    if missing_parents:
+                        parent_ids.update(store.find_existing(missing_parents))
+                    
+                    for row, parent_source_id in comment_rows:
+                        row['parent_id'] = parent_ids.get(parent_source_id) if parent_source_id else None
+                    
+                    reviews_added += store.insert_rows([row for row, _ in comment_rows])
+                
                 db.session.commit()
+                logger.info(f"[{source_name}] Сохранение: {store.format_stats()}")
+                
+                if on_saved:
+                    on_saved()
                 
                 if log_id:
                     log = MonitoringLog.query.get(log_id)
@@ -350,7 +336,8 @@ class AsyncReviewMonitorWebSocket:
                              f'Завершено! Добавлено: {reviews_added}', {
                 'progress': 100,
                 'added': reviews_added,
-                'duplicates': len(reviews) - reviews_added
+                'duplicates': len(reviews) - reviews_added,
+                'store_stats': store.stats
             })
             
             return {'source': source_name, 'success': True, 'count': reviews_added}
@@ -415,7 +402,10 @@ class AsyncReviewMonitorWebSocket:
 
         tasks = [
             self.collect_from_source_async('vk', lambda: self.vk_collector.collect(collect_comments=True)),
-            self.collect_from_source_async('telegram', call_with_comments(self.telegram_collector)),
+            self.collect_from_source_async(
+                'telegram', call_with_comments(self.telegram_collector),
+                on_saved=getattr(self.telegram_collector, 'commit_watermarks', None)
+            ),
             self.collect_from_source_async('news', lambda: self.news_collector.collect_with_comments()),
         ]
 
@@ -0,0 +1,132 @@
+"""
+Бенчмарк извлечения комментариев
+Прежний разбор BeautifulSoup(html.parser) с поиском по каждому селектору
+против utils.comment_extractor (lxml, скомпилированные селекторы, один обход)
+на сохраненных страницах OK и на них же со вставленными блоками комментариев
+"""
+import logging
+import os
+import random
+import time
+
+from bs4 import BeautifulSoup
+
+logging.basicConfig(level=logging.WARNING)
+
+from utils.comment_extractor import SITE_SELECTORS
+
+FIXTURES = ['ok_group_response.html', 'ok_search_response.html', 'ok_mobile_response.html']
+
+NEWS_SELECTORS = [
+    {'class': 'comment'},
+    {'class': 'comment-item'},
+    {'class': 'comment-body'},
+    {'class': 'comment-content'},
+    {'class': 'user-comment'},
+    {'id': 'comments'},
+    {'class': 'comments'},
+    {'class': 'comment-list'},
+]
+
+ZEN_SELECTORS = [
+    {'class': 'comment'},
+    {'class': 'comments-item'},
+    {'data-testid': 'comment'},
+    {'class': 'mg-comment'},
+]
+
+
+def legacy_news(html):
+    """Прежний NewsCollector._extract_comments (без словарей результата)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    comments = []
+    for selector in NEWS_SELECTORS:
+        comment_elements = soup.find_all('div', selector) or soup.find_all('li', selector)
+        for elem in comment_elements[:20]:
+            text_elem = elem.find(['p', 'div'], class_=lambda x: x and ('text' in x.lower() or 'content' in x.lower()))
+            if not text_elem:
+                text_elem = elem
+            comment_text = text_elem.get_text(strip=True)
+            if not comment_text or len(comment_text) < 10:
+                continue
+            author_elem = elem.find(['span', 'a', 'div'], class_=lambda x: x and ('author' in x.lower() or 'user' in x.lower()))
+            comments.append((comment_text, author_elem.get_text(strip=True) if author_elem else None))
+        if comments:
+            break
+    return comments
+
+
+def legacy_zen(html):
+    """Прежний ZenCollector.parse_dzen_comments (без словарей результата)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    comments = []
+    for selector in ZEN_SELECTORS:
+        comment_elements = soup.find_all(['div', 'li', 'article'], selector)
+        for elem in comment_elements[:30]:
+            comment_text = elem.get_text(strip=True)
+            if not comment_text or len(comment_text) < 10:
+                continue
+            author_elem = elem.find(['span', 'a', 'div'], class_=lambda x: x and 'author' in x.lower())
+            comments.append((comment_text, author_elem.get_text(strip=True) if author_elem else None))
+        if comments:
+            break
+    return comments
+
+
+def with_comments(html, count, seed=3):
+    """Страница со вставленными блоками комментариев разной разметки"""
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(count):
+        css = rng.choice(['comment', 'comment-item', 'comments-item', 'mg-comment'])
+        blocks.append(
+            f'<div class="{css} level-{i % 3}"><span class="comment-author">Пользователь {i}</span>'
+            f'<p class="comment-text">Опять отключили свет на улице {i}, когда починят?</p>'
+            f'<script>var c{i} = 1;</script><!-- {i} --></div>'
+        )
+    marker = '</body>' if '</body>' in html else ''
+    return html.replace(marker, ''.join(blocks) + marker, 1) if marker else html + ''.join(blocks)
+
+
+def measure(func, html, repeat=5):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func(html)
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    pages = []
+    for path in FIXTURES:
+        if not os.path.exists(path):
+            print(f"{path}: нет файла, пропущен")
+            continue
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        if not html.strip():
+            print(f"{path}: пустой файл, пропущен")
+            continue
+        pages.append((path, html))
+        pages.append((f'{path} + 40 комментариев', with_comments(html, 40)))
+
+    cases = [
+        ('News', legacy_news, SITE_SELECTORS['news'].extract),
+        ('Zen', legacy_zen, SITE_SELECTORS['zen'].extract),
+    ]
+
+    print("=" * 70)
+    print("БЕНЧМАРК ИЗВЛЕЧЕНИЯ КОММЕНТАРИЕВ")
+    print("=" * 70)
+
+    for name, html in pages:
+        print(f"\n{name} ({len(html) // 1024} КБ):")
+        for title, legacy, current in cases:
+            legacy_time, legacy_results = measure(legacy, html)
+            new_time, new_results = measure(current, html)
+            print(f"  {title}: BeautifulSoup {legacy_time * 1000:7.1f} мс, lxml {new_time * 1000:7.2f} мс, "
+                  f"ускорение {legacy_time / new_time:6.1f}x, комментариев {len(new_results)}, "
+                  f"совпадают: {'да' if legacy_results == new_results else 'НЕТ'}")
+
+
+if __name__ == '__main__':
+    main()
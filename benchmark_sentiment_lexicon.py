@@ -0,0 +1,94 @@
+"""
+Бенчмарк словарного анализатора тональности
+Сравнение старого вложенного цикла с однопроходным поиском фраз на текстах 1k/10k слов
+"""
+import logging
+import random
+import time
+
+logging.basicConfig(level=logging.WARNING)
+
+from analyzers.sentiment_analyzer import SentimentAnalyzer
+
+
+def legacy_scores(analyzer, text):
+    """Прежний алгоритм _analyze_simple (для сравнения результатов и скорости)"""
+    text_lower = text.lower()
+    words = text_lower.split()
+
+    positive_score = 0.0
+    negative_score = 0.0
+
+    for i, word in enumerate(words):
+        multiplier = 1.0
+        if i > 0 and words[i-1] in analyzer.intensifiers:
+            multiplier = 1.5
+
+        for phrase in analyzer.positive_words:
+            if phrase in text_lower:
+                positive_score += multiplier * len(phrase.split())
+
+        for phrase in analyzer.negative_words:
+            if phrase in text_lower:
+                negative_score += multiplier * len(phrase.split())
+
+    for word in analyzer.positive_words:
+        if ' ' not in word and word in text_lower:
+            positive_score += 1.0
+
+    for word in analyzer.negative_words:
+        if ' ' not in word and word in text_lower:
+            negative_score += 1.0
+
+    return positive_score, negative_score
+
+
+def make_text(words_count, seed=42):
+    """Текст из обычных слов с вкраплениями словарных фраз и усилителей"""
+    rng = random.Random(seed)
+    filler = ['счет', 'за', 'электричество', 'пришел', 'в', 'этом', 'месяце', 'ТНС', 'энерго',
+              'Нижний', 'Новгород', 'показания', 'квартира', 'сосед', 'вчера', 'опять']
+    lexicon = ['спасибо', 'очень', 'плохо', 'не работает', 'быстро подключили', 'ужас',
+               'нет света', 'отлично', 'крайне', 'долго ждать на линии']
+
+    words = []
+    while len(words) < words_count:
+        if rng.random() < 0.05:
+            words.extend(rng.choice(lexicon).split())
+        else:
+            words.append(rng.choice(filler))
+    return ' '.join(words[:words_count])
+
+
+def measure(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    analyzer = SentimentAnalyzer(cache=False)
+    analyzer._init_simple_analyzer()
+
+    print("=" * 70)
+    print("БЕНЧМАРК СЛОВАРНОГО АНАЛИЗАТОРА")
+    print("=" * 70)
+
+    for words_count, legacy_repeat, new_repeat in [(1000, 3, 50), (10000, 1, 20)]:
+        text = make_text(words_count)
+
+        legacy_time, (legacy_pos, legacy_neg) = measure(lambda: legacy_scores(analyzer, text), legacy_repeat)
+        new_time, result = measure(lambda: analyzer._analyze_simple(text), new_repeat)
+
+        same = (legacy_pos, legacy_neg) == (result['debug']['positive_score'], result['debug']['negative_score'])
+
+        print(f"\n{words_count} слов:")
+        print(f"  Старый алгоритм:   {legacy_time * 1000:10.1f} мс")
+        print(f"  Один проход:       {new_time * 1000:10.1f} мс")
+        print(f"  Ускорение:         {legacy_time / new_time:10.1f}x")
+        print(f"  Результаты совпадают: {'да' if same else 'НЕТ'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Бенчмарк фильтра релевантности/региона/языка
+Сравнение прежних проверок коллекторов (any(kw in text_lower ...)) с utils.text_filter.TextFilter
+"""
+import logging
+import random
+import time
+
+logging.basicConfig(level=logging.WARNING)
+
+from config import Config
+from utils.language_detector import LanguageDetector
+from utils.text_filter import TextFilter, COMPANY_PATTERNS, COMPETITOR_EXCLUDES, KEYWORD_EXCLUDES
+from collectors.news_collector import NewsCollector
+
+
+language_detector = LanguageDetector()
+
+
+def legacy_is_russian(text):
+    if not Config.LANGUAGE_FILTER_ENABLED:
+        return True
+    return language_detector.is_russian(text)
+
+
+def legacy_is_nizhny_region(text):
+    if not Config.GEO_FILTER_ENABLED:
+        return True
+
+    text_lower = text.lower()
+    return any(keyword.lower() in text_lower for keyword in Config.GEO_KEYWORDS)
+
+
+def legacy_vk_is_relevant(text):
+    """Прежний VKCollector._is_relevant_to_company (так же в Web и Telegram)"""
+    text_lower = text.lower()
+
+    exclude_patterns = [
+        'газпром', 'т плюс', 'т-плюс', 'росатом', 'энергосбыт плюс',
+        'энергосбыт луганск', 'энергосбыт волга', 'энергосбыт тюмень',
+        'тнс тула', 'тнс великий новгород', 'тнс ярославль',
+        'вакансия', 'вакансии', 'требуется'
+    ]
+
+    if any(exclude in text_lower for exclude in exclude_patterns):
+        return False
+
+    main_patterns = [
+        'тнс энерго нн',
+        'тнс энерго нижний',
+        'тнс энерго нижегородск',
+        'тнс нн',
+        'тнс нижний новгород'
+    ]
+
+    return any(pattern in text_lower for pattern in main_patterns)
+
+
+def legacy_vk_accepts(text):
+    return legacy_vk_is_relevant(text) and legacy_is_nizhny_region(text) and legacy_is_russian(text)
+
+
+def legacy_news_check(text):
+    """Прежние NewsCollector._is_relevant + _is_nizhny_region"""
+    if not text:
+        return False
+
+    text_lower = text.lower()
+
+    exclude_patterns = [
+        'газпром', 'т плюс', 'т-плюс', 'росатом',
+        'тнс тула', 'тнс великий новгород', 'тнс ярославль',
+        'вакансия', 'вакансии', 'требуется', 'резюме'
+    ]
+    if any(exclude in text_lower for exclude in exclude_patterns):
+        return False
+
+    patterns = [kw.lower() for kw in Config.COMPANY_KEYWORDS if kw]
+    company_match = any(pattern in text_lower for pattern in patterns)
+    if not company_match:
+        fallback_patterns = ['тнс', 'энерго', 'энергосбыт', 'электроэнерг', 'свет отключ']
+        company_match = any(pattern in text_lower for pattern in fallback_patterns)
+    if not company_match:
+        return False
+
+    if not Config.GEO_FILTER_ENABLED:
+        return True
+    if any(keyword.lower() in text_lower for keyword in Config.GEO_KEYWORDS):
+        return True
+    combined_tokens = ['тнс энерго нн', 'тнсэнерго нн', 'энергосбыт нн', 'нижний', 'нижегородск']
+    return any(token in text_lower for token in combined_tokens)
+
+
+def legacy_zen_is_relevant(text, keywords):
+    """Прежний ZenCollector._is_relevant (так же в OK)"""
+    if not text:
+        return False
+
+    text_lower = text.lower()
+
+    exclude_patterns = [
+        'газпром', 'т плюс', 'т-плюс',
+        'тнс тула', 'тнс ярославль',
+        'вакансия', 'требуется'
+    ]
+
+    for exclude in exclude_patterns:
+        if exclude in text_lower:
+            return False
+
+    if not keywords:
+        return True
+
+    for keyword in keywords:
+        if keyword.lower() in text_lower:
+            return True
+
+    return False
+
+
+def make_texts(count, seed=7):
+    """Посты разной длины: обычный текст с вкраплениями компании, гео и исключений"""
+    rng = random.Random(seed)
+    filler = ['опять', 'отключили', 'свет', 'в', 'доме', 'счет', 'пришел', 'большой', 'когда',
+              'починят', 'подъезд', 'квартира', 'платеж', 'hello', 'world', 'ул.', 'Ленина']
+    mentions = ['ТНС энерго НН', 'ТНС энерго Нижний Новгород', 'тнс нн', 'энергосбыт',
+                'Нижегородская область', 'НН', 'Газпром', 'вакансия', 'ТНС Тула', 'TNS']
+
+    texts = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.choice([8, 30, 120, 400])):
+            words.append(rng.choice(mentions) if rng.random() < 0.03 else rng.choice(filler))
+        texts.append(' '.join(words))
+    return texts
+
+
+def measure(func, texts, repeat=3):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        results = [func(text) for text in texts]
+    return (time.perf_counter() - started) / repeat, results
+
+
+def main():
+    texts = make_texts(5000)
+
+    vk_filter = TextFilter(include=COMPANY_PATTERNS, exclude=COMPETITOR_EXCLUDES)
+    news_filter = NewsCollector().text_filter
+    zen_filter = TextFilter(include=lambda: Config.COMPANY_KEYWORDS, exclude=KEYWORD_EXCLUDES,
+                            match_all_if_no_include=True)
+
+    def news_check(text):
+        checked = news_filter.check(text, language=False)
+        return checked.relevant and checked.geo
+
+    cases = [
+        ('VK/Web/Telegram: релевантность + гео + язык', legacy_vk_accepts, vk_filter.accepts),
+        ('News: релевантность + гео', legacy_news_check, news_check),
+        ('Zen/OK: релевантность', lambda text: legacy_zen_is_relevant(text, Config.COMPANY_KEYWORDS),
+         zen_filter.is_relevant),
+    ]
+
+    print("=" * 70)
+    print(f"БЕНЧМАРК ФИЛЬТРА ТЕКСТОВ ({len(texts)} текстов)")
+    print("=" * 70)
+
+    for title, legacy, current in cases:
+        legacy_time, legacy_results = measure(legacy, texts)
+        new_time, new_results = measure(current, texts)
+
+        print(f"\n{title}:")
+        print(f"  Прежние проверки:  {legacy_time * 1000:8.1f} мс")
+        print(f"  TextFilter:        {new_time * 1000:8.1f} мс")
+        print(f"  Ускорение:         {legacy_time / new_time:8.1f}x")
+        print(f"  Принято текстов:   {sum(new_results)}")
+        print(f"  Результаты совпадают: {'да' if legacy_results == new_results else 'НЕТ'}")
+
+
+if __name__ == '__main__':
+    main()
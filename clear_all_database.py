@@ -2,6 +2,8 @@
 Полная очистка базы данных - удаление ВСЕХ отзывов и логов
 """
 from models import db, Review, MonitoringLog
+from utils.review_rollups import clear_rollups
+from utils.telegram_watermarks import clear_watermarks
 from app import app
 import logging
 
@@ -24,6 +26,8 @@ def clear_all_data():
         # Удаление всех отзывов
         logger.info("\nУдаление всех отзывов...")
         Review.query.delete()
+        clear_rollups()
+        clear_watermarks()
         
         # Удаление всех логов
         logger.info("Удаление всех логов мониторинга...")
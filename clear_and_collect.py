@@ -4,6 +4,8 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 from app import app
 from models import db, Review, MonitoringLog
+from utils.review_rollups import clear_rollups
+from utils.telegram_watermarks import clear_watermarks
 from monitor import ReviewMonitor
 
 def clear_all_reviews():
@@ -13,6 +15,8 @@ def clear_all_reviews():
         
         print(f"Deleting {review_count} reviews...")
         Review.query.delete()
+        clear_rollups()
+        clear_watermarks()
         
         print(f"Deleting {log_count} monitoring logs...")
         MonitoringLog.query.delete()
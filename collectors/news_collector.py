@@ -2,14 +2,16 @@
 Улучшенный коллектор новостей с поддержкой RSS, прокси и множества источников
 С интегрированным анализом тональности через Dostoevsky
 """
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 from config import Config
 from utils.language_detector import LanguageDetector
+from utils.text_filter import TextFilter, settings_version
 from utils.proxy_manager import ProxyManager
+from utils.http_fetch import FetchEngine
+from utils.comment_extractor import extract_comments
+from utils.http_cache import ParsedMemo, get_default_cache
 import logging
-import time
 import xml.etree.ElementTree as ET
 from urllib.parse import urljoin, urlparse, quote
 import warnings
@@ -18,12 +20,31 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
+# Исключаем нерелевантное
+NEWS_EXCLUDES = [
+    'газпром', 'т плюс', 'т-плюс', 'росатом',
+    'тнс тула', 'тнс великий новгород', 'тнс ярославль',
+    'вакансия', 'вакансии', 'требуется', 'резюме'
+]
+
+# Дополнительные паттерны компании
+NEWS_FALLBACK_PATTERNS = ['тнс', 'энерго', 'энергосбыт', 'электроэнерг', 'свет отключ']
+
+# Комбинированные гео-токены
+NEWS_GEO_TOKENS = ['тнс энерго нн', 'тнсэнерго нн', 'энергосбыт нн', 'нижний', 'нижегородск']
+
 class NewsCollector:
     """Продвинутый коллектор новостей с RSS и веб-скрапингом"""
     
     def __init__(self, sentiment_analyzer=None):
         self.keywords = Config.COMPANY_KEYWORDS
         self.language_detector = LanguageDetector()
+        self.text_filter = TextFilter(
+            include=self._relevance_keywords,
+            exclude=NEWS_EXCLUDES,
+            geo=self._geo_keywords,
+            language_detector=self.language_detector
+        )
         self.sentiment_analyzer = sentiment_analyzer
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -32,6 +53,10 @@ class NewsCollector:
             'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
         }
+        # Пул соединений, лимит на хост и повторы; SSL не проверяем (RSS).
+        # Ленты и статьи перепроверяются условными запросами (ETag/Last-Modified)
+        self.http = FetchEngine(headers=self.headers, verify=False, cache=get_default_cache())
+        self.parsed = ParsedMemo()
         
         # Отключаем прокси для новостей - они блокируют
         self.use_free_proxies = False
@@ -50,28 +75,9 @@ class NewsCollector:
     
     def _request_with_retry(self, url, max_retries=2, timeout=15):
         """Make HTTP request with retry"""
-        last_exception = None
-        
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(
-                    url, 
-                    headers=self.headers,
-                    timeout=timeout,
-                    allow_redirects=True,
-                    verify=False  # Игнорировать SSL для RSS
-                )
-                response.raise_for_status()
-                return response
-                
-            except Exception as e:
-                last_exception = e
-                logger.warning(f"Request failed (attempt {attempt + 1}/{max_retries}): {e}")
-                
-                if attempt < max_retries - 1:
-                    time.sleep(1)
-        
-        raise last_exception
+        response = self.http.get(url, max_retries=max_retries - 1, timeout=timeout)
+        response.raise_for_status()
+        return response
     
     def _company_keywords(self):
         patterns = [kw.lower() for kw in getattr(Config, 'COMPANY_KEYWORDS', []) if kw]
@@ -79,49 +85,25 @@ class NewsCollector:
             patterns = ['тнс энерго', 'тнс энерго нн', 'тнс нн', 'энергосбыт']
         return patterns
     
+    def _relevance_keywords(self):
+        # Ключевые слова компании и дополнительные паттерны
+        return self._company_keywords() + NEWS_FALLBACK_PATTERNS
+    
+    def _geo_keywords(self):
+        # Гео-ключевые слова и комбинированные токены
+        return list(Config.GEO_KEYWORDS) + NEWS_GEO_TOKENS
+    
     def _is_relevant(self, text):
         """Check if text is relevant to company"""
-        if not text:
-            return False
-        
-        text_lower = text.lower()
-        
-        # Исключаем нерелевантное
-        exclude_patterns = [
-            'газпром', 'т плюс', 'т-плюс', 'росатом',
-            'тнс тула', 'тнс великий новгород', 'тнс ярославль',
-            'вакансия', 'вакансии', 'требуется', 'резюме'
-        ]
-        if any(exclude in text_lower for exclude in exclude_patterns):
-            return False
-        
-        # Проверяем ключевые слова компании
-        company_match = any(pattern in text_lower for pattern in self._company_keywords())
-        if not company_match:
-            # Дополнительные паттерны
-            fallback_patterns = ['тнс', 'энерго', 'энергосбыт', 'электроэнерг', 'свет отключ']
-            company_match = any(pattern in text_lower for pattern in fallback_patterns)
-        
-        return company_match
+        return self.text_filter.is_relevant(text)
     
     def _is_russian(self, text):
         """Check if text is in Russian"""
-        if not Config.LANGUAGE_FILTER_ENABLED:
-            return True
-        return self.language_detector.is_russian(text)
+        return self.text_filter.is_russian(text)
     
     def _is_nizhny_region(self, text):
         """Check if text mentions Nizhny Novgorod region"""
-        if not Config.GEO_FILTER_ENABLED:
-            return True
-        
-        text_lower = text.lower()
-        geo_match = any(keyword.lower() in text_lower for keyword in Config.GEO_KEYWORDS)
-        if geo_match:
-            return True
-        # Комбинированные токены
-        combined_tokens = ['тнс энерго нн', 'тнсэнерго нн', 'энергосбыт нн', 'нижний', 'нижегородск']
-        return any(token in text_lower for token in combined_tokens)
+        return self.text_filter.is_nizhny_region(text)
     
     def search_google_news(self, query):
         """Search Google News через RSS (работает!)"""
@@ -136,65 +118,11 @@ class NewsCollector:
             
             response = self._request_with_retry(search_url, timeout=10)
             
-            # Парсим XML
-            soup = BeautifulSoup(response.content, 'xml')
-            if not soup.find_all('item'):
-                soup = BeautifulSoup(response.content, 'html.parser')
-            
-            items = soup.find_all('item')[:20]  # Берем больше новостей
-            
-            for item in items:
-                try:
-                    title_tag = item.find('title')
-                    desc_tag = item.find('description')
-                    link_tag = item.find('link')
-                    pub_date_tag = item.find('pubDate')
-                    
-                    title = title_tag.get_text(strip=True) if title_tag else ''
-                    description = desc_tag.get_text(strip=True) if desc_tag else ''
-                    link = link_tag.get_text(strip=True) if link_tag else ''
-                    
-                    full_text = f"{title} {description}"
-                    
-                    if not self._is_relevant(full_text):
-                        continue
-                    
-                    if not self._is_nizhny_region(full_text):
-                        continue
-                    
-                    published_date = datetime.now()
-                    if pub_date_tag:
-                        try:
-                            from email.utils import parsedate_to_datetime
-                            published_date = parsedate_to_datetime(pub_date_tag.get_text(strip=True))
-                        except:
-                            pass
-                    
-                    article = {
-                        'source_id': f"google_news_{hash(link)}",
-                        'author': 'Google News',
-                        'author_id': 'google_news',
-                        'text': f"{title}\n\n{description[:500]}",
-                        'url': link,
-                        'published_date': published_date,
-                        'source': 'news'
-                    }
-                    
-                    # Анализ тональности
-                    if self.sentiment_analyzer:
-                        try:
-                            sentiment = self.sentiment_analyzer.analyze(article['text'])
-                            article['sentiment_score'] = sentiment.get('sentiment_score', 0)
-                            article['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
-                        except Exception as e:
-                            logger.debug(f"Error analyzing article sentiment: {e}")
-                    
-                    articles.append(article)
-                    logger.debug(f"Found relevant article: {title[:50]}...")
-                    
-                except Exception as e:
-                    logger.debug(f"Error parsing article: {e}")
-                    continue
+            # Неизмененная лента (304 или то же тело) не разбирается повторно,
+            # пока не изменились ключевые слова фильтра
+            articles = self.parsed.get_or_parse(
+                search_url, response, lambda r: self._parse_google_news(r, query), version=settings_version()
+            )
             
             logger.info(f"Found {len(articles)} articles from Google News for '{query}'")
             
@@ -203,6 +131,70 @@ class NewsCollector:
         
         return articles
     
+    def _parse_google_news(self, response, query):
+        """Articles from a Google News RSS response"""
+        articles = []
+        
+        # Парсим XML
+        soup = BeautifulSoup(response.content, 'xml')
+        if not soup.find_all('item'):
+            soup = BeautifulSoup(response.content, 'html.parser')
+        
+        items = soup.find_all('item')[:20]  # Берем больше новостей
+        
+        for item in items:
+            try:
+                title_tag = item.find('title')
+                desc_tag = item.find('description')
+                link_tag = item.find('link')
+                pub_date_tag = item.find('pubDate')
+                
+                title = title_tag.get_text(strip=True) if title_tag else ''
+                description = desc_tag.get_text(strip=True) if desc_tag else ''
+                link = link_tag.get_text(strip=True) if link_tag else ''
+                
+                full_text = f"{title} {description}"
+                
+                checked = self.text_filter.check(full_text, language=False)
+                if not checked.relevant or not checked.geo:
+                    continue
+                
+                published_date = datetime.now()
+                if pub_date_tag:
+                    try:
+                        from email.utils import parsedate_to_datetime
+                        published_date = parsedate_to_datetime(pub_date_tag.get_text(strip=True))
+                    except:
+                        pass
+                
+                article = {
+                    'source_id': f"google_news_{hash(link)}",
+                    'author': 'Google News',
+                    'author_id': 'google_news',
+                    'text': f"{title}\n\n{description[:500]}",
+                    'url': link,
+                    'published_date': published_date,
+                    'source': 'news'
+                }
+                
+                # Анализ тональности
+                if self.sentiment_analyzer:
+                    try:
+                        sentiment = self.sentiment_analyzer.analyze(article['text'])
+                        article['sentiment_score'] = sentiment.get('sentiment_score', 0)
+                        article['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
+                    except Exception as e:
+                        logger.debug(f"Error analyzing article sentiment: {e}")
+                
+                articles.append(article)
+                logger.debug(f"Found relevant article: {title[:50]}...")
+            
+            except Exception as e:
+                logger.debug(f"Error parsing article: {e}")
+                continue
+        
+        return articles
+    
     def collect_from_newsnn(self):
         """Collect from NewsNN RSS (работает!)"""
         articles = []
@@ -213,56 +205,9 @@ class NewsCollector:
             
             response = self._request_with_retry(feed_url, timeout=10)
             
-            soup = BeautifulSoup(response.content, 'xml')
-            if not soup.find_all('item'):
-                soup = BeautifulSoup(response.content, 'html.parser')
-            
-            items = soup.find_all('item')[:50]  # Берем больше для фильтрации
-            
-            for item in items:
-                try:
-                    title_tag = item.find('title')
-                    desc_tag = item.find('description')
-                    link_tag = item.find('link')
-                    
-                    title = title_tag.get_text(strip=True) if title_tag else ''
-                    description = desc_tag.get_text(strip=True) if desc_tag else ''
-                    link = link_tag.get_text(strip=True) if link_tag else ''
-                    
-                    full_text = f"{title} {description}"
-                    
-                    # Проверяем релевантность
-                    if not self._is_relevant(full_text):
-                        continue
-                    
-                    if not self._is_russian(full_text):
-                        continue
-                    
-                    article = {
-                        'source_id': f"newsnn_{hash(link)}",
-                        'author': 'NewsNN',
-                        'author_id': 'newsnn.ru',
-                        'text': f"{title}\n\n{description[:500]}",
-                        'url': link,
-                        'published_date': datetime.now(),
-                        'source': 'news'
-                    }
-                    
-                    # Анализ тональности
-                    if self.sentiment_analyzer:
-                        try:
-                            sentiment = self.sentiment_analyzer.analyze(article['text'])
-                            article['sentiment_score'] = sentiment.get('sentiment_score', 0)
-                            article['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
-                        except Exception as e:
-                            logger.debug(f"Error analyzing article sentiment: {e}")
-                    
-                    articles.append(article)
-                    logger.debug(f"Found relevant NewsNN article: {title[:50]}...")
-                    
-                except Exception as e:
-                    logger.debug(f"Error parsing NewsNN article: {e}")
-                    continue
+            # Неизмененная лента (304 или то же тело) не разбирается повторно,
+            # пока не изменились ключевые слова фильтра
+            articles = self.parsed.get_or_parse(feed_url, response, self._parse_newsnn, version=settings_version())
             
             logger.info(f"Found {len(articles)} relevant articles from NewsNN")
             
@@ -271,6 +216,61 @@ class NewsCollector:
         
         return articles
     
+    def _parse_newsnn(self, response):
+        """Articles from the NewsNN RSS response"""
+        articles = []
+        
+        soup = BeautifulSoup(response.content, 'xml')
+        if not soup.find_all('item'):
+            soup = BeautifulSoup(response.content, 'html.parser')
+        
+        items = soup.find_all('item')[:50]  # Берем больше для фильтрации
+        
+        for item in items:
+            try:
+                title_tag = item.find('title')
+                desc_tag = item.find('description')
+                link_tag = item.find('link')
+                
+                title = title_tag.get_text(strip=True) if title_tag else ''
+                description = desc_tag.get_text(strip=True) if desc_tag else ''
+                link = link_tag.get_text(strip=True) if link_tag else ''
+                
+                full_text = f"{title} {description}"
+                
+                # Проверяем релевантность
+                checked = self.text_filter.check(full_text)
+                if not checked.relevant or not checked.russian:
+                    continue
+                
+                article = {
+                    'source_id': f"newsnn_{hash(link)}",
+                    'author': 'NewsNN',
+                    'author_id': 'newsnn.ru',
+                    'text': f"{title}\n\n{description[:500]}",
+                    'url': link,
+                    'published_date': datetime.now(),
+                    'source': 'news'
+                }
+                
+                # Анализ тональности
+                if self.sentiment_analyzer:
+                    try:
+                        sentiment = self.sentiment_analyzer.analyze(article['text'])
+                        article['sentiment_score'] = sentiment.get('sentiment_score', 0)
+                        article['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
+                    except Exception as e:
+                        logger.debug(f"Error analyzing article sentiment: {e}")
+                
+                articles.append(article)
+                logger.debug(f"Found relevant NewsNN article: {title[:50]}...")
+            
+            except Exception as e:
+                logger.debug(f"Error parsing NewsNN article: {e}")
+                continue
+        
+        return articles
+    
     def parse_article_comments(self, article_url):
         """Parse comments from article page"""
         comments = []
@@ -283,56 +283,29 @@ class NewsCollector:
                 return comments
             
             response = self._request_with_retry(article_url, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Ищем комментарии
-            comment_selectors = [
-                {'class': 'comment'},
-                {'class': 'comment-item'},
-                {'class': 'comment-body'},
-                {'class': 'comment-content'},
-                {'class': 'user-comment'},
-                {'id': 'comments'},
-                {'class': 'comments'},
-                {'class': 'comment-list'},
-            ]
+            comments = self.parsed.get_or_parse(
+                article_url, response, lambda r: self._extract_comments(article_url, r.text)
+            )
             
-            for selector in comment_selectors:
-                comment_elements = soup.find_all('div', selector) or soup.find_all('li', selector)
-                
-                if comment_elements:
-                    for elem in comment_elements[:20]:  # Ограничиваем количество
-                        try:
-                            # Извлекаем текст
-                            text_elem = elem.find(['p', 'div'], class_=lambda x: x and ('text' in x.lower() or 'content' in x.lower()))
-                            if not text_elem:
-                                text_elem = elem
-                            
-                            comment_text = text_elem.get_text(strip=True)
-                            
-                            if not comment_text or len(comment_text) < 10:
-                                continue
-                            
-                            # Извлекаем автора
-                            author_elem = elem.find(['span', 'a', 'div'], class_=lambda x: x and ('author' in x.lower() or 'user' in x.lower()))
-                            author = author_elem.get_text(strip=True) if author_elem else 'Anonymous'
-                            
-                            comment = {
-                                'text': comment_text[:500],  # Ограничиваем длину
-                                'author': author,
-                                'published_date': datetime.now(),
-                                'source': 'news_comment',
-                                'url': article_url
-                            }
-                            
-                            comments.append(comment)
-                            
-                        except Exception as e:
-                            logger.debug(f"Error parsing comment: {e}")
-                            continue
-                    
-                    if comments:
-                        break
+        except Exception as e:
+            logger.debug(f"Error parsing comments from {article_url}: {e}")
+        
+        return comments
+    
+    def _extract_comments(self, article_url, html):
+        """Comments from a downloaded article page"""
+        comments = []
+        
+        try:
+            # Селекторы сайта скомпилированы заранее; страница без блоков комментариев не разбирается
+            for text, author in extract_comments('news', html):
+                comments.append({
+                    'text': text[:500],  # Ограничиваем длину
+                    'author': author if author is not None else 'Anonymous',
+                    'published_date': datetime.now(),
+                    'source': 'news_comment',
+                    'url': article_url
+                })
             
             if comments:
                 logger.info(f"Found {len(comments)} comments")
@@ -350,12 +323,14 @@ class NewsCollector:
         logger.info("Starting news collection")
         logger.info("=" * 60)
         
+        # Бюджет времени на все запросы цикла; паузы между запросами к хосту задает движок
+        self.http.start_cycle()
+        
         # 1. Google News (основной источник - работает!)
         for query in self.search_queries[:2]:  # Берем первые 2 запроса
             try:
                 articles = self.search_google_news(query)
                 all_articles.extend(articles)
-                time.sleep(1)  # Небольшая задержка между запросами
             except Exception as e:
                 logger.error(f"Google News search failed for '{query}': {e}")
         
@@ -385,12 +360,19 @@ class NewsCollector:
         
         logger.info(f"Collecting comments for {len(articles)} articles")
         
+        # Страницы всех статей загружаются параллельно (Google News ссылки - редиректы, пропускаем)
+        urls = [a['url'] for a in articles if a.get('url') and 'news.google.com' not in a['url']]
+        pages = dict(zip(urls, self.http.get_many(urls, timeout=10)))
+        
         for article in articles:
             all_data.append(article)
             
             # Парсим комментарии для каждой статьи
-            if article.get('url'):
-                comments = self.parse_article_comments(article['url'])
+            response = pages.get(article.get('url'))
+            if response is not None and response.ok:
+                comments = self.parsed.get_or_parse(
+                    article['url'], response, lambda r: self._extract_comments(article['url'], r.text)
+                )
                 
                 # Добавляем ссылку на статью к комментариям
                 for comment in comments:
@@ -410,5 +392,6 @@ class NewsCollector:
                 
                 all_data.extend(comments)
         
+        self.http.log_stats("[NEWS]")
         logger.info(f"Total items (articles + comments): {len(all_data)}")
         return all_data
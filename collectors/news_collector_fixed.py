@@ -7,6 +7,7 @@ from bs4 import BeautifulSoup
 from datetime import datetime
 from config import Config
 from utils.language_detector import LanguageDetector
+from utils.text_filter import TextFilter
 from utils.proxy_manager import ProxyManager
 import logging
 import time
@@ -18,12 +19,31 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
+# Исключаем нерелевантное
+NEWS_EXCLUDES = [
+    'газпром', 'т плюс', 'т-плюс', 'росатом',
+    'тнс тула', 'тнс великий новгород', 'тнс ярославль',
+    'вакансия', 'вакансии', 'требуется', 'резюме'
+]
+
+# Дополнительные паттерны компании
+NEWS_FALLBACK_PATTERNS = ['тнс', 'энерго', 'энергосбыт', 'электроэнерг', 'свет отключ']
+
+# Комбинированные гео-токены
+NEWS_GEO_TOKENS = ['тнс энерго нн', 'тнсэнерго нн', 'энергосбыт нн', 'нижний', 'нижегородск']
+
 class NewsCollector:
     """Продвинутый коллектор новостей с RSS и веб-скрапингом"""
     
     def __init__(self, sentiment_analyzer=None):
         self.keywords = Config.COMPANY_KEYWORDS
         self.language_detector = LanguageDetector()
+        self.text_filter = TextFilter(
+            include=self._relevance_keywords,
+            exclude=NEWS_EXCLUDES,
+            geo=self._geo_keywords,
+            language_detector=self.language_detector
+        )
         self.sentiment_analyzer = sentiment_analyzer
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -79,49 +99,25 @@ class NewsCollector:
             patterns = ['тнс энерго', 'тнс энерго нн', 'тнс нн', 'энергосбыт']
         return patterns
     
+    def _relevance_keywords(self):
+        # Ключевые слова компании и дополнительные паттерны
+        return self._company_keywords() + NEWS_FALLBACK_PATTERNS
+    
+    def _geo_keywords(self):
+        # Гео-ключевые слова и комбинированные токены
+        return list(Config.GEO_KEYWORDS) + NEWS_GEO_TOKENS
+    
     def _is_relevant(self, text):
         """Check if text is relevant to company"""
-        if not text:
-            return False
-        
-        text_lower = text.lower()
-        
-        # Исключаем нерелевантное
-        exclude_patterns = [
-            'газпром', 'т плюс', 'т-плюс', 'росатом',
-            'тнс тула', 'тнс великий новгород', 'тнс ярославль',
-            'вакансия', 'вакансии', 'требуется', 'резюме'
-        ]
-        if any(exclude in text_lower for exclude in exclude_patterns):
-            return False
-        
-        # Проверяем ключевые слова компании
-        company_match = any(pattern in text_lower for pattern in self._company_keywords())
-        if not company_match:
-            # Дополнительные паттерны
-            fallback_patterns = ['тнс', 'энерго', 'энергосбыт', 'электроэнерг', 'свет отключ']
-            company_match = any(pattern in text_lower for pattern in fallback_patterns)
-        
-        return company_match
+        return self.text_filter.is_relevant(text)
     
     def _is_russian(self, text):
         """Check if text is in Russian"""
-        if not Config.LANGUAGE_FILTER_ENABLED:
-            return True
-        return self.language_detector.is_russian(text)
+        return self.text_filter.is_russian(text)
     
     def _is_nizhny_region(self, text):
         """Check if text mentions Nizhny Novgorod region"""
-        if not Config.GEO_FILTER_ENABLED:
-            return True
-        
-        text_lower = text.lower()
-        geo_match = any(keyword.lower() in text_lower for keyword in Config.GEO_KEYWORDS)
-        if geo_match:
-            return True
-        # Комбинированные токены
-        combined_tokens = ['тнс энерго нн', 'тнсэнерго нн', 'энергосбыт нн', 'нижний', 'нижегородск']
-        return any(token in text_lower for token in combined_tokens)
+        return self.text_filter.is_nizhny_region(text)
     
     def search_google_news(self, query):
         """Search Google News через RSS (работает!)"""
@@ -156,10 +152,8 @@ class NewsCollector:
                     
                     full_text = f"{title} {description}"
                     
-                    if not self._is_relevant(full_text):
-                        continue
-                    
-                    if not self._is_nizhny_region(full_text):
+                    checked = self.text_filter.check(full_text, language=False)
+                    if not checked.relevant or not checked.geo:
                         continue
                     
                     published_date = datetime.now()
@@ -229,10 +223,8 @@ class NewsCollector:
                     full_text = f"{title} {description}"
                     
                     # Проверяем релевантность
-                    if not self._is_relevant(full_text):
-                        continue
-                    
-                    if not self._is_russian(full_text):
+                    checked = self.text_filter.check(full_text)
+                    if not checked.relevant or not checked.russian:
                         continue
                     
                     article = {
@@ -5,6 +5,7 @@ import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 from config import Config
+from utils.text_filter import TextFilter, KEYWORD_EXCLUDES
 import logging
 import random
 import time
@@ -16,6 +17,11 @@ class NewsCollectorLight:
     
     def __init__(self, sentiment_analyzer=None):
         self.keywords = Config.COMPANY_KEYWORDS
+        self.text_filter = TextFilter(
+            include=lambda: self.keywords,
+            exclude=KEYWORD_EXCLUDES,
+            match_all_if_no_include=True
+        )
         self.sentiment_analyzer = sentiment_analyzer
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -44,33 +50,10 @@ class NewsCollectorLight:
     
     def _is_relevant(self, text):
         """Проверка релевантности текста"""
-        if not text:
-            return False
-        
-        text_lower = text.lower()
-        
-        # Исключения
-        exclude_patterns = [
-            'газпром', 'т плюс', 'т-плюс', 
-            'тнс тула', 'тнс ярославль',
-            'вакансия', 'требуется'
-        ]
-        
-        # Проверяем исключения
-        for exclude in exclude_patterns:
-            if exclude in text_lower:
-                return False
-        
-        # Ключевые слова - проверяем каждое
         if not self.keywords:
             logger.warning("[NEWS-LIGHT] Нет ключевых слов для фильтрации!")
-            return True  # Если нет ключевых слов, берём всё
-        
-        for keyword in self.keywords:
-            if keyword.lower() in text_lower:
-                return True
         
-        return False
+        return self.text_filter.is_relevant(text)
     
     def _get_free_proxies(self):
         """Получение списка бесплатных прокси"""
@@ -6,6 +6,7 @@ import requests
 import hashlib
 from datetime import datetime
 from config import Config
+from utils.text_filter import TextFilter
 import logging
 import time
 
@@ -20,6 +21,11 @@ class OKAPICollector:
         self.secret_key = Config.get('OK_SECRET_KEY', '')
         self.access_token = Config.get('OK_ACCESS_TOKEN', '')
         self.keywords = Config.COMPANY_KEYWORDS
+        self.text_filter = TextFilter(
+            include=lambda: self.keywords,
+            exclude=['газпром', 'т плюс', 'т-плюс', 'вакансия'],
+            match_all_if_no_include=True
+        )
         self.sentiment_analyzer = sentiment_analyzer
         
         self.api_url = 'https://api.ok.ru/fb.do'
@@ -67,21 +73,7 @@ class OKAPICollector:
     
     def _is_relevant(self, text):
         """Проверка релевантности текста"""
-        if not text:
-            return False
-        
-        text_lower = text.lower()
-        
-        # Исключения
-        exclude = ['газпром', 'т плюс', 'т-плюс', 'вакансия']
-        if any(e in text_lower for e in exclude):
-            return False
-        
-        # Ключевые слова
-        if not self.keywords:
-            return True
-        
-        return any(k.lower() in text_lower for k in self.keywords)
+        return self.text_filter.is_relevant(text)
     
     def _make_api_request(self, method, params=None):
         """Выполнение запроса к OK API"""
@@ -5,8 +5,9 @@ import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from config import Config
+from utils.text_filter import TextFilter, KEYWORD_EXCLUDES
+from utils.http_fetch import FetchEngine
 import logging
-import time
 import re
 
 logger = logging.getLogger(__name__)
@@ -16,6 +17,11 @@ class OKCollector:
     
     def __init__(self, sentiment_analyzer=None):
         self.keywords = Config.COMPANY_KEYWORDS
+        self.text_filter = TextFilter(
+            include=lambda: self.keywords,
+            exclude=KEYWORD_EXCLUDES,
+            match_all_if_no_include=True
+        )
         self.sentiment_analyzer = sentiment_analyzer
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
@@ -31,6 +37,8 @@ class OKCollector:
             'Sec-Fetch-User': '?1',
             'Cache-Control': 'max-age=0',
         }
+        # Пул соединений; паузы между запросами к хосту вместо sleep перед каждым запросом
+        self.http = FetchEngine(headers=self.headers)
         
         # Публичные группы Нижнего Новгорода
         self.public_groups = [
@@ -42,31 +50,7 @@ class OKCollector:
     
     def _is_relevant(self, text):
         """Проверка релевантности текста"""
-        if not text:
-            return False
-        
-        text_lower = text.lower()
-        
-        # Исключения
-        exclude_patterns = [
-            'газпром', 'т плюс', 'т-плюс',
-            'тнс тула', 'тнс ярославль',
-            'вакансия', 'требуется'
-        ]
-        
-        for exclude in exclude_patterns:
-            if exclude in text_lower:
-                return False
-        
-        # Ключевые слова
-        if not self.keywords:
-            return True
-        
-        for keyword in self.keywords:
-            if keyword.lower() in text_lower:
-                return True
-        
-        return False
+        return self.text_filter.is_relevant(text)
     
     def search_ok_google(self, query):
         """Поиск в OK через Google и DuckDuckGo"""
@@ -81,10 +65,8 @@ class OKCollector:
             
             logger.info(f"[OK] Поиск: {search_query}")
             
-            # Добавляем задержку перед запросом
-            time.sleep(2)
             
-            response = requests.get(ddg_url, headers=self.headers, timeout=15)
+            response = self.http.get(ddg_url, timeout=15)
             
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, 'html.parser')
@@ -113,16 +95,10 @@ class OKCollector:
                 logger.info(f"[OK] Найдено ссылок: {len(links)}")
                 
                 # Парсим каждый пост
-                for url in links[:10]:  # Берем первые 10
-                    try:
-                        time.sleep(2)  # Задержка между запросами
-                        post = self._parse_ok_post(url)
-                        if post and self._is_relevant(post['text']):
-                            logger.info(f"[OK] Найден релевантный пост: {post['text'][:50]}...")
-                            posts.append(post)
-                    except Exception as e:
-                        logger.debug(f"[OK] Ошибка парсинга {url}: {e}")
-                        continue
+                for post in self._parse_ok_posts(links[:10]):  # Берем первые 10
+                    if post and self._is_relevant(post['text']):
+                        logger.info(f"[OK] Найден релевантный пост: {post['text'][:50]}...")
+                        posts.append(post)
             else:
                 logger.warning(f"[OK] Поисковая система вернула код: {response.status_code}")
             
@@ -131,10 +107,26 @@ class OKCollector:
         
         return posts
     
+    def _parse_ok_posts(self, urls):
+        """Посты по ссылкам: страницы загружаются параллельно"""
+        responses = self.http.get_many(urls, timeout=10)
+        return [
+            self._parse_ok_html(url, response)
+            for url, response in zip(urls, responses)
+            if response is not None
+        ]
+    
     def _parse_ok_post(self, url):
         """Парсинг отдельного поста OK"""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            return self._parse_ok_html(url, self.http.get(url, timeout=10))
+        except Exception as e:
+            logger.debug(f"[OK] Ошибка парсинга поста: {e}")
+            return None
+    
+    def _parse_ok_html(self, url, response):
+        """Пост из загруженной страницы OK"""
+        try:
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # Извлекаем текст поста
@@ -211,9 +203,8 @@ class OKCollector:
         
         try:
             logger.info(f"[OK] Парсинг группы: {group_url}")
-            time.sleep(2)
             
-            response = requests.get(group_url, headers=self.headers, timeout=15, allow_redirects=True)
+            response = self.http.get(group_url, timeout=15)
             
             if response.status_code != 200:
                 logger.warning(f"[OK] Группа вернула статус {response.status_code}")
@@ -254,16 +245,10 @@ class OKCollector:
             logger.info(f"[OK] Найдено {len(post_links)} постов в группе")
             
             # Парсим каждый пост
-            for url in post_links[:10]:
-                try:
-                    time.sleep(2)
-                    post = self._parse_ok_post(url)
-                    if post and self._is_relevant(post['text']):
-                        logger.info(f"[OK] Спарсен пост из группы: {post['text'][:60]}...")
-                        posts.append(post)
-                except Exception as e:
-                    logger.debug(f"[OK] Ошибка парсинга поста {url}: {e}")
-                    continue
+            for post in self._parse_ok_posts(post_links[:10]):
+                if post and self._is_relevant(post['text']):
+                    logger.info(f"[OK] Спарсен пост из группы: {post['text'][:60]}...")
+                    posts.append(post)
             
         except Exception as e:
             logger.warning(f"[OK] Ошибка парсинга группы {group_url}: {e}")
@@ -281,9 +266,8 @@ class OKCollector:
             search_url = f'https://ok.ru/search?st.query={requests.utils.quote(query)}&st.mode=GlobalSearch'
             
             logger.info(f"[OK] Прямой поиск на OK.ru: {query}")
-            time.sleep(2)
             
-            response = requests.get(search_url, headers=self.headers, timeout=15, allow_redirects=True)
+            response = self.http.get(search_url, timeout=15)
             
             logger.info(f"[OK] Ответ от OK.ru: статус={response.status_code}, URL={response.url}")
             
@@ -349,16 +333,10 @@ class OKCollector:
                         logger.warning(f"[OK] По запросу '{query}' ничего не найдено")
                 
                 # Парсим посты по ссылкам
-                for url in links[:5]:
-                    try:
-                        time.sleep(2)
-                        post = self._parse_ok_post(url)
-                        if post and self._is_relevant(post['text']):
-                            logger.info(f"[OK] Спарсен пост: {post['text'][:80]}...")
-                            posts.append(post)
-                    except Exception as e:
-                        logger.debug(f"[OK] Ошибка парсинга {url}: {e}")
-                        continue
+                for post in self._parse_ok_posts(links[:5]):
+                    if post and self._is_relevant(post['text']):
+                        logger.info(f"[OK] Спарсен пост: {post['text'][:80]}...")
+                        posts.append(post)
             else:
                 logger.warning(f"[OK] Неожиданный статус: {response.status_code}")
             
@@ -378,9 +356,8 @@ class OKCollector:
             yandex_url = f'https://yandex.ru/search/?text={requests.utils.quote(search_query)}'
             
             logger.info(f"[OK] Поиск через Yandex: {search_query}")
-            time.sleep(2)
             
-            response = requests.get(yandex_url, headers=self.headers, timeout=15)
+            response = self.http.get(yandex_url, timeout=15)
             
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, 'html.parser')
@@ -398,16 +375,10 @@ class OKCollector:
                 
                 logger.info(f"[OK] Яндекс нашел {len(links)} ссылок")
                 
-                for url in links[:5]:
-                    try:
-                        time.sleep(2)
-                        post = self._parse_ok_post(url)
-                        if post and self._is_relevant(post['text']):
-                            logger.info(f"[OK] Спарсен пост через Яндекс: {post['text'][:80]}...")
-                            posts.append(post)
-                    except Exception as e:
-                        logger.debug(f"[OK] Ошибка парсинга {url}: {e}")
-                        continue
+                for post in self._parse_ok_posts(links[:5]):
+                    if post and self._is_relevant(post['text']):
+                        logger.info(f"[OK] Спарсен пост через Яндекс: {post['text'][:80]}...")
+                        posts.append(post)
             
         except Exception as e:
             logger.error(f"[OK] Ошибка поиска через Яндекс: {e}")
@@ -422,6 +393,7 @@ class OKCollector:
             logger.info("[OK] Запуск сбора из Одноклассников")
             logger.info("[OK] ⚠ ВНИМАНИЕ: OK.ru активно блокирует автоматический парсинг")
             logger.info("[OK] Рекомендуется использовать прокси/VPN или официальный API")
+            self.http.start_cycle()
             
             # 1. Прямой поиск на OK.ru (наиболее надежный)
             for keyword in self.keywords[:2]:
@@ -431,7 +403,6 @@ class OKCollector:
                     if posts:
                         logger.info(f"[OK] Найдено {len(posts)} постов по '{keyword}' (прямой поиск)")
                         all_posts.extend(posts)
-                    time.sleep(3)
                 except Exception as e:
                     logger.warning(f"[OK] Ошибка прямого поиска по '{keyword}': {e}")
             
@@ -444,7 +415,6 @@ class OKCollector:
                         if posts:
                             logger.info(f"[OK] Найдено {len(posts)} постов по '{keyword}' (Яндекс)")
                             all_posts.extend(posts)
-                        time.sleep(3)
                     except Exception as e:
                         logger.warning(f"[OK] Ошибка поиска через Яндекс по '{keyword}': {e}")
             
@@ -457,7 +427,6 @@ class OKCollector:
                         if posts:
                             logger.info(f"[OK] Найдено {len(posts)} постов по '{keyword}' (DuckDuckGo)")
                             all_posts.extend(posts)
-                        time.sleep(3)
                     except Exception as e:
                         logger.warning(f"[OK] Ошибка поиска через DuckDuckGo по '{keyword}': {e}")
             
@@ -470,7 +439,6 @@ class OKCollector:
                         if posts:
                             logger.info(f"[OK] Найдено {len(posts)} постов в группе")
                             all_posts.extend(posts)
-                        time.sleep(3)
                     except Exception as e:
                         logger.warning(f"[OK] Ошибка сбора из группы {group}: {e}")
             
@@ -490,5 +458,6 @@ class OKCollector:
             import traceback
             logger.debug(traceback.format_exc())
         
+        self.http.log_stats("[OK]")
         logger.info(f"[OK] Итого собрано постов: {len(all_posts)}")
         return all_posts
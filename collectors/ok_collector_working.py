@@ -5,6 +5,7 @@ import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from config import Config
+from utils.text_filter import TextFilter
 import logging
 import time
 import re
@@ -17,6 +18,11 @@ class OKCollectorWorking:
     
     def __init__(self, sentiment_analyzer=None):
         self.keywords = Config.COMPANY_KEYWORDS
+        self.text_filter = TextFilter(
+            include=lambda: self.keywords,
+            exclude=['газпром', 'т плюс', 'тнс тула', 'вакансия'],
+            match_all_if_no_include=True
+        )
         self.sentiment_analyzer = sentiment_analyzer
         
         # Десктопные заголовки
@@ -120,18 +126,7 @@ class OKCollectorWorking:
         if not text or len(text) < 10:
             return False
         
-        text_lower = text.lower()
-        
-        # Исключения
-        exclude = ['газпром', 'т плюс', 'тнс тула', 'вакансия']
-        if any(ex in text_lower for ex in exclude):
-            return False
-        
-        # Ключевые слова
-        if not self.keywords:
-            return True
-        
-        return any(kw.lower() in text_lower for kw in self.keywords)
+        return self.text_filter.is_relevant(text)
     
     def search_mobile(self, query):
         """Поиск через мобильную версию"""
@@ -1,18 +1,18 @@
 """
 Selenium коллектор для OK.ru с поддержкой прокси, авторизации и комментариев
 """
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from config import Config
+from utils.text_filter import TextFilter
+from utils.browser_pool import BrowserUnavailable, get_browser_pool
+from utils.webdriver_helper import block_heavy_resources, create_chrome_driver, hide_webdriver_signature
+from utils.page_waits import PageWaits, no_implicit_wait
 import logging
 import time
 import random
@@ -21,93 +21,48 @@ import os
 
 logger = logging.getLogger(__name__)
 
+# Панель профиля авторизованного пользователя и форма входа
+AUTH_SELECTORS = ['[class*="toolbar_uprofile"]', '[id*="toolbar_uprofile"]', '[id*="topPanel_logout"]', 'a[data-l="t,userPage"]']
+LOGIN_FORM_SELECTORS = ['#field_email', '[name="st.email"]']
+
+# Результаты поиска и блоки комментариев
+SEARCH_SELECTORS = ['div[class*="feed"]', 'div[class*="post"]', 'div[class*="topic"]', 'article', 'div[data-id]']
+COMMENT_SELECTORS = ['.comments_lst', '.comments-item', '.media-text_cnt', '[data-tsid="comments_lst"]']
+
 class OKSeleniumCollector:
     """Коллектор OK.ru через Selenium (обход всех блокировок) + авторизация + комментарии"""
     
     def __init__(self, sentiment_analyzer=None):
         self.keywords = Config.COMPANY_KEYWORDS
+        self.text_filter = TextFilter(
+            include=lambda: self.keywords,
+            exclude=['газпром', 'т плюс', 'тнс тула', 'вакансия', 'требуется'],
+            match_all_if_no_include=True
+        )
         self.sentiment_analyzer = sentiment_analyzer
         self.driver = None
         self.max_retries = 2
         self.cookies_file = 'ok_cookies.pkl'
         self.is_authenticated = False
+        self.waits = PageWaits('[OK-Selenium]')
         
         # Учетные данные из .env
         self.ok_login = os.getenv('OK_LOGIN', '')
         self.ok_password = os.getenv('OK_PASSWORD', '')
         
     def _setup_driver(self, use_proxy=None):
-        """Настройка Chrome драйвера"""
+        """Отдельный Chrome драйвер вне пула (ручные проверки); закрывается вызывающим"""
         try:
-            chrome_options = Options()
-            
-            # Базовые настройки для обхода детекции
-            chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            # User agent
-            chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36')
-            
-            # Уникальная директория для профиля (избегаем конфликтов)
-            import tempfile
-            import shutil
-            user_data_dir = os.path.join(tempfile.gettempdir(), f'ok_selenium_chrome_{os.getpid()}')
-            
-            # Очищаем старую директорию если есть
-            if os.path.exists(user_data_dir):
-                try:
-                    shutil.rmtree(user_data_dir, ignore_errors=True)
-                except:
-                    pass
-            
-            chrome_options.add_argument(f'--user-data-dir={user_data_dir}')
-            
-            # Headless режим с улучшенной стабильностью
-            chrome_options.add_argument('--headless=new')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-software-rasterizer')
-            chrome_options.add_argument('--disable-extensions')
-            
-            # Стабилизация Chrome
-            chrome_options.add_argument('--remote-debugging-port=0')  # Динамический выбор порта
-            chrome_options.add_argument('--disable-background-networking')
-            chrome_options.add_argument('--disable-background-timer-throttling')
-            chrome_options.add_argument('--disable-backgrounding-occluded-windows')
-            chrome_options.add_argument('--disable-breakpad')
-            chrome_options.add_argument('--disable-component-extensions-with-background-pages')
-            chrome_options.add_argument('--disable-features=TranslateUI,BlinkGenPropertyTrees')
-            chrome_options.add_argument('--disable-ipc-flooding-protection')
-            chrome_options.add_argument('--disable-renderer-backgrounding')
-            chrome_options.add_argument('--enable-features=NetworkService,NetworkServiceInProcess')
-            chrome_options.add_argument('--force-color-profile=srgb')
-            chrome_options.add_argument('--hide-scrollbars')
-            chrome_options.add_argument('--metrics-recording-only')
-            chrome_options.add_argument('--mute-audio')
-            
-            # Язык
-            chrome_options.add_argument('--lang=ru-RU')
-            
-            # Размер окна
-            chrome_options.add_argument('--window-size=1920,1080')
-            
-            # Прокси если указан
             if use_proxy:
                 logger.info(f"[OK-Selenium] Использую прокси: {use_proxy}")
-                chrome_options.add_argument(f'--proxy-server={use_proxy}')
-            
-            # Отключаем логи
-            chrome_options.add_argument('--log-level=3')
-            chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
             
-            # Создаем драйвер
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
+            driver = create_chrome_driver(headless=True, proxy=use_proxy)
+            if not driver:
+                return None
             
-            # Скрываем признаки webdriver
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            # Скрываем признаки webdriver и не загружаем картинки/шрифты/видео
+            hide_webdriver_signature(driver)
+            block_heavy_resources(driver)
             
             # Устанавливаем таймаут
             driver.set_page_load_timeout(30)
@@ -125,18 +80,7 @@ class OKSeleniumCollector:
         if not text or len(text) < 10:
             return False
         
-        text_lower = text.lower()
-        
-        # Исключения
-        exclude = ['газпром', 'т плюс', 'тнс тула', 'вакансия', 'требуется']
-        if any(ex in text_lower for ex in exclude):
-            return False
-        
-        # Ключевые слова
-        if not self.keywords:
-            return True
-        
-        return any(kw.lower() in text_lower for kw in self.keywords)
+        return self.text_filter.is_relevant(text)
     
     def _random_delay(self, min_sec=1, max_sec=3):
         """Случайная задержка для имитации человека"""
@@ -163,19 +107,17 @@ class OKSeleniumCollector:
                     cookies = pickle.load(f)
                 
                 # Сначала откроем OK.ru
-                self.driver.get("https://ok.ru")
-                self._random_delay(2, 3)
-                
-                # Загружаем cookies
-                for cookie in cookies:
-                    try:
-                        self.driver.add_cookie(cookie)
-                    except:
-                        pass
-                
-                # Обновляем страницу
-                self.driver.refresh()
-                self._random_delay(2, 3)
+                with self.waits.page(self.driver, "https://ok.ru") as page:
+                    # Загружаем cookies
+                    for cookie in cookies:
+                        try:
+                            self.driver.add_cookie(cookie)
+                        except:
+                            pass
+                    
+                    # Обновляем страницу и ждем панель профиля (или форму входа)
+                    self.driver.refresh()
+                    page.element(AUTH_SELECTORS + LOGIN_FORM_SELECTORS, timeout=5, label='auth')
                 
                 # Проверяем авторизацию
                 if self.check_auth():
@@ -204,7 +146,8 @@ class OKSeleniumCollector:
             
             # Проверяем URL профиля
             try:
-                profile_link = self.driver.find_element(By.CSS_SELECTOR, 'a[data-l="t,userPage"]')
+                with no_implicit_wait(self.driver):
+                    profile_link = self.driver.find_element(By.CSS_SELECTOR, 'a[data-l="t,userPage"]')
                 if profile_link:
                     return True
             except:
@@ -229,9 +172,8 @@ class OKSeleniumCollector:
             
             logger.info("[OK-Auth] Попытка авторизации...")
             
-            # Открываем страницу входа
+            # Открываем страницу входа (поле логина ждем ниже)
             self.driver.get("https://ok.ru")
-            self._random_delay(2, 3)
             
             # Ищем поле логина
             try:
@@ -278,8 +220,9 @@ class OKSeleniumCollector:
                 password_input.send_keys(Keys.RETURN)
                 logger.info("[OK-Auth] Форма отправлена через Enter")
             
-            # Ждем загрузки
-            self._random_delay(3, 5)
+            # Ждем панель профиля после входа
+            with self.waits.page(self.driver) as page:
+                page.element(AUTH_SELECTORS, timeout=10, label='login')
             
             # Проверяем успешность авторизации
             if self.check_auth():
@@ -317,12 +260,10 @@ class OKSeleniumCollector:
             logger.info(f"[OK-Comments] Парсинг комментариев: {post_url}")
             
             # Открываем пост
-            self.driver.get(post_url)
-            self._random_delay(2, 3)
-            
-            # Скроллим вниз для загрузки комментариев
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            self._random_delay(1, 2)
+            with self.waits.page(self.driver, post_url) as page:
+                # Скроллим вниз для загрузки комментариев и ждем их блок
+                page.scroll(fraction=0.5)
+                page.element(COMMENT_SELECTORS, timeout=3, label='comments')
             
             # Получаем HTML
             html = self.driver.page_source
@@ -396,122 +337,17 @@ class OKSeleniumCollector:
     def search_with_selenium(self, query, proxy=None):
         """Поиск через Selenium"""
         posts = []
-        driver = None
         
         try:
             logger.info(f"[OK-Selenium] Запуск поиска: {query}")
             
-            # Создаем драйвер
-            driver = self._setup_driver(use_proxy=proxy)
-            if not driver:
-                return posts
-            
-            # Формируем URL поиска
-            search_url = f'https://ok.ru/search?st.query={query}&st.mode=GlobalSearch'
-            
-            logger.info(f"[OK-Selenium] Открываю: {search_url}")
-            driver.get(search_url)
-            
-            # Ждем загрузки
-            self._random_delay(3, 5)
-            
-            # Проверяем на капчу
-            if 'captcha' in driver.page_source.lower():
-                logger.warning("[OK-Selenium] ⚠ Обнаружена капча! Пробую подождать...")
-                time.sleep(10)  # Ждем если капча автоматическая
-            
-            # Скроллим страницу (имитация человека)
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            self._random_delay(1, 2)
-            
-            # Получаем HTML
-            html = driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Ищем результаты поиска
-            # OK.ru использует разные классы, пробуем все
-            selectors = [
-                'div[class*="feed"]',
-                'div[class*="post"]',
-                'div[class*="topic"]',
-                'div[class*="media"]',
-                'article',
-                'div[data-id]'
-            ]
-            
-            found_elements = []
-            for selector in selectors:
-                elements = soup.select(selector)
-                if elements:
-                    logger.debug(f"[OK-Selenium] Найдено элементов по селектору '{selector}': {len(elements)}")
-                    found_elements.extend(elements)
-            
-            logger.info(f"[OK-Selenium] Всего найдено элементов: {len(found_elements)}")
-            
-            # Парсим элементы
-            for elem in found_elements[:20]:  # Берем первые 20
-                try:
-                    # Извлекаем текст
-                    text = elem.get_text(strip=True, separator=' ')
-                    
-                    if not text or len(text) < 30:
-                        continue
-                    
-                    # Проверяем релевантность
-                    if not self._is_relevant(text):
-                        continue
-                    
-                    # Ищем ссылку
-                    link_tag = elem.find('a', href=True)
-                    url = 'https://ok.ru'
-                    if link_tag:
-                        href = link_tag['href']
-                        if href.startswith('http'):
-                            url = href
-                        elif href.startswith('/'):
-                            url = f"https://ok.ru{href}"
-                    
-                    # Ищем автора
-                    author = 'OK User'
-                    author_elem = elem.find(class_=lambda x: x and ('author' in x.lower() or 'name' in x.lower() or 'user' in x.lower()))
-                    if author_elem:
-                        author = author_elem.get_text(strip=True)
-                    
-                    # Создаем пост
-                    post_data = {
-                        'source': 'ok',
-                        'source_id': f"ok_sel_{abs(hash(text[:100]))}",
-                        'author': author[:100],
-                        'author_id': f"ok_{abs(hash(author))}",
-                        'text': text[:500],
-                        'url': url,
-                        'published_date': datetime.now(),
-                        'date': datetime.now()
-                    }
-                    
-                    # Анализ тональности
-                    if self.sentiment_analyzer:
-                        try:
-                            sentiment = self.sentiment_analyzer.analyze(text)
-                            post_data['sentiment_score'] = sentiment.get('sentiment_score', 0)
-                            post_data['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
-                        except Exception as e:
-                            logger.debug(f"[OK-Selenium] Ошибка анализа тональности: {e}")
-                    
-                    posts.append(post_data)
-                    logger.info(f"[OK-Selenium] ✓ Найден пост: {text[:80]}...")
-                    
-                except Exception as e:
-                    logger.debug(f"[OK-Selenium] Ошибка парсинга элемента: {e}")
-                    continue
-            
-            # Сохраняем скриншот для отладки
-            try:
-                screenshot_path = 'ok_selenium_screenshot.png'
-                driver.save_screenshot(screenshot_path)
-                logger.info(f"[OK-Selenium] Скриншот сохранен: {screenshot_path}")
-            except:
-                pass
+            # Без прокси - уже открытый (и авторизованный) браузер сбора,
+            # с прокси - отдельный браузер из пула, закрывается после поиска
+            if self.driver and not proxy:
+                posts = self._search_page(self.driver, query)
+            else:
+                with get_browser_pool('chrome').driver(proxy=proxy) as driver:
+                    posts = self._search_page(driver, query)
             
         except TimeoutException:
             logger.warning("[OK-Selenium] Таймаут загрузки страницы")
@@ -519,13 +355,118 @@ class OKSeleniumCollector:
             logger.error(f"[OK-Selenium] Ошибка: {e}")
             import traceback
             logger.debug(traceback.format_exc())
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                    logger.info("[OK-Selenium] Драйвер закрыт")
-                except:
-                    pass
+        
+        return posts
+    
+    def _search_page(self, driver, query):
+        """Поиск на открытой странице драйвера"""
+        posts = []
+        
+        # Формируем URL поиска
+        search_url = f'https://ok.ru/search?st.query={query}&st.mode=GlobalSearch'
+        
+        logger.info(f"[OK-Selenium] Открываю: {search_url}")
+        with self.waits.page(driver, search_url) as page:
+            # Ждем результатов поиска
+            page.element(SEARCH_SELECTORS, label='results')
+            
+            # Проверяем на капчу
+            if 'captcha' in driver.page_source.lower():
+                logger.warning("[OK-Selenium] ⚠ Обнаружена капча! Пробую подождать...")
+                # Автоматическая капча снимается сама - ждем до 10 секунд, пока она не исчезнет
+                page.condition(lambda: 'captcha' not in driver.page_source.lower(), timeout=10, label='captcha')
+            
+            # Скроллим страницу, пока подгружаются результаты
+            page.scroll(fraction=0.5)
+        
+        # Получаем HTML
+        html = driver.page_source
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Ищем результаты поиска
+        # OK.ru использует разные классы, пробуем все
+        selectors = [
+            'div[class*="feed"]',
+            'div[class*="post"]',
+            'div[class*="topic"]',
+            'div[class*="media"]',
+            'article',
+            'div[data-id]'
+        ]
+        
+        found_elements = []
+        for selector in selectors:
+            elements = soup.select(selector)
+            if elements:
+                logger.debug(f"[OK-Selenium] Найдено элементов по селектору '{selector}': {len(elements)}")
+                found_elements.extend(elements)
+        
+        logger.info(f"[OK-Selenium] Всего найдено элементов: {len(found_elements)}")
+        
+        # Парсим элементы
+        for elem in found_elements[:20]:  # Берем первые 20
+            try:
+                # Извлекаем текст
+                text = elem.get_text(strip=True, separator=' ')
+                
+                if not text or len(text) < 30:
+                    continue
+                
+                # Проверяем релевантность
+                if not self._is_relevant(text):
+                    continue
+                
+                # Ищем ссылку
+                link_tag = elem.find('a', href=True)
+                url = 'https://ok.ru'
+                if link_tag:
+                    href = link_tag['href']
+                    if href.startswith('http'):
+                        url = href
+                    elif href.startswith('/'):
+                        url = f"https://ok.ru{href}"
+                
+                # Ищем автора
+                author = 'OK User'
+                author_elem = elem.find(class_=lambda x: x and ('author' in x.lower() or 'name' in x.lower() or 'user' in x.lower()))
+                if author_elem:
+                    author = author_elem.get_text(strip=True)
+                
+                # Создаем пост
+                post_data = {
+                    'source': 'ok',
+                    'source_id': f"ok_sel_{abs(hash(text[:100]))}",
+                    'author': author[:100],
+                    'author_id': f"ok_{abs(hash(author))}",
+                    'text': text[:500],
+                    'url': url,
+                    'published_date': datetime.now(),
+                    'date': datetime.now()
+                }
+                
+                # Анализ тональности
+                if self.sentiment_analyzer:
+                    try:
+                        sentiment = self.sentiment_analyzer.analyze(text)
+                        post_data['sentiment_score'] = sentiment.get('sentiment_score', 0)
+                        post_data['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
+                    except Exception as e:
+                        logger.debug(f"[OK-Selenium] Ошибка анализа тональности: {e}")
+                
+                posts.append(post_data)
+                logger.info(f"[OK-Selenium] ✓ Найден пост: {text[:80]}...")
+                
+            except Exception as e:
+                logger.debug(f"[OK-Selenium] Ошибка парсинга элемента: {e}")
+                continue
+        
+        # Сохраняем скриншот для отладки
+        try:
+            screenshot_path = 'ok_selenium_screenshot.png'
+            driver.save_screenshot(screenshot_path)
+            logger.info(f"[OK-Selenium] Скриншот сохранен: {screenshot_path}")
+        except:
+            pass
         
         return posts
     
@@ -587,11 +528,13 @@ class OKSeleniumCollector:
             else:
                 logger.info("[OK-Selenium] Режим: ТОЛЬКО ПОСТЫ")
             logger.info("[OK-Selenium] ================================================")
+            self.waits.reset()
             
-            # Инициализация драйвера
-            self.driver = self._setup_driver()
-            if not self.driver:
-                logger.error("[OK-Selenium] Не удалось создать драйвер")
+            # Прогретый драйвер из пула (профиль с cookies сохраняется между циклами)
+            try:
+                self.driver = get_browser_pool('chrome').acquire()
+            except BrowserUnavailable as e:
+                logger.error(f"[OK-Selenium] Не удалось создать драйвер: {e}")
                 return all_posts
             
             # Попытка авторизации (если нужны комментарии или просто для доступа)
@@ -621,7 +564,8 @@ class OKSeleniumCollector:
                         logger.info(f"[OK-Selenium] ✓ Найдено {len(posts)} постов по '{keyword}'")
                         all_posts.extend(posts)
                         break  # Если нашли - хватит
-                    time.sleep(3)
+                    # Пауза между поисковыми запросами (антибот OK)
+                    self.waits.jitter(2, 4)
                 except Exception as e:
                     logger.debug(f"[OK-Selenium] Ошибка без прокси: {e}")
             
@@ -649,8 +593,6 @@ class OKSeleniumCollector:
                         
                         if len(all_posts) > 0:
                             break  # Нашли рабочий прокси
-                        
-                        time.sleep(2)
                 else:
                     logger.warning("[OK-Selenium] Не удалось получить бесплатные прокси")
             
@@ -668,7 +610,7 @@ class OKSeleniumCollector:
                                 all_posts.extend(comments)
                                 comments_total += len(comments)
                                 logger.info(f"[OK-Comments] Добавлено {len(comments)} комментариев к посту")
-                            time.sleep(2)  # Задержка между постами
+                            self.waits.jitter(1, 2)  # Пауза между постами (антибот OK)
                     except Exception as e:
                         logger.debug(f"[OK-Comments] Ошибка сбора комментариев: {e}")
                         continue
@@ -698,6 +640,7 @@ class OKSeleniumCollector:
                 logger.info("[OK-Selenium] - Настройте Tor: Настройки → Прокси и Tor")
                 logger.info("[OK-Selenium] - Используйте платные прокси")
                 logger.info("[OK-Selenium] - Получите API токен OK.ru")
+            self.waits.log_stats()
             logger.info("[OK-Selenium] ================================================")
             
         except Exception as e:
@@ -706,23 +649,10 @@ class OKSeleniumCollector:
             logger.debug(traceback.format_exc())
         
         finally:
-            # Закрываем драйвер
+            # Возвращаем драйвер в пул
             if self.driver:
-                try:
-                    self.driver.quit()
-                    logger.info("[OK-Selenium] Драйвер закрыт")
-                except:
-                    pass
-            
-            # Очищаем временную директорию
-            try:
-                import tempfile
-                import shutil
-                user_data_dir = os.path.join(tempfile.gettempdir(), f'ok_selenium_chrome_{os.getpid()}')
-                if os.path.exists(user_data_dir):
-                    shutil.rmtree(user_data_dir, ignore_errors=True)
-                    logger.debug("[OK-Selenium] Временная директория очищена")
-            except:
-                pass
+                get_browser_pool('chrome').release(self.driver)
+                self.driver = None
+                logger.info("[OK-Selenium] Драйвер возвращен в пул")
         
         return all_posts
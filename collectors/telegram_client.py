@@ -0,0 +1,166 @@
+"""
+Долгоживущий клиент Telethon для циклов мониторинга
+Одно авторизованное соединение на процесс: клиент работает в собственном
+event loop в фоновом потоке и переживает циклы сбора, переподключаясь лениво
+"""
+import asyncio
+import atexit
+import glob
+import logging
+import os
+import shutil
+import threading
+
+from telethon import TelegramClient
+
+logger = logging.getLogger(__name__)
+
+# Основная сессия, созданная setup_telegram.py
+MAIN_SESSION = 'telegram_session'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_stale_sessions(main_session=MAIN_SESSION):
+    """
+    Удалить копии сессии, оставшиеся от прошлых запусков
+
+    Прежние версии коллектора копировали сессию в telegram_session_<время>
+    на каждый запуск; копии процессов-воркеров (telegram_session_pid<pid>)
+    удаляются, если процесс уже завершен.
+
+    Returns:
+        Количество удаленных файлов
+    """
+    removed = 0
+    for path in glob.glob(f'{main_session}_*.session*'):
+        suffix = os.path.basename(path)[len(main_session) + 1:].split('.', 1)[0]
+        if suffix.startswith('pid') and suffix[3:].isdigit() and _pid_alive(int(suffix[3:])):
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            logger.debug(f"[TELEGRAM] Не удалось удалить {path}: {e}")
+
+    if removed:
+        logger.info(f"[TELEGRAM] Удалено устаревших файлов сессий: {removed}")
+    return removed
+
+
+class TelegramClientManager:
+    """
+    Один клиент Telethon на процесс
+
+    TelegramClient привязан к event loop, в котором подключен, поэтому
+    менеджер держит свой loop в фоновом потоке, а коллектор выполняет в нем
+    корутины через run(). Соединение устанавливается при первом client() и
+    восстанавливается, только если оборвалось.
+
+    Файл сессии - копия основной на время жизни процесса
+    (telegram_session_pid<pid>): SQLite-сессию нельзя держать открытой из
+    нескольких процессов (веб-приложение и мониторинг).
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, main_session=MAIN_SESSION):
+        self.main_session = main_session
+        self.session_file = f'{main_session}_pid{os.getpid()}'
+        self._client = None
+        self._client_params = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        """Общий менеджер процесса"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                cleanup_stale_sessions(cls._instance.main_session)
+                atexit.register(cls._instance.close)
+            return cls._instance
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name='telegram-client', daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro):
+        """Выполнить корутину в loop клиента и дождаться результата (из любого потока)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    def _prepare_session(self):
+        if os.path.exists(f'{self.session_file}.session') or not os.path.exists(f'{self.main_session}.session'):
+            return
+        try:
+            shutil.copy2(f'{self.main_session}.session', f'{self.session_file}.session')
+            logger.info(f"[TELEGRAM] Скопирована сессия из {self.main_session}")
+        except Exception as e:
+            logger.warning(f"[TELEGRAM] Не удалось скопировать сессию: {e}")
+
+    async def client(self, api_id, api_hash, proxy=None):
+        """
+        Подключенный и авторизованный клиент (вызывать внутри run())
+
+        Returns:
+            TelegramClient или None, если сессия не авторизована
+        """
+        params = (int(api_id), api_hash, proxy)
+        if self._client is not None and self._client_params != params:
+            await self.disconnect()
+            self._client = None
+
+        if self._client is None:
+            self._prepare_session()
+            self._client = TelegramClient(self.session_file, *params[:2], proxy=proxy)
+            self._client_params = params
+
+        if not self._client.is_connected():
+            await self._client.connect()
+            if not await self._client.is_user_authorized():
+                logger.error("Telegram authorization required. Please run setup script first.")
+                await self._client.disconnect()
+                return None
+            logger.info("Telegram client connected")
+
+        return self._client
+
+    async def disconnect(self):
+        if self._client is not None and self._client.is_connected():
+            await self._client.disconnect()
+
+    def close(self):
+        """Отключить клиент, остановить loop и удалить копию сессии"""
+        if self._loop is None:
+            return
+        try:
+            self.run(self.disconnect())
+        except Exception as e:
+            logger.debug(f"[TELEGRAM] Ошибка отключения: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+        self._client = None
+
+        for path in glob.glob(f'{self.session_file}.session*'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -3,6 +3,7 @@ from telegram.error import TelegramError
 from datetime import datetime, timedelta
 from config import Config
 from utils.language_detector import LanguageDetector
+from utils.text_filter import TextFilter, COMPANY_PATTERNS, COMPETITOR_EXCLUDES
 import logging
 import asyncio
 
@@ -14,6 +15,11 @@ class TelegramCollector:
         self.keywords = Config.COMPANY_KEYWORDS
         self.channels = Config.TELEGRAM_CHANNELS
         self.language_detector = LanguageDetector()
+        self.text_filter = TextFilter(
+            include=COMPANY_PATTERNS,
+            exclude=COMPETITOR_EXCLUDES,
+            language_detector=self.language_detector
+        )
         self.bot = None
         
         if self.bot_token:
@@ -25,39 +31,13 @@ class TelegramCollector:
             logger.warning("TELEGRAM_BOT_TOKEN not configured")
     
     def _is_russian(self, text):
-        if not Config.LANGUAGE_FILTER_ENABLED:
-            return True
-        return self.language_detector.is_russian(text)
+        return self.text_filter.is_russian(text)
     
     def _is_nizhny_region(self, text):
-        if not Config.GEO_FILTER_ENABLED:
-            return True
-        
-        text_lower = text.lower()
-        return any(keyword.lower() in text_lower for keyword in Config.GEO_KEYWORDS)
+        return self.text_filter.is_nizhny_region(text)
     
     def _is_relevant_to_company(self, text):
-        text_lower = text.lower()
-        
-        exclude_patterns = [
-            'газпром', 'т плюс', 'т-плюс', 'росатом', 'энергосбыт плюс',
-            'энергосбыт луганск', 'энергосбыт волга', 'энергосбыт тюмень',
-            'тнс тула', 'тнс великий новгород', 'тнс ярославль',
-            'вакансия', 'вакансии', 'требуется'
-        ]
-        
-        if any(exclude in text_lower for exclude in exclude_patterns):
-            return False
-        
-        main_patterns = [
-            'тнс энерго нн',
-            'тнс энерго нижний',
-            'тнс энерго нижегородск',
-            'тнс нн',
-            'тнс нижний новгород'
-        ]
-        
-        return any(pattern in text_lower for pattern in main_patterns)
+        return self.text_filter.is_relevant(text)
     
     async def get_channel_messages(self, channel_username, limit=100):
         if not self.bot:
@@ -72,7 +52,7 @@ class TelegramCollector:
                     post = update.channel_post
                     text = post.text or post.caption or ''
                     
-                    if self._is_relevant_to_company(text) and self._is_nizhny_region(text) and self._is_russian(text):
+                    if self.text_filter.accepts(text):
                         messages.append({
                             'source_id': f"telegram_{post.chat.id}_{post.message_id}",
                             'author': post.chat.title or post.chat.username or 'Unknown',
@@ -0,0 +1,206 @@
+"""
+Параллельный обход Telegram-каналов с учетом FloodWait
+Каналы обрабатываются одновременно (не больше concurrency), ограничения
+FloodWait запоминаются по (DC, метод) и откладывают только затронутый канал
+"""
+import asyncio
+import logging
+import time
+
+from telethon.errors import FloodWaitError, MultiError
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Запросов в одном контейнере MTProto при пакетной загрузке ответов
+REPLIES_BATCH_SIZE = 10
+
+
+class FloodDeferred(Exception):
+    """Канал нужно отложить: метод заблокирован FloodWait еще на seconds"""
+
+    def __init__(self, key, seconds):
+        super().__init__(f"{key[1]} на DC {key[0]}: ожидание {seconds:.0f} с")
+        self.key = key
+        self.seconds = seconds
+
+
+class FloodWaitBudget:
+    """
+    Сроки блокировок FloodWait по ключу (dc_id, метод)
+
+    Telegram ограничивает частоту отдельно для каждого метода; блокировка
+    GetRepliesRequest не мешает читать историю других каналов.
+    """
+
+    def __init__(self):
+        self._until = {}
+
+    def record(self, key, seconds):
+        self._until[key] = max(self._until.get(key, 0.0), time.monotonic() + seconds)
+
+    def remaining(self, key):
+        return max(0.0, self._until.get(key, 0.0) - time.monotonic())
+
+    def snapshot(self):
+        """Активные блокировки {(dc_id, метод): секунд осталось}"""
+        return {key: round(self.remaining(key)) for key in self._until if self.remaining(key) > 0}
+
+
+class TelegramScheduler:
+    """
+    Планировщик запросов и обхода каналов
+
+    Все запросы канала идут через request()/request_batch(): перед отправкой
+    проверяется бюджет FloodWait метода. Короткие ожидания (до
+    flood_sleep_threshold) выжидаются на месте, длинные - канал освобождает
+    слот семафора и ставится в очередь заново, остальные каналы продолжают работу.
+
+    Args:
+        client: Подключенный TelegramClient
+        concurrency: Каналов одновременно (по умолчанию Config.TELEGRAM_CONCURRENCY)
+        max_flood_wait: Дольше этого канал не ждем и пропускаем в этом цикле
+    """
+
+    def __init__(self, client, concurrency=None, max_flood_wait=None, flood_sleep_threshold=10, max_reschedules=3):
+        self.client = client
+        self.concurrency = concurrency or Config.TELEGRAM_CONCURRENCY
+        self.max_flood_wait = max_flood_wait or Config.TELEGRAM_MAX_FLOOD_WAIT
+        self.flood_sleep_threshold = flood_sleep_threshold
+        self.max_reschedules = max_reschedules
+        self.budget = FloodWaitBudget()
+        self.stats = {'requests': 0, 'flood_waits': 0, 'rescheduled': 0, 'skipped': 0}
+
+        # FloodWait обрабатывает планировщик, встроенное ожидание Telethon
+        # держало бы слот канала на все время блокировки
+        self.client.flood_sleep_threshold = 0
+
+    def _key(self, request):
+        return (self.client.session.dc_id, type(request).__name__)
+
+    async def _wait_budget(self, key):
+        remaining = self.budget.remaining(key)
+        if remaining > self.flood_sleep_threshold:
+            raise FloodDeferred(key, remaining)
+        if remaining:
+            await asyncio.sleep(remaining)
+
+    def _flood(self, key, error):
+        self.stats['flood_waits'] += 1
+        self.budget.record(key, error.seconds)
+        logger.warning(f"[TELEGRAM] FloodWait {error.seconds} с для {key[1]} (DC {key[0]})")
+
+    async def request(self, request):
+        """
+        Один запрос с учетом бюджета FloodWait его метода
+
+        Raises:
+            FloodDeferred: блокировка длиннее flood_sleep_threshold или
+                больше max_reschedules FloodWait подряд
+        """
+        key = self._key(request)
+        for _ in range(self.max_reschedules + 1):
+            await self._wait_budget(key)
+            self.stats['requests'] += 1
+            try:
+                return await self.client(request)
+            except FloodWaitError as e:
+                self._flood(key, e)
+        # Короткие FloodWait подряд - канал откладывается, а не повторяет запрос бесконечно
+        raise FloodDeferred(key, self.budget.remaining(key))
+
+    async def request_batch(self, requests, batch_size=REPLIES_BATCH_SIZE):
+        """
+        Однотипные запросы пакетами в одном контейнере MTProto
+
+        Returns:
+            Список ответов в порядке requests (None для неудавшихся)
+
+        Raises:
+            FloodDeferred: пакет получил FloodWait больше max_reschedules раз подряд
+        """
+        if not requests:
+            return []
+
+        key = self._key(requests[0])
+        results = []
+        for i in range(0, len(requests), batch_size):
+            chunk = requests[i:i + batch_size]
+            for _ in range(self.max_reschedules + 1):
+                await self._wait_budget(key)
+                self.stats['requests'] += 1
+                try:
+                    results.extend(await self.client(chunk, ordered=False))
+                    break
+                except MultiError as e:
+                    flood = [err for err in e.exceptions if isinstance(err, FloodWaitError)]
+                    if not flood:
+                        results.extend(e.results)
+                        break
+                    # Повторяем пакет целиком после ожидания
+                    self._flood(key, max(flood, key=lambda err: err.seconds))
+                except FloodWaitError as e:
+                    self._flood(key, e)
+            else:
+                raise FloodDeferred(key, self.budget.remaining(key))
+        return results
+
+    async def _run_one(self, semaphore, item, worker):
+        for attempt in range(self.max_reschedules + 1):
+            async with semaphore:
+                try:
+                    return await worker(item)
+                except FloodDeferred as e:
+                    delay = e.seconds
+                except FloodWaitError as e:
+                    # Запрос мимо request() - запоминаем бюджет по DC
+                    self._flood((self.client.session.dc_id, type(e.request).__name__ if e.request else 'unknown'), e)
+                    delay = e.seconds
+
+            if delay > self.max_flood_wait or attempt == self.max_reschedules:
+                self.stats['skipped'] += 1
+                logger.error(f"❌ {item}: ожидание FloodWait {delay:.0f} с, пропускаем в этом цикле")
+                return []
+
+            # Слот семафора свободен - остальные каналы продолжают работу
+            self.stats['rescheduled'] += 1
+            logger.info(f"⏰ {item}: отложен на {delay:.0f} с")
+            await asyncio.sleep(delay)
+
+        return []
+
+    async def run(self, items, worker):
+        """
+        Обработать items параллельно
+
+        Args:
+            items: Каналы
+            worker: async-функция item -> список результатов
+
+        Returns:
+            Результаты в порядке items, одним списком
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        # Счетчики за цикл; бюджет FloodWait сохраняется между циклами
+        self.stats = dict.fromkeys(self.stats, 0)
+
+        results = await asyncio.gather(
+            *(self._run_one(semaphore, item, worker) for item in items),
+            return_exceptions=True
+        )
+
+        collected = []
+        for item, result in zip(items, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error getting messages from {item}: {result}")
+                continue
+            collected.extend(result)
+
+        logger.info(
+            f"[TELEGRAM] {len(items)} каналов за {time.perf_counter() - started:.1f} с: "
+            f"запросов {self.stats['requests']}, FloodWait {self.stats['flood_waits']}, "
+            f"отложено {self.stats['rescheduled']}, пропущено {self.stats['skipped']}"
+        )
+        return collected
@@ -1,16 +1,28 @@
-from telethon import TelegramClient
 from telethon.tl.functions.messages import GetHistoryRequest, GetRepliesRequest
 from telethon.errors import FloodWaitError, ChannelPrivateError, UsernameNotOccupiedError
-from datetime import datetime, timedelta
 from config import Config
 from utils.language_detector import LanguageDetector
+from utils.text_filter import TextFilter, COMPETITOR_EXCLUDES
+from collectors.telegram_client import TelegramClientManager
+from collectors.telegram_scheduler import TelegramScheduler, FloodDeferred
+from utils.telegram_replies import reply_source_id
+from utils.telegram_watermarks import load_watermarks, save_watermarks
 import logging
-import asyncio
-import os
-import time
 
 logger = logging.getLogger(__name__)
 
+# Расширенные паттерны поиска ТНС (более гибкие)
+TNS_PATTERNS = ['тнс энерго', 'тнс нн', 'тнсэнерго', 'тнс-энерго']
+
+# Страниц истории за цикл при инкрементальном сборе (по limit сообщений)
+HISTORY_MAX_PAGES = 10
+
+# Упоминания Нижнего рядом с ТНС (более мягкая проверка)
+NIZHNY_PATTERNS = ['нижний', 'нижегородск', 'нн', 'н.новгород', 'н новгород']
+
+# Упоминания Нижнего рядом с энергосбытом
+ENERGOSBYT_NIZHNY_PATTERNS = ['нижний новгород', 'нижегородск', 'нн ', ' нн', 'нн,', 'нн.']
+
 class TelegramUserCollector:
     """Telegram collector using User API (Telethon) - can read any public channel"""
     
@@ -21,71 +33,38 @@ class TelegramUserCollector:
         self.keywords = Config.COMPANY_KEYWORDS
         self.channels = Config.TELEGRAM_CHANNELS
         self.language_detector = LanguageDetector()
+        # ТНС + Нижний, либо энергосбыт в контексте Нижнего; конкуренты исключаются
+        self.text_filter = TextFilter(
+            exclude=COMPETITOR_EXCLUDES + ['резюме'],
+            include_groups=[
+                (TNS_PATTERNS, NIZHNY_PATTERNS + ['энерго нн']),
+                (['энергосбыт'], ENERGOSBYT_NIZHNY_PATTERNS)
+            ],
+            language_detector=self.language_detector
+        )
         self.sentiment_analyzer = sentiment_analyzer
         self.client = None
+        self.scheduler = None
+        self.watermarks = {}
+        self.new_watermarks = {}
+        # Отметки последнего сбора: сохраняются commit_watermarks() после записи отзывов
+        self.pending_watermarks = {}
         
-        # Session file - используем уникальное имя для избежания блокировки
-        import os
-        import time
-        self.session_file = f'telegram_session_{int(time.time())}'
-        self.main_session = 'telegram_session'
+        # Одно соединение на процесс, общее для всех циклов мониторинга
+        self.client_manager = TelegramClientManager.instance()
         
         if not self.api_id or not self.api_hash:
             logger.warning("TELEGRAM_API_ID and TELEGRAM_API_HASH not configured")
             logger.info("Visit https://my.telegram.org to get API credentials")
     
     def _is_russian(self, text):
-        if not Config.LANGUAGE_FILTER_ENABLED:
-            return True
-        return self.language_detector.is_russian(text)
+        return self.text_filter.is_russian(text)
     
     def _is_nizhny_region(self, text):
-        if not Config.GEO_FILTER_ENABLED:
-            return True
-        
-        text_lower = text.lower()
-        return any(keyword.lower() in text_lower for keyword in Config.GEO_KEYWORDS)
+        return self.text_filter.is_nizhny_region(text)
     
     def _is_relevant_to_company(self, text):
-        if not text:
-            return False
-            
-        text_lower = text.lower()
-        
-        # Исключаем конкурентов и нерелевантные упоминания
-        exclude_patterns = [
-            'газпром', 'т плюс', 'т-плюс', 'росатом', 'энергосбыт плюс',
-            'энергосбыт луганск', 'энергосбыт волга', 'энергосбыт тюмень',
-            'тнс тула', 'тнс великий новгород', 'тнс ярославль',
-            'вакансия', 'вакансии', 'требуется', 'резюме'
-        ]
-        
-        if any(exclude in text_lower for exclude in exclude_patterns):
-            return False
-        
-        # Расширенные паттерны поиска (более гибкие)
-        main_patterns = [
-            'тнс энерго',  # Более общий паттерн
-            'тнс нн',
-            'тнсэнерго',
-            'тнс-энерго'
-        ]
-        
-        has_tns = any(pattern in text_lower for pattern in main_patterns)
-        
-        # Если нашли ТНС, проверяем что это про Нижний
-        if has_tns:
-            nizhny_patterns = ['нижний', 'нижегородск', 'нн', 'н.новгород', 'н новгород']
-            # Проверяем наличие упоминания Нижнего в тексте (более мягкая проверка)
-            has_nizhny = any(pattern in text_lower for pattern in nizhny_patterns)
-            return has_nizhny or 'энерго нн' in text_lower
-        
-        # Также ищем упоминания энергосбыта в контексте Нижнего
-        if 'энергосбыт' in text_lower:
-            nizhny_patterns = ['нижний новгород', 'нижегородск', 'нн ', ' нн', 'нн,', 'нн.']
-            return any(pattern in text_lower for pattern in nizhny_patterns)
-        
-        return False
+        return self.text_filter.is_relevant(text)
     
     def _setup_proxy(self):
         """Setup proxy configuration for Telegram (Telethon)"""
@@ -122,137 +101,195 @@ class TelegramUserCollector:
         return proxy_config
     
     async def init_client(self):
-        """Initialize Telegram client"""
+        """
+        Подключенный клиент из TelegramClientManager (вызывать в его loop)
+        
+        Вместе с клиентом создается планировщик запросов, поэтому методы
+        сбора можно вызывать и без search_in_channels.
+        """
         if not self.api_id or not self.api_hash:
             return False
         
         try:
-            import shutil
-            
-            # Копируем основную сессию если она существует
-            if os.path.exists(f'{self.main_session}.session'):
-                try:
-                    shutil.copy2(f'{self.main_session}.session', f'{self.session_file}.session')
-                    logger.info(f"[TELEGRAM] Скопирована сессия из {self.main_session}")
-                except Exception as e:
-                    logger.warning(f"[TELEGRAM] Не удалось скопировать сессию: {e}")
-            
-            proxy = self._setup_proxy()
-            
-            # Create Telegram client with optional proxy
-            self.client = TelegramClient(
-                self.session_file, 
-                int(self.api_id), 
-                self.api_hash,
-                proxy=proxy
-            )
-            
-            await self.client.start(phone=self.phone)
-            
-            if not await self.client.is_user_authorized():
-                logger.error("Telegram authorization required. Please run setup script first.")
+            # Соединение предыдущего цикла переиспользуется, handshake - только при обрыве
+            self.client = await self.client_manager.client(self.api_id, self.api_hash, proxy=self._setup_proxy())
+            if self.client is None:
                 return False
-            
-            logger.info("Telegram client initialized successfully")
+            # После переподключения бюджет FloodWait привязан к новому клиенту
+            if self.scheduler is None or self.scheduler.client is not self.client:
+                self.scheduler = TelegramScheduler(self.client)
             return True
         except Exception as e:
             logger.error(f"Error initializing Telegram client: {e}")
             return False
     
+    @staticmethod
+    def _replies_request(channel, thread_id, min_id=0, limit=100):
+        # С отметкой - самые старые ответы после нее (add_offset=-limit), чтобы
+        # отметка двигалась без пропусков, даже если новых ответов больше limit
+        return GetRepliesRequest(
+            peer=channel,
+            msg_id=thread_id,
+            offset_id=min_id + 1 if min_id else 0,
+            offset_date=None,
+            add_offset=-limit if min_id else 0,
+            limit=limit,
+            max_id=0,
+            min_id=min_id,
+            hash=0
+        )
+    
+    def _parse_replies(self, result):
+        replies = []
+        for reply in result.messages:
+            if not reply.message:
+                continue
+            
+            reply_text = reply.message
+            
+            # Basic filters for replies
+            if not self._is_russian(reply_text):
+                continue
+            
+            replies.append({
+                # id сообщения Telegram для стабильного source_id (убирается при сборке ответа)
+                'reply_id': reply.id,
+                'text': reply_text,
+                'author': reply.post_author or f'User_{reply.from_id.user_id if reply.from_id else "unknown"}',
+                'author_id': str(reply.from_id.user_id if reply.from_id else 0),
+                'published_date': reply.date,
+                'source': 'telegram_comment'
+            })
+        return replies
+    
     async def get_message_replies(self, channel, message):
         """Get replies (comments) for a specific message"""
-        replies = []
+        if not message.replies or message.replies.replies == 0:
+            return []
+        replies = await self.get_replies_batch(channel, {message.id: 0})
+        return replies.get(message.id, ([], 0))[0]
+    
+    async def get_replies_batch(self, channel, threads):
+        """
+        Ответы в нескольких ветках канала
+        GetRepliesRequest отправляются пакетами в одном контейнере MTProto
         
-        try:
-            if not message.replies or message.replies.replies == 0:
-                return []
-            
-            # Get replies for this message
-            result = await self.client(GetRepliesRequest(
+        Args:
+            threads: {id поста: min_id} - запрашиваются только ответы новее min_id
+        
+        Returns:
+            Словарь {id поста: ([ответы], наибольший id полученного ответа)};
+            с min_id ответы идут подряд после него, поэтому id годится как новая отметка
+        """
+        if not threads:
+            return {}
+        
+        thread_ids = list(threads)
+        results = await self.scheduler.request_batch([
+            self._replies_request(channel, thread_id, threads[thread_id]) for thread_id in thread_ids
+        ])
+        
+        replies = {}
+        for thread_id, result in zip(thread_ids, results):
+            if result is None:
+                logger.debug(f"Error getting replies for message {thread_id}")
+                continue
+            last_id = max([reply.id for reply in result.messages if reply.id > threads[thread_id]] + [threads[thread_id]])
+            replies[thread_id] = (self._parse_replies(result), last_id)
+            logger.debug(f"Found {len(replies[thread_id][0])} replies for message {thread_id}")
+        
+        return replies
+    
+    async def _get_history(self, channel, limit, min_id=0):
+        """
+        История канала новее min_id
+        
+        Без отметки (первый сбор) - последние limit сообщений. С отметкой -
+        страницы по limit от отметки вперед (старые сообщения первыми): если
+        за HISTORY_MAX_PAGES страниц история не кончилась, получен непрерывный
+        отрезок сразу после отметки и следующий цикл продолжит с его конца.
+        """
+        if not min_id:
+            result = await self.scheduler.request(GetHistoryRequest(
                 peer=channel,
-                msg_id=message.id,
                 offset_id=0,
                 offset_date=None,
                 add_offset=0,
-                limit=100,
+                limit=limit,
                 max_id=0,
                 min_id=0,
                 hash=0
             ))
+            return list(result.messages)
+        
+        messages = []
+        last_id = min_id
+        
+        for _ in range(HISTORY_MAX_PAGES):
+            # offset_id с add_offset=-limit - limit сообщений начиная с offset_id
+            result = await self.scheduler.request(GetHistoryRequest(
+                peer=channel,
+                offset_id=last_id + 1,
+                offset_date=None,
+                add_offset=-limit,
+                limit=limit,
+                max_id=0,
+                min_id=min_id,
+                hash=0
+            ))
+            page = sorted(
+                (message for message in result.messages if message.id > last_id),
+                key=lambda message: message.id
+            )
+            messages.extend(page)
             
-            for reply in result.messages:
-                if not reply.message:
-                    continue
-                
-                reply_text = reply.message
-                
-                # Basic filters for replies
-                if not self._is_russian(reply_text):
-                    continue
-                
-                replies.append({
-                    'text': reply_text,
-                    'author': reply.post_author or f'User_{reply.from_id.user_id if reply.from_id else "unknown"}',
-                    'author_id': str(reply.from_id.user_id if reply.from_id else 0),
-                    'published_date': reply.date,
-                    'source': 'telegram_comment'
-                })
-            
-            logger.debug(f"Found {len(replies)} replies for message {message.id}")
-            
-        except Exception as e:
-            logger.debug(f"Error getting replies for message {message.id}: {e}")
+            if len(result.messages) < limit or not page:
+                break
+            last_id = page[-1].id
         
-        return replies
+        return messages
+    
+    def _analyze_sentiment(self, data, text):
+        if self.sentiment_analyzer:
+            try:
+                sentiment = self.sentiment_analyzer.analyze(text)
+                data['sentiment_score'] = sentiment.get('sentiment_score', 0)
+                data['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
+            except Exception as e:
+                logger.debug(f"Error analyzing sentiment: {e}")
     
     async def get_channel_messages(self, channel_username, limit=200, collect_comments=False):
-        """Get messages from a channel with flood wait handling"""
+        """
+        Get messages from a channel
+        
+        Запрашиваются только сообщения и ответы новее отметок из
+        telegram_watermarks; новые отметки копятся в self.new_watermarks.
+        FloodWait не ожидается здесь: FloodDeferred/FloodWaitError уходят в
+        планировщик, который откладывает канал целиком.
+        """
         messages = []
         
         try:
-            # Get the channel entity with flood wait handling
             try:
                 channel = await self.client.get_entity(channel_username)
-            except FloodWaitError as e:
-                logger.warning(f"⏰ Flood wait для {channel_username}: нужно подождать {e.seconds} секунд")
-                if e.seconds < 300:  # Если меньше 5 минут - ждем
-                    logger.info(f"Ожидание {e.seconds} секунд...")
-                    await asyncio.sleep(e.seconds + 5)
-                    channel = await self.client.get_entity(channel_username)
-                else:
-                    logger.error(f"❌ Слишком долгое ожидание ({e.seconds}с), пропускаем канал")
-                    return messages
             except (ChannelPrivateError, UsernameNotOccupiedError) as e:
                 logger.warning(f"⚠️ Канал {channel_username} недоступен: {e}")
                 return messages
             
-            # Get messages from the last 30 days (увеличен период)
-            offset_date = datetime.now() - timedelta(days=30)
+            last_message_id, threads = self.watermarks.get(channel.id, (0, {}))
+            history = await self._get_history(channel, limit, min_id=last_message_id)
             
-            # Get channel history
-            result = await self.client(GetHistoryRequest(
-                peer=channel,
-                offset_id=0,
-                offset_date=offset_date,
-                add_offset=0,
-                limit=limit,
-                max_id=0,
-                min_id=0,
-                hash=0
-            ))
-            
-            for message in result.messages:
+            # Ветки, отслеживаемые с прошлых циклов: {id поста: (последний id ответа, дата поста)}
+            threads = dict(threads)
+            accepted = {}
+            for message in history:
                 if not message.message:
                     continue
                 
                 text = message.message
                 
                 # Apply filters
-                if not self._is_relevant_to_company(text):
-                    continue
-                if not self._is_nizhny_region(text):
-                    continue
-                if not self._is_russian(text):
+                if not self.text_filter.accepts(text):
                     continue
                 
                 msg_data = {
@@ -266,89 +303,107 @@ class TelegramUserCollector:
                     'is_comment': False
                 }
                 
-                # Анализ тональности если доступен
-                if self.sentiment_analyzer:
-                    try:
-                        sentiment = self.sentiment_analyzer.analyze(text)
-                        msg_data['sentiment_score'] = sentiment.get('sentiment_score', 0)
-                        msg_data['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
-                    except Exception as e:
-                        logger.debug(f"Error analyzing message sentiment: {e}")
-                
+                self._analyze_sentiment(msg_data, text)
+                accepted[message.id] = msg_data
                 messages.append(msg_data)
                 
-                # Collect comments/replies if requested
-                if collect_comments:
-                    replies = await self.get_message_replies(channel, message)
+                # Комментарии включены - ветка отслеживается и в следующих циклах
+                if message.replies is not None:
+                    threads[message.id] = (0, message.date)
+            
+            if collect_comments:
+                # Новые посты - если уже есть ответы; старые ветки - только ответы после отметки
+                reply_counts = {m.id: m.replies.replies for m in history if m.replies}
+                pending = {
+                    thread_id: last_reply_id
+                    for thread_id, (last_reply_id, _) in threads.items()
+                    if thread_id not in accepted or reply_counts.get(thread_id)
+                }
+                replies = await self.get_replies_batch(channel, pending)
+                
+                for thread_id, (thread_replies, last_reply_id) in replies.items():
+                    threads[thread_id] = (last_reply_id, threads[thread_id][1])
+                    parent = accepted.get(thread_id) or {
+                        'source_id': f"telegram_{channel.id}_{thread_id}",
+                        'url': f"https://t.me/{channel_username.replace('@', '')}/{thread_id}",
+                    }
                     
-                    for reply in replies:
-                        reply['parent_source_id'] = msg_data['source_id']
-                        reply['parent_url'] = msg_data['url']
-                        reply['source_id'] = f"{msg_data['source_id']}_reply_{hash(reply['text'])}"
-                        reply['url'] = msg_data['url']
+                    for reply in thread_replies:
+                        reply['parent_source_id'] = parent['source_id']
+                        reply['parent_url'] = parent['url']
+                        reply['source_id'] = reply_source_id(parent['source_id'], reply.pop('reply_id', None), reply['text'])
+                        reply['url'] = parent['url']
                         reply['is_comment'] = True
                         
                         # Анализ тональности для комментария
-                        if self.sentiment_analyzer:
-                            try:
-                                sentiment = self.sentiment_analyzer.analyze(reply['text'])
-                                reply['sentiment_score'] = sentiment.get('sentiment_score', 0)
-                                reply['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
-                            except Exception as e:
-                                logger.debug(f"Error analyzing reply sentiment: {e}")
-                        
+                        self._analyze_sentiment(reply, reply['text'])
                         messages.append(reply)
-                    
-                    if replies:
-                        await asyncio.sleep(1)  # Увеличено с 0.3 до 1 сек
-                
-            logger.info(f"Found {len(messages)} relevant items from {channel_username}")
             
+            self.new_watermarks[channel.id] = (
+                max([message.id for message in history] + [last_message_id]),
+                threads
+            )
+            
+            logger.info(
+                f"Found {len(messages)} relevant items from {channel_username} "
+                f"({len(history)} new messages after id {last_message_id})"
+            )
+            
+        except (FloodDeferred, FloodWaitError):
+            raise
         except Exception as e:
             logger.error(f"Error getting messages from {channel_username}: {e}")
         
         return messages
     
     async def search_in_channels(self, collect_comments=False):
-        """Search for keywords in configured channels"""
+        """
+        Search for keywords in configured channels
+        
+        Returns:
+            (сообщения, новые отметки синхронизации) - отметки сохраняются
+            вызывающим кодом только после записи сообщений в БД
+        """
         if not await self.init_client():
-            return []
+            return [], {}
         
         all_messages = []
         
         try:
-            for channel in self.channels:
-                if not channel.strip():
-                    continue
-                
-                logger.info(f"Searching Telegram channel: {channel}")
+            channels = [channel.strip() for channel in self.channels if channel.strip()]
+            logger.info(f"Searching Telegram channels: {', '.join(channels)}")
+            
+            # Отметки прошлых циклов: запрашиваются только новые сообщения и ответы
+            self.watermarks = {}
+            self.new_watermarks = {}
+            if Config.TELEGRAM_INCREMENTAL_SYNC:
                 try:
-                    messages = await self.get_channel_messages(channel, limit=100, collect_comments=collect_comments)
-                    all_messages.extend(messages)
-                except FloodWaitError as e:
-                    logger.error(f"❌ Flood wait для {channel}: {e.seconds} секунд. Пропускаем оставшиеся каналы.")
-                    break  # Прекращаем сбор, чтобы не усугублять
-                
-                # Увеличенная задержка между каналами (защита от FloodWait)
-                await asyncio.sleep(10)  # 10 секунд для безопасности
+                    self.watermarks = load_watermarks()
+                except Exception as e:
+                    logger.warning(f"[TELEGRAM] Отметки синхронизации недоступны, полный сбор: {e}")
+            
+            # Каналы параллельно; FloodWait откладывает только затронутый канал
+            all_messages = await self.scheduler.run(
+                channels,
+                lambda channel: self.get_channel_messages(channel, limit=100, collect_comments=collect_comments)
+            )
             
         except Exception as e:
             logger.error(f"Error searching Telegram channels: {e}")
-        finally:
-            if self.client:
-                await self.client.disconnect()
-            
-            # Удаляем временную сессию
-            try:
-                import glob
-                for f in glob.glob(f'{self.session_file}*'):
-                    os.remove(f)
-                    logger.debug(f"[TELEGRAM] Удалён временный файл: {f}")
-            except Exception as e:
-                logger.debug(f"[TELEGRAM] Ошибка удаления временных файлов: {e}")
         
         logger.info(f"Total items collected from Telegram: {len(all_messages)}")
-        return all_messages
+        return all_messages, self.new_watermarks
+    
+    def commit_watermarks(self):
+        """
+        Сохранить отметки последнего collect()
+        
+        Вызывается после того, как собранные сообщения записаны в БД: если
+        запись не удалась, следующий цикл запросит те же сообщения снова.
+        """
+        marks, self.pending_watermarks = self.pending_watermarks, {}
+        if Config.TELEGRAM_INCREMENTAL_SYNC and marks:
+            save_watermarks(marks)
     
     def collect(self, collect_comments=False, save_to_db=False):
         """
@@ -359,11 +414,15 @@ class TelegramUserCollector:
             save_to_db: Сохранять ли напрямую в БД через CommentHelper
         
         Returns:
-            Список сообщений
+            Список сообщений; отметки синхронизации ждут commit_watermarks()
+            (при save_to_db сохраняются здесь же после записи)
         """
         logger.info("[TELEGRAM] Запуск сбора...")
         
-        messages = asyncio.run(self.search_in_channels(collect_comments=collect_comments))
+        # В loop долгоживущего клиента: соединение остается открытым до следующего цикла
+        messages, self.pending_watermarks = self.client_manager.run(
+            self.search_in_channels(collect_comments=collect_comments)
+        )
         
         # Если нужно сохранять в БД с правильной привязкой комментариев
         if save_to_db and messages:
@@ -405,6 +464,7 @@ class TelegramUserCollector:
                         comment_count += len(saved_comments)
                 
                 logger.info(f"[TELEGRAM] ✓ Сохранено постов: {saved_count}, комментариев: {comment_count}")
+                self.commit_watermarks()
                 
             except Exception as e:
                 logger.error(f"[TELEGRAM] Ошибка при сохранении: {e}")
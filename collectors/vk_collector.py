@@ -2,7 +2,8 @@ import vk_api
 from datetime import datetime, timedelta
 from config import Config
 from utils.language_detector import LanguageDetector
-import time
+from utils.text_filter import TextFilter, COMPANY_PATTERNS, COMPETITOR_EXCLUDES
+from collectors.vk_fetch import VKFetchEngine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +14,11 @@ class VKCollector:
         self.keywords = Config.COMPANY_KEYWORDS
         self.max_comments = Config.MAX_COMMENTS_PER_REQUEST
         self.language_detector = LanguageDetector()
+        self.text_filter = TextFilter(
+            include=COMPANY_PATTERNS,
+            exclude=COMPETITOR_EXCLUDES,
+            language_detector=self.language_detector
+        )
         self.sentiment_analyzer = sentiment_analyzer
         self.proxies = self._setup_proxy()
         
@@ -31,11 +37,15 @@ class VKCollector:
                     self.vk_session = vk_api.VkApi(**session_params)
                 
                 self.vk = self.vk_session.get_api()
+                # Пакетные вызовы через execute и общий лимит частоты
+                self.fetch = VKFetchEngine(self.vk_session)
             except Exception as e:
                 logger.error(f"Error initializing VK API: {e}")
                 self.vk = None
+                self.fetch = None
         else:
             self.vk = None
+            self.fetch = None
             logger.warning("VK_ACCESS_TOKEN not configured")
     
     def _setup_proxy(self):
@@ -73,39 +83,50 @@ class VKCollector:
         return proxies if proxies else None
     
     def _is_russian(self, text):
-        if not Config.LANGUAGE_FILTER_ENABLED:
-            return True
-        return self.language_detector.is_russian(text)
+        return self.text_filter.is_russian(text)
     
     def _is_nizhny_region(self, text, geo_data=None):
-        if not Config.GEO_FILTER_ENABLED:
-            return True
-        
-        text_lower = text.lower()
-        return any(keyword.lower() in text_lower for keyword in Config.GEO_KEYWORDS)
+        return self.text_filter.is_nizhny_region(text)
     
     def _is_relevant_to_company(self, text):
-        text_lower = text.lower()
-        
-        exclude_patterns = [
-            'газпром', 'т плюс', 'т-плюс', 'росатом', 'энергосбыт плюс',
-            'энергосбыт луганск', 'энергосбыт волга', 'энергосбыт тюмень',
-            'тнс тула', 'тнс великий новгород', 'тнс ярославль',
-            'вакансия', 'вакансии', 'требуется'
-        ]
-        
-        if any(exclude in text_lower for exclude in exclude_patterns):
-            return False
+        return self.text_filter.is_relevant(text)
+    
+    def _analyze_sentiment(self, data, text):
+        """Анализ тональности в словарь записи"""
+        if self.sentiment_analyzer:
+            try:
+                sentiment = self.sentiment_analyzer.analyze(text)
+                data['sentiment_score'] = sentiment.get('sentiment_score', 0)
+                data['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
+            except Exception as e:
+                logger.debug(f"Error analyzing sentiment: {e}")
+    
+    def _parse_search_results(self, results):
+        """Посты из ответа newsfeed.search, прошедшие фильтр компании, региона и языка"""
+        posts = []
+        items = results.get('items', [])
+        accepted = self.text_filter.accepts_batch(item.get('text', '') for item in items)
         
-        main_patterns = [
-            'тнс энерго нн',
-            'тнс энерго нижний',
-            'тнс энерго нижегородск',
-            'тнс нн',
-            'тнс нижний новгород'
-        ]
+        for item, is_accepted in zip(items, accepted):
+            text = item.get('text', '')
+            
+            if not is_accepted:
+                continue
+            
+            post = {
+                'source_id': f"vk_post_{item['owner_id']}_{item['id']}",
+                'author': self._get_author_name(item, results),
+                'author_id': str(item.get('owner_id', '')),
+                'text': text,
+                'url': f"https://vk.com/wall{item['owner_id']}_{item['id']}",
+                'published_date': datetime.fromtimestamp(item.get('date', 0)),
+                'source': 'vk'
+            }
+            
+            self._analyze_sentiment(post, text)
+            posts.append(post)
         
-        return any(pattern in text_lower for pattern in main_patterns)
+        return posts
     
     def search_posts(self, query, count=100):
         if not self.vk:
@@ -113,66 +134,37 @@ class VKCollector:
             return []
         
         try:
-            results = self.vk.newsfeed.search(
-                q=query,
-                count=min(count, 200),
-                extended=1
-            )
-            
-            posts = []
-            for item in results.get('items', []):
-                text = item.get('text', '')
-                
-                if not self._is_relevant_to_company(text):
-                    continue
-                
-                if not self._is_nizhny_region(text) or not self._is_russian(text):
-                    continue
-                
-                post = {
-                    'source_id': f"vk_post_{item['owner_id']}_{item['id']}",
-                    'author': self._get_author_name(item, results),
-                    'author_id': str(item.get('owner_id', '')),
-                    'text': text,
-                    'url': f"https://vk.com/wall{item['owner_id']}_{item['id']}",
-                    'published_date': datetime.fromtimestamp(item.get('date', 0)),
-                    'source': 'vk'
-                }
-                
-                # Анализ тональности
-                if self.sentiment_analyzer:
-                    try:
-                        sentiment = self.sentiment_analyzer.analyze(text)
-                        post['sentiment_score'] = sentiment.get('sentiment_score', 0)
-                        post['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
-                    except Exception as e:
-                        logger.debug(f"Error analyzing sentiment: {e}")
-                
-                posts.append(post)
-            
-            return posts
+            results = self.fetch.call('newsfeed.search', q=query, count=min(count, 200), extended=1)
+            return self._parse_search_results(results)
         except Exception as e:
             logger.error(f"Error searching VK posts: {e}")
             return []
     
-    def get_wall_comments(self, owner_id, post_id, count=100):
+    def search_posts_batch(self, queries, count=100):
         """
-        Собирает ВСЕ комментарии под постом про ТНС
-        Не фильтрует по содержанию - собирает все комментарии, даже не связанные с ТНС
+        Поиск по нескольким запросам одним execute
+        
+        Returns:
+            Список списков постов в порядке queries
         """
         if not self.vk:
-            return []
+            logger.warning("VK API not initialized")
+            return [[] for _ in queries]
         
-        try:
-            comments = self.vk.wall.getComments(
-                owner_id=owner_id,
-                post_id=post_id,
-                count=min(count, 100),
-                extended=1,
-                need_likes=1
-            )
-            
-            result = []
+        responses = self.fetch.batch('newsfeed.search', [
+            {'q': query, 'count': min(count, 200), 'extended': 1}
+            for query in queries
+        ])
+        
+        return [self._parse_search_results(results) if results else [] for results in responses]
+    
+    def _parse_comments(self, owner_id, post_id, pages):
+        """
+        Собирает ВСЕ комментарии под постом про ТНС из страниц wall.getComments
+        Не фильтрует по содержанию - собирает все комментарии, даже не связанные с ТНС
+        """
+        result = []
+        for comments in pages:
             for comment in comments.get('items', []):
                 text = comment.get('text', '')
                 # Собираем ВСЕ комментарии с текстом, независимо от содержания
@@ -187,63 +179,109 @@ class VKCollector:
                         'source': 'vk'
                     }
                     
-                    # Анализ тональности
-                    if self.sentiment_analyzer:
-                        try:
-                            sentiment = self.sentiment_analyzer.analyze(text)
-                            comment_data['sentiment_score'] = sentiment.get('sentiment_score', 0)
-                            comment_data['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
-                        except Exception as e:
-                            logger.debug(f"Error analyzing comment sentiment: {e}")
-                    
+                    self._analyze_sentiment(comment_data, text)
                     result.append(comment_data)
-            
-            return result
+        
+        return result
+    
+    def get_wall_comments(self, owner_id, post_id, count=100):
+        """
+        Собирает комментарии под постом (до count, страницами по 100)
+        Не фильтрует по содержанию - собирает все комментарии, даже не связанные с ТНС
+        """
+        if not self.vk:
+            return []
+        
+        try:
+            pages = self.fetch.wall_comments([(owner_id, post_id)], max_comments=count)
+            return self._parse_comments(owner_id, post_id, pages[(owner_id, post_id)])
         except Exception as e:
             logger.error(f"Error getting VK comments: {e}")
             return []
     
+    def collect_comments_for_posts(self, posts):
+        """
+        Комментарии ко всем постам: по 25 wall.getComments в одном execute,
+        посты с большим числом комментариев догружаются по offset
+        
+        Args:
+            posts: Посты от search_posts/monitor_groups
+        
+        Returns:
+            Список комментариев с is_comment и parent_source_id
+        """
+        if not self.vk or not posts:
+            return []
+        
+        # Формат source_id: vk_post_{owner_id}_{post_id}
+        targets = {}
+        for post in posts:
+            source_id = post.get('source_id', '')
+            if 'vk_post_' not in source_id:
+                continue
+            parts = source_id.replace('vk_post_', '').split('_')
+            if len(parts) >= 2:
+                try:
+                    targets[(int(parts[0]), int(parts[1]))] = source_id
+                except ValueError:
+                    continue
+        
+        try:
+            pages = self.fetch.wall_comments(list(targets))
+        except Exception as e:
+            logger.error(f"Error collecting comments for posts: {e}")
+            return []
+        
+        all_comments = []
+        for (owner_id, post_id), source_id in targets.items():
+            comments = self._parse_comments(owner_id, post_id, pages.get((owner_id, post_id), []))
+            if comments:
+                logger.info(f"Found {len(comments)} comments for post {post_id}")
+                # Помечаем комментарии
+                for comment in comments:
+                    comment['is_comment'] = True
+                    comment['parent_source_id'] = source_id
+                all_comments.extend(comments)
+        
+        return all_comments
+    
     def monitor_groups(self, group_ids):
         all_posts = []
         
-        for group_id in group_ids:
-            if not group_id.strip():
+        group_ids = [group_id.strip() for group_id in group_ids if group_id.strip()]
+        if not self.vk or not group_ids:
+            return all_posts
+        
+        # Стены всех групп - пакетами по 25 в execute
+        walls = self.fetch.batch('wall.get', [
+            {'owner_id': f"-{group_id}" if not group_id.startswith('-') else group_id, 'count': 100}
+            for group_id in group_ids
+        ])
+        
+        for group_id, posts in zip(group_ids, walls):
+            if posts is None:
+                logger.error(f"Error monitoring group {group_id}")
                 continue
             
-            try:
-                posts = self.vk.wall.get(
-                    owner_id=f"-{group_id}" if not group_id.startswith('-') else group_id,
-                    count=100
-                )
+            items = posts.get('items', [])
+            accepted = self.text_filter.accepts_batch(post.get('text', '') for post in items)
+            
+            for post, is_accepted in zip(items, accepted):
+                text = post.get('text', '')
                 
-                for post in posts.get('items', []):
-                    text = post.get('text', '')
+                if is_accepted:
+                    post_data = {
+                        'source_id': f"vk_post_{post['owner_id']}_{post['id']}",
+                        'author': f"Group {group_id}",
+                        'author_id': str(post.get('owner_id', '')),
+                        'text': text,
+                        'url': f"https://vk.com/wall{post['owner_id']}_{post['id']}",
+                        'published_date': datetime.fromtimestamp(post.get('date', 0)),
+                        'source': 'vk'
+                    }
                     
-                    if self._is_relevant_to_company(text) and self._is_nizhny_region(text) and self._is_russian(text):
-                        post_data = {
-                            'source_id': f"vk_post_{post['owner_id']}_{post['id']}",
-                            'author': f"Group {group_id}",
-                            'author_id': str(post.get('owner_id', '')),
-                            'text': text,
-                            'url': f"https://vk.com/wall{post['owner_id']}_{post['id']}",
-                            'published_date': datetime.fromtimestamp(post.get('date', 0)),
-                            'source': 'vk'
-                        }
-                        
-                        # Анализ тональности
-                        if self.sentiment_analyzer:
-                            try:
-                                sentiment = self.sentiment_analyzer.analyze(text)
-                                post_data['sentiment_score'] = sentiment.get('sentiment_score', 0)
-                                post_data['sentiment_label'] = sentiment.get('sentiment_label', 'neutral')
-                            except Exception as e:
-                                logger.debug(f"Error analyzing post sentiment: {e}")
-                        
-                        all_posts.append(post_data)
-                
-                time.sleep(0.5)
-            except Exception as e:
-                logger.error(f"Error monitoring group {group_id}: {e}")
+                    self._analyze_sentiment(post_data, text)
+                    all_posts.append(post_data)
         
         return all_posts
     
@@ -251,6 +289,9 @@ class VKCollector:
         """
         Собирает посты и комментарии из VK
         
+        Поиск, стены групп и комментарии запрашиваются пакетами через execute;
+        паузы между запросами задает общий token bucket (VK_REQUESTS_PER_SECOND).
+        
         Args:
             collect_comments: если True, собирает комментарии к найденным постам
         """
@@ -262,70 +303,22 @@ class VKCollector:
             'энергосбыт Нижний Новгород'
         ]
         
-        for query in search_queries:
-            logger.info(f"Searching VK for: {query}")
-            posts = self.search_posts(query, count=self.max_comments)
-            all_reviews.extend(posts)
-            
-            # Собираем комментарии к найденным постам
-            if collect_comments and posts:
-                logger.info(f"Collecting comments for {len(posts)} posts...")
-                for post in posts:
-                    try:
-                        # Извлекаем owner_id и post_id из source_id
-                        # Формат: vk_post_{owner_id}_{post_id}
-                        source_id = post.get('source_id', '')
-                        if 'vk_post_' in source_id:
-                            parts = source_id.replace('vk_post_', '').split('_')
-                            if len(parts) >= 2:
-                                owner_id = int(parts[0])
-                                post_id = int(parts[1])
-                                
-                                comments = self.get_wall_comments(owner_id, post_id, count=100)
-                                if comments:
-                                    logger.info(f"Found {len(comments)} comments for post {post_id}")
-                                    # Помечаем комментарии
-                                    for comment in comments:
-                                        comment['is_comment'] = True
-                                        comment['parent_source_id'] = source_id
-                                    all_reviews.extend(comments)
-                                
-                                time.sleep(0.5)  # Пауза между запросами
-                    except Exception as e:
-                        logger.error(f"Error collecting comments for post: {e}")
-                        continue
-            
-            time.sleep(1)
+        logger.info(f"Searching VK for: {', '.join(search_queries)}")
+        found_posts = []
+        for query, posts in zip(search_queries, self.search_posts_batch(search_queries, count=self.max_comments)):
+            logger.info(f"VK search '{query}': {len(posts)} posts")
+            found_posts.extend(posts)
         
         if Config.VK_GROUP_IDS:
             logger.info(f"Monitoring VK groups: {Config.VK_GROUP_IDS}")
-            group_posts = self.monitor_groups(Config.VK_GROUP_IDS)
-            all_reviews.extend(group_posts)
-            
-            # Собираем комментарии к постам из групп
-            if collect_comments and group_posts:
-                logger.info(f"Collecting comments for {len(group_posts)} group posts...")
-                for post in group_posts:
-                    try:
-                        source_id = post.get('source_id', '')
-                        if 'vk_post_' in source_id:
-                            parts = source_id.replace('vk_post_', '').split('_')
-                            if len(parts) >= 2:
-                                owner_id = int(parts[0])
-                                post_id = int(parts[1])
-                                
-                                comments = self.get_wall_comments(owner_id, post_id, count=100)
-                                if comments:
-                                    logger.info(f"Found {len(comments)} comments for group post {post_id}")
-                                    for comment in comments:
-                                        comment['is_comment'] = True
-                                        comment['parent_source_id'] = source_id
-                                    all_reviews.extend(comments)
-                                
-                                time.sleep(0.5)
-                    except Exception as e:
-                        logger.error(f"Error collecting comments for group post: {e}")
-                        continue
+            found_posts.extend(self.monitor_groups(Config.VK_GROUP_IDS))
+        
+        all_reviews.extend(found_posts)
+        
+        # Собираем комментарии к найденным постам
+        if collect_comments and found_posts:
+            logger.info(f"Collecting comments for {len(found_posts)} posts...")
+            all_reviews.extend(self.collect_comments_for_posts(found_posts))
         
         logger.info(f"Collected {len(all_reviews)} reviews from VK (posts + comments)")
         return all_reviews
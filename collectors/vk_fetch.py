@@ -0,0 +1,162 @@
+"""
+Пакетные запросы к VK API через execute
+До 25 вызовов API в одном HTTP-запросе, частота ограничивается token bucket
+"""
+import json
+import logging
+import time
+
+import vk_api
+
+from config import Config
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Ограничение VK: не больше 25 обращений к API внутри одного execute
+EXECUTE_LIMIT = 25
+
+# Коды ошибок VK, после которых запрос стоит повторить позже
+RATE_LIMIT_ERRORS = {
+    6,   # Too many requests per second
+    9,   # Flood control
+}
+
+# Комментариев за один wall.getComments
+COMMENTS_PAGE_SIZE = 100
+
+
+class VKFetchEngine:
+    """
+    Вызовы VK API с ограничением частоты и упаковкой в execute
+
+    Каждый HTTP-запрос (одиночный или execute на 25 вызовов) забирает токен
+    из общего ведра: VK разрешает 3 запроса в секунду для пользовательского
+    токена. При ошибке "слишком много запросов" ведро приостанавливается и
+    запрос повторяется.
+
+    Args:
+        vk_session: vk_api.VkApi
+        requests_per_second: Частота запросов (по умолчанию Config.VK_REQUESTS_PER_SECOND)
+        max_retries: Повторов при ошибках ограничения частоты
+    """
+
+    def __init__(self, vk_session, requests_per_second=None, max_retries=3):
+        self.vk_session = vk_session
+        self.bucket = TokenBucket(requests_per_second or Config.VK_REQUESTS_PER_SECOND)
+        self.max_retries = max_retries
+        self.stats = {'requests': 0, 'calls': 0, 'failed_calls': 0, 'wait_s': 0.0}
+
+        # Частоту задает ведро, встроенная пауза vk_api между запросами не нужна
+        self.vk_session.RPS_DELAY = 0
+
+    def _request(self, method, params):
+        for attempt in range(self.max_retries + 1):
+            self.stats['wait_s'] += self.bucket.acquire()
+            self.stats['requests'] += 1
+            try:
+                return self.vk_session.method(method, params)
+            except vk_api.ApiError as e:
+                if e.code not in RATE_LIMIT_ERRORS or attempt == self.max_retries:
+                    raise
+                logger.warning(f"[VK] {method}: ограничение частоты (код {e.code}), повтор через 1 с")
+                self.bucket.pause(1.0)
+
+    def call(self, method, **params):
+        """Один вызов API"""
+        self.stats['calls'] += 1
+        return self._request(method, params)
+
+    @staticmethod
+    def _execute_code(method, params_list):
+        calls = ','.join(f'API.{method}({json.dumps(params, ensure_ascii=False)})' for params in params_list)
+        return f'return [{calls}];'
+
+    def batch(self, method, params_list):
+        """
+        Один метод с разными параметрами, по 25 вызовов в execute
+
+        Args:
+            method: Метод API, например 'wall.getComments'
+            params_list: Список словарей параметров
+
+        Returns:
+            Список ответов в порядке params_list (None для неудавшихся вызовов)
+        """
+        params_list = list(params_list)
+        results = []
+
+        for i in range(0, len(params_list), EXECUTE_LIMIT):
+            chunk = params_list[i:i + EXECUTE_LIMIT]
+            self.stats['calls'] += len(chunk)
+
+            try:
+                if len(chunk) == 1:
+                    responses = [self._request(method, chunk[0])]
+                else:
+                    responses = self._request('execute', {'code': self._execute_code(method, chunk)})
+            except Exception as e:
+                logger.error(f"[VK] {method}: пакет из {len(chunk)} вызовов не выполнен: {e}")
+                responses = [None] * len(chunk)
+
+            # Внутри execute неудавшийся вызов возвращает false
+            responses = list(responses or [])
+            responses += [None] * (len(chunk) - len(responses))
+            for response in responses:
+                if not response:
+                    self.stats['failed_calls'] += 1
+                results.append(response or None)
+
+        return results
+
+    def wall_comments(self, posts, max_comments=None):
+        """
+        Комментарии к нескольким постам с постраничной догрузкой по offset
+
+        Первые страницы всех постов запрашиваются пакетами; для постов, где
+        комментариев больше 100, следующие страницы добираются такими же пакетами.
+
+        Args:
+            posts: Список (owner_id, post_id)
+            max_comments: Предел комментариев на пост (по умолчанию Config.VK_MAX_COMMENTS_PER_POST)
+
+        Returns:
+            Словарь {(owner_id, post_id): [ответы wall.getComments по страницам]}
+        """
+        max_comments = max_comments or Config.VK_MAX_COMMENTS_PER_POST
+        pages = {post: [] for post in posts}
+        pending = [(post, 0) for post in pages]
+
+        started = time.perf_counter()
+        requests_before = self.stats['requests']
+        while pending:
+            responses = self.batch('wall.getComments', [
+                {
+                    'owner_id': owner_id,
+                    'post_id': post_id,
+                    'count': COMMENTS_PAGE_SIZE,
+                    'offset': offset,
+                    'extended': 1,
+                    'need_likes': 1
+                }
+                for (owner_id, post_id), offset in pending
+            ])
+
+            next_pending = []
+            for (post, offset), response in zip(pending, responses):
+                if response is None:
+                    continue
+                pages[post].append(response)
+
+                # Страницы - по комментариям верхнего уровня (ответы в ветках в count тоже входят)
+                total = response.get('current_level_count', response.get('count', 0))
+                next_offset = offset + COMMENTS_PAGE_SIZE
+                if response.get('items') and next_offset < min(total, max_comments):
+                    next_pending.append((post, next_offset))
+            pending = next_pending
+
+        logger.info(
+            f"[VK] Комментарии {len(pages)} постов: {self.stats['requests'] - requests_before} HTTP-запросов, "
+            f"ожидание лимита {self.stats['wait_s']:.1f} с, всего {time.perf_counter() - started:.1f} с"
+        )
+        return pages
@@ -1,11 +1,11 @@
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 from config import Config
 from utils.language_detector import LanguageDetector
+from utils.text_filter import TextFilter, COMPANY_PATTERNS, COMPETITOR_EXCLUDES
 from utils.proxy_manager import ProxyManager
+from utils.http_fetch import FetchEngine
 import logging
-import time
 from urllib.parse import urljoin, urlparse
 
 logger = logging.getLogger(__name__)
@@ -15,6 +15,11 @@ class WebCollector:
         self.keywords = Config.COMPANY_KEYWORDS
         self.news_sites = Config.NEWS_SITES
         self.language_detector = LanguageDetector()
+        self.text_filter = TextFilter(
+            include=COMPANY_PATTERNS,
+            exclude=COMPETITOR_EXCLUDES,
+            language_detector=self.language_detector
+        )
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
@@ -29,6 +34,9 @@ class WebCollector:
             self.current_proxy = self._setup_static_proxy()
         else:
             logger.info("Free proxy mode enabled. Proxies will be fetched automatically.")
+        
+        # Пул соединений, лимит на хост, повторы с джиттером
+        self.http = FetchEngine(headers=self.headers, timeout=10)
     
     def _setup_static_proxy(self):
         """Setup static proxy configuration from .env"""
@@ -75,77 +83,39 @@ class WebCollector:
             return None
         return self.current_proxy
     
+    def _on_proxy_error(self, proxy):
+        # Если используем бесплатные прокси и запрос провалился, удаляем прокси
+        if self.use_free_proxies and self.proxy_manager:
+            self.proxy_manager.remove_proxy(proxy)
+    
+    def _prepare(self, response):
+        response.raise_for_status()
+        response.encoding = response.apparent_encoding
+        return response
+    
     def _request_with_retry(self, url, max_retries=3):
         """Make request with retry logic and proxy rotation"""
-        last_exception = None
-        
-        for attempt in range(max_retries):
-            try:
-                proxy = self._get_proxy()
-                
-                logger.debug(f"Attempt {attempt + 1}/{max_retries} for {url}")
-                response = requests.get(
-                    url, 
-                    headers=self.headers, 
-                    proxies=proxy, 
-                    timeout=10
-                )
-                response.raise_for_status()
-                response.encoding = response.apparent_encoding
-                return response
-                
-            except Exception as e:
-                last_exception = e
-                logger.warning(f"Request failed (attempt {attempt + 1}/{max_retries}): {e}")
-                
-                # Если используем бесплатные прокси и запрос провалился, удаляем прокси
-                if self.use_free_proxies and proxy and self.proxy_manager:
-                    self.proxy_manager.remove_proxy(proxy)
-                
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
-        
-        raise last_exception
+        response = self.http.get(
+            url,
+            proxies=self._get_proxy,
+            on_proxy_error=self._on_proxy_error,
+            max_retries=max_retries - 1
+        )
+        return self._prepare(response)
     
     def _is_russian(self, text):
-        if not Config.LANGUAGE_FILTER_ENABLED:
-            return True
-        return self.language_detector.is_russian(text)
+        return self.text_filter.is_russian(text)
     
     def _is_nizhny_region(self, text):
-        if not Config.GEO_FILTER_ENABLED:
-            return True
-        
-        text_lower = text.lower()
-        return any(keyword.lower() in text_lower for keyword in Config.GEO_KEYWORDS)
+        return self.text_filter.is_nizhny_region(text)
     
     def _is_relevant_to_company(self, text):
-        text_lower = text.lower()
-        
-        exclude_patterns = [
-            'газпром', 'т плюс', 'т-плюс', 'росатом', 'энергосбыт плюс',
-            'энергосбыт луганск', 'энергосбыт волга', 'энергосбыт тюмень',
-            'тнс тула', 'тнс великий новгород', 'тнс ярославль',
-            'вакансия', 'вакансии', 'требуется'
-        ]
-        
-        if any(exclude in text_lower for exclude in exclude_patterns):
-            return False
-        
-        main_patterns = [
-            'тнс энерго нн',
-            'тнс энерго нижний',
-            'тнс энерго нижегородск',
-            'тнс нн',
-            'тнс нижний новгород'
-        ]
-        
-        return any(pattern in text_lower for pattern in main_patterns)
+        return self.text_filter.is_relevant(text)
     
-    def scrape_page(self, url):
-        """Scrape a single page for mentions"""
+    def scrape_page(self, url, response=None):
+        """Scrape a single page for mentions (response - уже загруженная страница)"""
         try:
-            response = self._request_with_retry(url)
+            response = self._prepare(response) if response is not None else self._request_with_retry(url)
             
             soup = BeautifulSoup(response.text, 'html.parser')
             
@@ -154,7 +124,7 @@ class WebCollector:
             for tag in soup.find_all(['article', 'div'], class_=lambda x: x and ('news' in x.lower() or 'article' in x.lower() or 'post' in x.lower())):
                 text_content = tag.get_text(separator=' ', strip=True)
                 
-                if self._is_relevant_to_company(text_content) and self._is_nizhny_region(text_content) and self._is_russian(text_content):
+                if self.text_filter.accepts(text_content):
                     title = tag.find(['h1', 'h2', 'h3', 'h4'])
                     title_text = title.get_text(strip=True) if title else ''
                     
@@ -184,7 +154,7 @@ class WebCollector:
             
             if not articles:
                 full_text = soup.get_text(separator=' ', strip=True)
-                if self._is_relevant_to_company(full_text) and self._is_nizhny_region(full_text) and self._is_russian(full_text):
+                if self.text_filter.accepts(full_text):
                     title = soup.find('title')
                     title_text = title.get_text(strip=True) if title else 'No title'
                     
@@ -222,7 +192,8 @@ class WebCollector:
                     snippet = snippet_tag.get_text(strip=True) if snippet_tag else ''
                     
                     full_text = f"{title}\n\n{snippet}"
-                    if self._is_nizhny_region(full_text) and self._is_russian(full_text):
+                    checked = self.text_filter.check(full_text)
+                    if checked.geo and checked.russian:
                         articles.append({
                             'source_id': f"web_{hash(url)}",
                             'author': 'Yandex News',
@@ -239,22 +210,24 @@ class WebCollector:
     
     def collect(self):
         all_articles = []
-        
-        for site in self.news_sites:
-            if not site.strip():
+        self.http.start_cycle()
+        
+        # Все сайты параллельно; паузы между запросами к одному хосту задает движок
+        sites = [site.strip() for site in self.news_sites if site.strip()]
+        logger.info(f"Scraping websites: {', '.join(sites)}")
+        pages = self.http.get_many(sites, proxies=self._get_proxy, on_proxy_error=self._on_proxy_error)
+        for site, response in zip(sites, pages):
+            if response is None:
+                logger.error(f"Error scraping {site}: request failed")
                 continue
-            
-            logger.info(f"Scraping website: {site}")
-            articles = self.scrape_page(site)
-            all_articles.extend(articles)
-            time.sleep(2)
+            all_articles.extend(self.scrape_page(site, response))
         
         search_queries = ['ТНС энерго Нижний Новгород', 'энергосбыт Нижний Новгород']
         for query in search_queries:
             logger.info(f"Searching Yandex News for: {query}")
             news_articles = self.search_yandex_news(query)
             all_articles.extend(news_articles)
-            time.sleep(2)
         
+        self.http.log_stats("[WEB]")
         logger.info(f"Collected {len(all_articles)} articles from web")
         return all_articles
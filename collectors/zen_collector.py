@@ -5,8 +5,10 @@ import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 from config import Config
+from utils.text_filter import TextFilter, KEYWORD_EXCLUDES
+from utils.http_fetch import FetchEngine
+from utils.comment_extractor import extract_comments
 import logging
-import time
 import random
 import re
 
@@ -17,6 +19,11 @@ class ZenCollector:
     
     def __init__(self):
         self.keywords = Config.COMPANY_KEYWORDS
+        self.text_filter = TextFilter(
+            include=lambda: self.keywords,
+            exclude=KEYWORD_EXCLUDES,
+            match_all_if_no_include=True
+        )
         # Полные заголовки для обхода блокировки Яндекса
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
@@ -36,42 +43,18 @@ class ZenCollector:
         # Список бесплатных прокси (будем обновлять динамически)
         self.proxies_list = []
         
-        # Сессия для сохранения cookies
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # Пул соединений с лимитом на хост; сессия движка хранит cookies
+        self.http = FetchEngine(headers=self.headers, timeout=20)
+        self.session = self.http.session
     
     def _is_relevant(self, text):
         """Проверка релевантности текста"""
-        if not text:
-            return False
-        
-        text_lower = text.lower()
-        
-        # Исключения
-        exclude_patterns = [
-            'газпром', 'т плюс', 'т-плюс',
-            'тнс тула', 'тнс ярославль',
-            'вакансия', 'требуется'
-        ]
-        
-        for exclude in exclude_patterns:
-            if exclude in text_lower:
-                return False
-        
-        # Ключевые слова
-        if not self.keywords:
-            return True
-        
-        for keyword in self.keywords:
-            if keyword.lower() in text_lower:
-                return True
-        
-        return False
+        return self.text_filter.is_relevant(text)
     
     def _get_free_proxies(self):
         """Получение списка бесплатных прокси"""
         try:
-            response = requests.get(
+            response = self.http.get(
                 'https://api.proxyscrape.com/v2/?request=get&protocol=http&timeout=5000&country=all&ssl=all&anonymity=all',
                 timeout=10
             )
@@ -104,17 +87,17 @@ class ZenCollector:
         
         # Сначала пробуем через сессию (сохраняет cookies)
         try:
-            response = self.session.get(url, timeout=20, allow_redirects=True, proxies=proxies)
+            response = self.http.get(url, proxies=proxies, max_retries=0)
             
             # Проверяем не капча ли это
             if 'showcaptcha' in response.url or 'captcha' in response.text.lower():
                 logger.warning("[ZEN] Яндекс показал капчу")
                 if use_tor:
                     logger.info("[ZEN] Пробуем получить новый IP через Tor...")
-                    time.sleep(5)
                 else:
                     logger.warning("[ZEN] Рекомендуется включить Tor (USE_TOR=True в .env)")
-                    time.sleep(3)
+                # Следующие запросы к хосту - не раньше чем через паузу, остальные хосты не ждут
+                self.http.pause_host(url, 5 if use_tor else 3)
             elif response.status_code == 200:
                 return response
         except Exception as e:
@@ -129,28 +112,21 @@ class ZenCollector:
             if self.proxies_list:
                 proxy = random.choice(self.proxies_list)
                 try:
-                    response = self.session.get(
-                        url,
-                        proxies={'http': proxy, 'https': proxy},
-                        timeout=20,
-                        allow_redirects=True
-                    )
+                    response = self.http.get(url, proxies={'http': proxy, 'https': proxy}, max_retries=0)
                     if response.status_code == 200 and 'captcha' not in response.url:
                         return response
                 except:
                     self.proxies_list.remove(proxy)
-            time.sleep(1)
         
         # Последняя попытка без прокси
-        return self.session.get(url, timeout=20, allow_redirects=True)
+        return self.http.get(url)
     
     def _warm_up_session(self):
         """Прогрев сессии - получение cookies от Яндекса"""
         try:
             # Сначала заходим на главную Яндекса
             logger.debug("[ZEN] Прогрев сессии - заход на главную Яндекса")
-            self.session.get('https://yandex.ru/', timeout=10)
-            time.sleep(1)
+            self.http.get('https://yandex.ru/', timeout=10, max_retries=0)
             return True
         except:
             return False
@@ -305,58 +281,27 @@ class ZenCollector:
         
         return articles
     
-    def parse_dzen_comments(self, article_url):
-        """Parse comments from Dzen article"""
+    def parse_dzen_comments(self, article_url, response=None):
+        """Parse comments from Dzen article (response - уже загруженная страница)"""
         comments = []
         
         try:
             logger.info(f"[ZEN] Parsing comments from: {article_url}")
             
-            response = self._make_request(article_url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if response is None:
+                response = self._make_request(article_url)
             
             # Яндекс.Дзен использует React и динамическую загрузку
-            # Комментарии часто загружаются через API или находятся в data-атрибутах
-            
-            # Попытка найти комментарии по селекторам
-            comment_selectors = [
-                {'class': 'comment'},
-                {'class': 'comments-item'},
-                {'data-testid': 'comment'},
-                {'class': 'mg-comment'},
-            ]
-            
-            for selector in comment_selectors:
-                comment_elements = soup.find_all(['div', 'li', 'article'], selector)
-                
-                if comment_elements:
-                    for elem in comment_elements[:30]:  # Limit comments
-                        try:
-                            comment_text = elem.get_text(strip=True)
-                            
-                            if not comment_text or len(comment_text) < 10:
-                                continue
-                            
-                            # Extract author
-                            author_elem = elem.find(['span', 'a', 'div'], class_=lambda x: x and 'author' in x.lower())
-                            author = author_elem.get_text(strip=True) if author_elem else 'Аноним'
-                            
-                            comment = {
-                                'text': comment_text,
-                                'author': author,
-                                'published_date': datetime.now(),
-                                'source': 'zen_comment',
-                                'url': article_url
-                            }
-                            
-                            comments.append(comment)
-                            
-                        except Exception as e:
-                            logger.debug(f"[ZEN] Error parsing comment: {e}")
-                            continue
-                    
-                    if comments:
-                        break
+            # Комментарии часто загружаются через API или находятся в data-атрибутах,
+            # поэтому страница без разметки комментариев не разбирается
+            for text, author in extract_comments('zen', response.text):
+                comments.append({
+                    'text': text,
+                    'author': author if author is not None else 'Аноним',
+                    'published_date': datetime.now(),
+                    'source': 'zen_comment',
+                    'url': article_url
+                })
             
             logger.info(f"[ZEN] Found {len(comments)} comments")
             
@@ -371,6 +316,7 @@ class ZenCollector:
         
         try:
             logger.info("[ZEN] Запуск сбора из Яндекс.Дзен через Яндекс поиск")
+            self.http.start_cycle()
             
             # Поиск по первым 2 ключевым словам
             for keyword in self.keywords[:2]:
@@ -379,9 +325,16 @@ class ZenCollector:
                 
                 # Collect comments if requested
                 if collect_comments:
+                    # Страницы статей - параллельно; при ошибке или капче - обычный запрос с обходом
+                    urls = [post['url'] for post in posts if post.get('url')]
+                    pages = dict(zip(urls, self.http.get_many(urls)))
+                    
                     for post in posts:
                         if post.get('url'):
-                            comments = self.parse_dzen_comments(post['url'])
+                            response = pages.get(post['url'])
+                            if response is None or response.status_code != 200 or 'captcha' in response.url:
+                                response = None
+                            comments = self.parse_dzen_comments(post['url'], response)
                             
                             for comment in comments:
                                 comment['parent_source_id'] = post['source_id']
@@ -389,13 +342,12 @@ class ZenCollector:
                                 comment['source_id'] = f"{post['source_id']}_comment_{hash(comment['text'])}"
                                 comment['is_comment'] = True
                                 all_posts.append(comment)
-                            
-                            time.sleep(1)
                         
                         post['is_comment'] = False
                 
                 all_posts.extend(posts)
-                time.sleep(2)  # Задержка между запросами
+            
+            self.http.log_stats("[ZEN]")
             
             logger.info(f"[ZEN] Всего найдено релевантных элементов: {len(all_posts)}")
             
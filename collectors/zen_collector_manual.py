@@ -6,6 +6,7 @@ import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 from config import Config
+from utils.text_filter import TextFilter
 import logging
 import time
 import re
@@ -19,6 +20,7 @@ class ZenCollectorManual:
     def __init__(self):
         self.channels = Config.DZEN_CHANNELS
         self.keywords = Config.COMPANY_KEYWORDS
+        self.text_filter = TextFilter(include=lambda: self.keywords)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -27,11 +29,7 @@ class ZenCollectorManual:
         
     def _is_relevant(self, text):
         """Проверка релевантности текста"""
-        text_lower = text.lower()
-        for keyword in self.keywords:
-            if keyword.lower() in text_lower:
-                return True
-        return False
+        return self.text_filter.is_relevant(text)
     
     def _normalize_channel_url(self, channel):
         """Нормализация URL канала"""
@@ -2,13 +2,13 @@
 Коллектор для Яндекс.Дзен через Selenium (обход капчи)
 """
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from datetime import datetime
 from config import Config
-from utils.webdriver_helper import create_edge_driver, hide_webdriver_signature
+from utils.text_filter import TextFilter
+from utils.browser_pool import BrowserUnavailable, get_browser_pool
+from utils.page_waits import PageWaits, no_implicit_wait
 import logging
-import time
 import re
 
 logger = logging.getLogger(__name__)
@@ -18,37 +18,31 @@ class ZenCollectorSelenium:
     
     def __init__(self):
         self.keywords = Config.COMPANY_KEYWORDS
+        self.text_filter = TextFilter(include=lambda: self.keywords)
         self.driver = None
+        self.waits = PageWaits('[ZEN-SELENIUM]')
         
     def _setup_driver(self):
-        """Настройка Edge драйвера"""
+        """Прогретый Edge драйвер из общего пула"""
         logger.info("[ZEN-SELENIUM] Запуск WebDriver...")
-        self.driver = create_edge_driver(headless=True)
-        
-        if self.driver:
-            hide_webdriver_signature(self.driver)
-            logger.info("[ZEN-SELENIUM] ✓ Edge драйвер запущен")
+        try:
+            self.driver = get_browser_pool('edge').acquire()
+            logger.info("[ZEN-SELENIUM] ✓ Edge драйвер получен из пула")
             return True
-        else:
-            logger.error("[ZEN-SELENIUM] Ошибка запуска драйвера")
+        except BrowserUnavailable as e:
+            logger.error(f"[ZEN-SELENIUM] Ошибка запуска драйвера: {e}")
             return False
     
     def _close_driver(self):
-        """Закрытие драйвера"""
+        """Возврат драйвера в пул"""
         if self.driver:
-            try:
-                self.driver.quit()
-                logger.debug("[ZEN-SELENIUM] Драйвер закрыт")
-            except:
-                pass
+            get_browser_pool('edge').release(self.driver)
+            self.driver = None
+            logger.debug("[ZEN-SELENIUM] Драйвер возвращен в пул")
     
     def _is_relevant(self, text):
         """Проверка релевантности текста"""
-        text_lower = text.lower()
-        for keyword in self.keywords:
-            if keyword.lower() in text_lower:
-                return True
-        return False
+        return self.text_filter.is_relevant(text)
     
     def search_dzen_yandex(self, query):
         """Поиск статей Дзен через Яндекс с Selenium"""
@@ -61,20 +55,15 @@ class ZenCollectorSelenium:
             
             logger.info(f"[ZEN-SELENIUM] Поиск: {search_query}")
             
-            # Загружаем страницу
-            self.driver.get(yandex_url)
-            
-            # Ждем загрузки результатов (макс 10 сек)
-            wait = WebDriverWait(self.driver, 10)
+            # Загружаем страницу и ждем ссылок на dzen.ru (макс 10 сек)
+            with self.waits.page(self.driver, yandex_url) as page:
+                page.element(['a[href*="dzen.ru"]', 'form[action*="captcha"]'], label='results')
             
             # Проверяем на капчу
             if 'showcaptcha' in self.driver.current_url:
                 logger.warning("[ZEN-SELENIUM] Яндекс показал капчу")
                 return []
             
-            # Ждем появления результатов
-            time.sleep(2)  # Даем время на полную загрузку
-            
             # Ищем ссылки на dzen.ru
             dzen_links = set()
             
@@ -96,65 +85,67 @@ class ZenCollectorSelenium:
             logger.info(f"[ZEN-SELENIUM] Найдено ссылок: {len(dzen_links)}")
             
             # Для каждой ссылки извлекаем заголовок из результатов поиска
-            for link_url in list(dzen_links)[:20]:  # Ограничение 20 статей
-                try:
-                    # Ищем элемент результата, содержащий эту ссылку
-                    title = ''
-                    description = ''
-                    
-                    # Пробуем найти заголовок рядом со ссылкой
-                    xpath_query = f"//a[contains(@href, '{link_url}')]/ancestor::li//h2 | //a[contains(@href, '{link_url}')]/ancestor::div[contains(@class, 'organic')]//h2"
-                    
+            # Заголовки и описания ищем без неявного ожидания: отсутствующий элемент не должен стоить 10 с
+            with no_implicit_wait(self.driver):
+                for link_url in list(dzen_links)[:20]:  # Ограничение 20 статей
                     try:
-                        title_elem = self.driver.find_element(By.XPATH, xpath_query)
-                        title = title_elem.text.strip()
-                    except:
-                        # Альтернативный поиск
+                        # Ищем элемент результата, содержащий эту ссылку
+                        title = ''
+                        description = ''
+                        
+                        # Пробуем найти заголовок рядом со ссылкой
+                        xpath_query = f"//a[contains(@href, '{link_url}')]/ancestor::li//h2 | //a[contains(@href, '{link_url}')]/ancestor::div[contains(@class, 'organic')]//h2"
+                        
                         try:
-                            link_elem = self.driver.find_element(By.XPATH, f"//a[contains(@href, '{link_url}')]")
-                            title = link_elem.text.strip()
+                            title_elem = self.driver.find_element(By.XPATH, xpath_query)
+                            title = title_elem.text.strip()
+                        except:
+                            # Альтернативный поиск
+                            try:
+                                link_elem = self.driver.find_element(By.XPATH, f"//a[contains(@href, '{link_url}')]")
+                                title = link_elem.text.strip()
+                            except:
+                                pass
+                        
+                        if not title:
+                            continue
+                        
+                        # Ищем описание
+                        try:
+                            desc_xpath = f"//a[contains(@href, '{link_url}')]/ancestor::li//div[contains(@class, 'text')] | //a[contains(@href, '{link_url}')]/ancestor::div[contains(@class, 'organic')]//div[contains(@class, 'text')]"
+                            desc_elem = self.driver.find_element(By.XPATH, desc_xpath)
+                            description = desc_elem.text.strip()
                         except:
                             pass
-                    
-                    if not title:
+                        
+                        full_text = f"{title}\n\n{description}"
+                        
+                        # Проверяем релевантность
+                        if not self._is_relevant(full_text):
+                            continue
+                        
+                        # Извлекаем ID статьи из URL
+                        article_id = link_url.split('/a/')[-1] if '/a/' in link_url else abs(hash(link_url))
+                        
+                        pub_date = datetime.now()
+                        date_str = pub_date.strftime('%Y%m%d')
+                        
+                        articles.append({
+                            'source': 'zen',
+                            'source_id': f"dzen_{article_id}_{date_str}",
+                            'author': 'Яндекс.Дзен',
+                            'author_id': 'yandex_dzen',
+                            'text': full_text[:500],
+                            'url': link_url,
+                            'published_date': pub_date,
+                            'date': pub_date
+                        })
+                        
+                        logger.info(f"[ZEN-SELENIUM] Добавлена: {title[:60]}...")
+                        
+                    except Exception as e:
+                        logger.debug(f"[ZEN-SELENIUM] Ошибка обработки ссылки: {e}")
                         continue
-                    
-                    # Ищем описание
-                    try:
-                        desc_xpath = f"//a[contains(@href, '{link_url}')]/ancestor::li//div[contains(@class, 'text')] | //a[contains(@href, '{link_url}')]/ancestor::div[contains(@class, 'organic')]//div[contains(@class, 'text')]"
-                        desc_elem = self.driver.find_element(By.XPATH, desc_xpath)
-                        description = desc_elem.text.strip()
-                    except:
-                        pass
-                    
-                    full_text = f"{title}\n\n{description}"
-                    
-                    # Проверяем релевантность
-                    if not self._is_relevant(full_text):
-                        continue
-                    
-                    # Извлекаем ID статьи из URL
-                    article_id = link_url.split('/a/')[-1] if '/a/' in link_url else abs(hash(link_url))
-                    
-                    pub_date = datetime.now()
-                    date_str = pub_date.strftime('%Y%m%d')
-                    
-                    articles.append({
-                        'source': 'zen',
-                        'source_id': f"dzen_{article_id}_{date_str}",
-                        'author': 'Яндекс.Дзен',
-                        'author_id': 'yandex_dzen',
-                        'text': full_text[:500],
-                        'url': link_url,
-                        'published_date': pub_date,
-                        'date': pub_date
-                    })
-                    
-                    logger.info(f"[ZEN-SELENIUM] Добавлена: {title[:60]}...")
-                    
-                except Exception as e:
-                    logger.debug(f"[ZEN-SELENIUM] Ошибка обработки ссылки: {e}")
-                    continue
             
             logger.info(f"[ZEN-SELENIUM] Релевантных статей: {len(articles)}")
             
@@ -180,14 +171,14 @@ class ZenCollectorSelenium:
                 logger.info(f"[ZEN-SELENIUM] Поиск по ключевому слову: {keyword}")
                 posts = self.search_dzen_yandex(keyword)
                 all_posts.extend(posts)
-                time.sleep(3)  # Задержка между запросами
+                self.waits.jitter(2, 4)  # Пауза между поисковыми запросами (антибот Яндекса)
             
             logger.info(f"[ZEN-SELENIUM] Всего найдено релевантных статей: {len(all_posts)}")
             
         except Exception as e:
             logger.error(f"[ZEN-SELENIUM] Ошибка сбора: {e}")
         finally:
-            # Обязательно закрываем драйвер
+            # Обязательно возвращаем драйвер в пул
             self._close_driver()
         
         return all_posts
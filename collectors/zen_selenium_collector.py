@@ -1,90 +1,45 @@
 """
 Коллектор для Яндекс.Дзен через Selenium (обход капчи)
 """
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 from datetime import datetime
 from config import Config
+from utils.text_filter import TextFilter, KEYWORD_EXCLUDES
+from utils.browser_pool import get_browser_pool
+from utils.page_waits import PageWaits, no_implicit_wait
 import logging
-import time
-import random
 
 logger = logging.getLogger(__name__)
 
+# Признаки загруженной выдачи Яндекса (или страницы капчи)
+SERP_SELECTORS = ['li.serp-item', '#search-result', 'form[action*="captcha"]', '.CheckboxCaptcha']
+
+# Блоки комментариев Дзена
+COMMENT_SELECTORS = ['.comment', '.mg-comment', '.comments-item', '[data-testid="comment"]', '.comment-item']
+
 class ZenSeleniumCollector:
     """Коллектор статей из Яндекс.Дзен через Selenium"""
     
     def __init__(self, sentiment_analyzer=None):
         # Используем hardcoded ключевые слова для избежания проблем с кодировкой
         self.keywords = ['ТНС энерго НН', 'ТНС энерго', 'энергосбыт', 'ТНС']
+        self.text_filter = TextFilter(
+            include=lambda: self.keywords,
+            exclude=KEYWORD_EXCLUDES,
+            match_all_if_no_include=True
+        )
         self.driver = None
         self.sentiment_analyzer = sentiment_analyzer  # Для совместимости с app_enhanced.py
+        self.waits = PageWaits('[ZEN-SELENIUM]')
         
     def _init_driver(self, headless=True):
-        """Инициализация Selenium WebDriver"""
+        """Прогретый WebDriver из общего пула (браузер не запускается на каждый сбор)"""
         try:
-            logger.info("[ZEN-Selenium] Запуск Chrome WebDriver...")
-            
-            chrome_options = Options()
-            
-            if headless:
-                chrome_options.add_argument('--headless=new')
-            
-            # Уникальная директория для профиля (избегаем конфликтов)
-            import tempfile
-            import os
-            import shutil
-            user_data_dir = os.path.join(tempfile.gettempdir(), f'zen_selenium_chrome_{os.getpid()}')
-            
-            # Очищаем старую директорию если есть
-            if os.path.exists(user_data_dir):
-                try:
-                    shutil.rmtree(user_data_dir, ignore_errors=True)
-                except:
-                    pass
-            
-            chrome_options.add_argument(f'--user-data-dir={user_data_dir}')
-            
-            # Базовые настройки с улучшенной стабильностью
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--disable-software-rasterizer')
-            chrome_options.add_argument('--disable-extensions')
-            chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('--lang=ru-RU')
-            
-            # Стабилизация Chrome
-            chrome_options.add_argument('--remote-debugging-port=0')
-            chrome_options.add_argument('--disable-background-networking')
-            chrome_options.add_argument('--disable-renderer-backgrounding')
-            
-            # Отключение логов
-            chrome_options.add_argument('--log-level=3')
-            chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-            
-            # Создаем драйвер
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            # Скрываем признаки webdriver
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            # Устанавливаем таймаут
-            self.driver.set_page_load_timeout(30)
-            self.driver.implicitly_wait(10)
-            
-            logger.info("[ZEN-Selenium] ✓ Chrome WebDriver запущен")
+            self.driver = get_browser_pool('chrome').acquire()
+            logger.info("[ZEN-Selenium] ✓ Chrome WebDriver получен из пула")
             return True
             
         except Exception as e:
@@ -92,41 +47,15 @@ class ZenSeleniumCollector:
             return False
     
     def _close_driver(self):
-        """Закрытие WebDriver"""
+        """Возврат WebDriver в пул"""
         if self.driver:
-            try:
-                self.driver.quit()
-                logger.info("[SELENIUM] WebDriver закрыт")
-            except:
-                pass
+            get_browser_pool('chrome').release(self.driver)
+            self.driver = None
+            logger.info("[SELENIUM] WebDriver возвращен в пул")
     
     def _is_relevant(self, text):
         """Проверка релевантности текста"""
-        if not text:
-            return False
-        
-        text_lower = text.lower()
-        
-        # Исключения
-        exclude_patterns = [
-            'газпром', 'т плюс', 'т-плюс',
-            'тнс тула', 'тнс ярославль',
-            'вакансия', 'требуется'
-        ]
-        
-        for exclude in exclude_patterns:
-            if exclude in text_lower:
-                return False
-        
-        # Ключевые слова
-        if not self.keywords:
-            return True
-        
-        for keyword in self.keywords:
-            if keyword.lower() in text_lower:
-                return True
-        
-        return False
+        return self.text_filter.is_relevant(text)
     
     def search_yandex(self, query, max_results=10):
         """Поиск в Яндексе через Selenium"""
@@ -136,20 +65,20 @@ class ZenSeleniumCollector:
             search_url = f"https://yandex.ru/search/?text={query}+site%3Adzen.ru"
             logger.info(f"[SELENIUM] Открытие страницы поиска: {search_url}")
             
-            self.driver.get(search_url)
-            
-            # Ждем загрузки результатов
-            time.sleep(random.uniform(2, 4))
-            
-            # Проверяем на капчу
-            if 'showcaptcha' in self.driver.current_url or 'Обнаружены подозрительные запросы' in self.driver.page_source:
-                logger.warning("[SELENIUM] Яндекс показал капчу - ждем 5 секунд")
-                time.sleep(5)
+            with self.waits.page(self.driver, search_url) as page:
+                # Ждем результатов (или формы капчи)
+                page.element(SERP_SELECTORS, label='results')
                 
-                # Проверяем снова
-                if 'showcaptcha' in self.driver.current_url:
-                    logger.error("[SELENIUM] Капча не пропала - прерываем")
-                    return results
+                # Проверяем на капчу
+                if 'showcaptcha' in self.driver.current_url or 'Обнаружены подозрительные запросы' in self.driver.page_source:
+                    logger.warning("[SELENIUM] Яндекс показал капчу - ждем до 5 секунд")
+                    page.condition(lambda: 'showcaptcha' not in self.driver.current_url, timeout=5, label='captcha')
+                    
+                    # Проверяем снова
+                    if 'showcaptcha' in self.driver.current_url:
+                        logger.error("[SELENIUM] Капча не пропала - прерываем")
+                        return results
+                    page.element(SERP_SELECTORS, label='results')
             
             # Парсим результаты поиска
             soup = BeautifulSoup(self.driver.page_source, 'html.parser')
@@ -209,20 +138,21 @@ class ZenSeleniumCollector:
             logger.info(f"[ZEN-Comments] Парсинг комментариев: {article_url}")
             
             # Открываем статью
-            self.driver.get(article_url)
-            time.sleep(random.uniform(2, 3))
-            
-            # Скроллим вниз для загрузки комментариев
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(1, 2))
-            
-            # Ищем кнопку "Показать все комментарии" и кликаем
-            try:
-                show_comments_button = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Показать')]")
-                show_comments_button.click()
-                time.sleep(2)
-            except:
-                pass  # Кнопки может не быть
+            with self.waits.page(self.driver, article_url) as page:
+                # Скроллим вниз, пока подгрузка не остановится
+                page.scroll()
+                
+                # Ищем кнопку "Показать все комментарии" и кликаем
+                try:
+                    with no_implicit_wait(self.driver):
+                        show_comments_button = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Показать')]")
+                    show_comments_button.click()
+                    page.network_idle(timeout=5)
+                except:
+                    pass  # Кнопки может не быть
+                
+                # Блок комментариев появляется после подгрузки; без комментариев ждем недолго
+                page.element(COMMENT_SELECTORS, timeout=3, label='comments')
             
             soup = BeautifulSoup(self.driver.page_source, 'html.parser')
             
@@ -298,8 +228,10 @@ class ZenSeleniumCollector:
         try:
             logger.info(f"[SELENIUM] Парсинг статьи: {url}")
             
-            self.driver.get(url)
-            time.sleep(random.uniform(2, 3))
+            with self.waits.page(self.driver, url) as page:
+                # Заголовок и текст есть уже в DOMContentLoaded; ждем, пока догрузится остальное
+                page.element('h1', timeout=5, label='title')
+                page.network_idle(timeout=3, max_in_flight=2)
             
             # Проверка на капчу
             if 'showcaptcha' in self.driver.current_url:
@@ -372,6 +304,8 @@ class ZenSeleniumCollector:
         else:
             logger.info("[ZEN-SELENIUM] Режим: ТОЛЬКО СТАТЬИ")
         
+        self.waits.reset()
+        
         # Инициализация драйвера
         if not self._init_driver(headless=True):
             logger.error("[ZEN-SELENIUM] Не удалось инициализировать WebDriver")
@@ -413,12 +347,9 @@ class ZenSeleniumCollector:
                         
                         all_articles.append(review_data)
                         logger.info(f"[ZEN-SELENIUM] ✓ Статья добавлена: {article['title'][:50]}...")
-                    
-                    # Задержка между статьями
-                    time.sleep(random.uniform(1, 3))
                 
-                # Задержка между ключевыми словами
-                time.sleep(random.uniform(2, 4))
+                # Пауза между поисковыми запросами: Яндекс показывает капчу на частые запросы
+                self.waits.jitter(1, 2)
             
             # Сбор комментариев если нужно
             if collect_comments and len(all_articles) > 0:
@@ -434,7 +365,6 @@ class ZenSeleniumCollector:
                                 all_articles.extend(comments)
                                 comments_total += len(comments)
                                 logger.info(f"[ZEN-Comments] Добавлено {len(comments)} комментариев к статье")
-                            time.sleep(random.uniform(2, 3))  # Задержка между статьями
                     except Exception as e:
                         logger.debug(f"[ZEN-Comments] Ошибка сбора комментариев: {e}")
                         continue
@@ -450,23 +380,12 @@ class ZenSeleniumCollector:
             if comments_count > 0:
                 logger.info(f"[ZEN-SELENIUM] Комментариев: {comments_count}")
             logger.info(f"[ZEN-SELENIUM] ИТОГО: {len(all_articles)} записей")
+            self.waits.log_stats()
             
         except Exception as e:
             logger.error(f"[ZEN-SELENIUM] Ошибка при сборе: {e}")
         
         finally:
             self._close_driver()
-            
-            # Очищаем временную директорию
-            try:
-                import tempfile
-                import shutil
-                import os
-                user_data_dir = os.path.join(tempfile.gettempdir(), f'zen_selenium_chrome_{os.getpid()}')
-                if os.path.exists(user_data_dir):
-                    shutil.rmtree(user_data_dir, ignore_errors=True)
-                    logger.debug("[ZEN-SELENIUM] Временная директория очищена")
-            except:
-                pass
         
         return all_articles
@@ -0,0 +1,42 @@
+"""
+Слияние дубликатов ответов Telegram
+До стабильных id один и тот же ответ сохранялся заново после каждого
+перезапуска (source_id строился из hash() текста)
+
+Примеры:
+    python compact_telegram_replies.py --dry-run
+    python compact_telegram_replies.py
+"""
+import argparse
+import logging
+
+from app_enhanced import app
+from models import db, Review
+from utils.telegram_replies import compact_reply_duplicates
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Слияние дубликатов ответов Telegram')
+    parser.add_argument('--dry-run', action='store_true', help='Только посчитать, ничего не менять')
+    args = parser.parse_args()
+
+    with app.app_context():
+        total = Review.query.count()
+        logger.info(f"Отзывов в базе: {total}")
+
+        removed = compact_reply_duplicates(dry_run=args.dry_run)
+
+        if args.dry_run:
+            db.session.rollback()
+            logger.info(f"Будет удалено дубликатов: {removed}")
+            return
+
+        db.session.commit()
+
+        logger.info(f"✓ Удалено дубликатов: {removed}")
+        logger.info(f"Отзывов в базе: {Review.query.count()}")
+
+if __name__ == '__main__':
+    main()
@@ -27,6 +27,10 @@ class Config:
     
     VK_GROUP_IDS = os.getenv('VK_GROUP_IDS', '').split(',') if os.getenv('VK_GROUP_IDS') else []
     VK_SEARCH_QUERY = os.getenv('VK_SEARCH_QUERY', 'ТНС энерго НН')
+    # Лимит VK API: 3 запроса в секунду для пользовательского токена (execute - один запрос)
+    VK_REQUESTS_PER_SECOND = float(os.getenv('VK_REQUESTS_PER_SECOND', 3))
+    # Сколько комментариев догружать к одному посту (страницами по 100)
+    VK_MAX_COMMENTS_PER_POST = int(os.getenv('VK_MAX_COMMENTS_PER_POST', 1000))
     
     TELEGRAM_CHANNELS = os.getenv('TELEGRAM_CHANNELS', '').split(',') if os.getenv('TELEGRAM_CHANNELS') else []
     
@@ -46,6 +50,39 @@ class Config:
     BLOCK_WORDS = os.getenv('BLOCK_WORDS', '').split(',') if os.getenv('BLOCK_WORDS') else []
     NEGATIVE_THRESHOLD = float(os.getenv('NEGATIVE_THRESHOLD', -0.5))
     
+    # Размер батча для анализа тональности (один вызов модели на батч)
+    SENTIMENT_BATCH_SIZE = int(os.getenv('SENTIMENT_BATCH_SIZE', 32))
+    
+    # Кэш результатов анализа: размер LRU в памяти и файл постоянного кэша
+    SENTIMENT_CACHE_SIZE = int(os.getenv('SENTIMENT_CACHE_SIZE', 10000))
+    SENTIMENT_CACHE_PATH = os.getenv('SENTIMENT_CACHE_PATH', '')
+    
+    # Сколько секунд счетчики дашборда берутся из общего кэша
+    DASHBOARD_STATS_TTL = float(os.getenv('DASHBOARD_STATS_TTL', 15))
+    
+    # Профиль SQLite: применяется к каждому новому соединению
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    
+    # HTTP-коллекторы (новости, Дзен, OK, сайты): одновременных запросов к хосту,
+    # секунд между запросами к хосту, повторов, бюджет времени цикла (0 - без ограничения)
+    HTTP_PER_HOST_CONCURRENCY = int(os.getenv('HTTP_PER_HOST_CONCURRENCY', 4))
+    HTTP_HOST_DELAY = float(os.getenv('HTTP_HOST_DELAY', 1.0))
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 2))
+    HTTP_CYCLE_BUDGET = float(os.getenv('HTTP_CYCLE_BUDGET', 300))
+    # Кэш лент и статей для условных запросов (пустой путь - отключен), лимит размера в МБ
+    HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', 'instance/http_cache.db')
+    HTTP_CACHE_MAX_MB = int(os.getenv('HTTP_CACHE_MAX_MB', 64))
+    
+    # Selenium-коллекторы (Дзен, OK): прогретых браузеров в пуле, страниц до перезапуска
+    # браузера, блокировка картинок/шрифтов/видео
+    BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', 2))
+    BROWSER_MAX_PAGES = int(os.getenv('BROWSER_MAX_PAGES', 50))
+    BROWSER_BLOCK_RESOURCES = os.getenv('BROWSER_BLOCK_RESOURCES', 'True') == 'True'
+    
     GEO_FILTER_ENABLED = os.getenv('GEO_FILTER_ENABLED', 'True') == 'True'
     GEO_KEYWORDS = os.getenv('GEO_KEYWORDS', 'Нижний Новгород,Нижегородск,НН,Nizhny Novgorod,нижний новгород,нижегородск').split(',')
     
@@ -68,6 +105,12 @@ class Config:
     TELEGRAM_API_ID = os.getenv('TELEGRAM_API_ID', '')
     TELEGRAM_API_HASH = os.getenv('TELEGRAM_API_HASH', '')
     TELEGRAM_PHONE = os.getenv('TELEGRAM_PHONE', '')
+    # Сколько каналов обходить одновременно
+    TELEGRAM_CONCURRENCY = int(os.getenv('TELEGRAM_CONCURRENCY', 5))
+    # FloodWait дольше этого (секунд) - канал пропускается до следующего цикла
+    TELEGRAM_MAX_FLOOD_WAIT = int(os.getenv('TELEGRAM_MAX_FLOOD_WAIT', 300))
+    # Запрашивать только сообщения новее отметок telegram_watermarks
+    TELEGRAM_INCREMENTAL_SYNC = os.getenv('TELEGRAM_INCREMENTAL_SYNC', 'True') == 'True'
     
     # OK API (Одноклассники)
     OK_APP_ID = os.getenv('OK_APP_ID', '')
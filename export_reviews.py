@@ -0,0 +1,58 @@
+"""
+Выгрузка отзывов из базы в CSV, JSONL или Parquet
+Строки читаются порциями и пишутся в файл сразу - память не растет с размером базы
+
+Примеры:
+    python export_reviews.py --format csv --output reviews.csv
+    python export_reviews.py --format jsonl --source vk --time week > vk_week.jsonl
+    python export_reviews.py --format parquet --kind comments --output comments.parquet
+"""
+import argparse
+import logging
+import sys
+import time
+
+from app_enhanced import app
+from utils.review_export import EXPORT_FORMATS, ExportError, export_filename, export_reviews
+from utils.review_query import TIME_FILTERS, ReviewFilters
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Выгрузка отзывов (фильтры как у /api/reviews/filtered)')
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', help='Формат выгрузки')
+    parser.add_argument('--output', help='Файл (по умолчанию reviews_<время>.<формат>, "-" - stdout)')
+    parser.add_argument('--source', default='', help='Источник: vk, telegram, news, ...')
+    parser.add_argument('--sentiment', default='', help='Тональность: positive, negative, neutral')
+    parser.add_argument('--time', default='all', choices=['all'] + list(TIME_FILTERS), help='Период')
+    parser.add_argument('--kind', default='all', choices=['all', 'posts', 'comments'], help='Тип записей')
+    parser.add_argument('--search', default='', help='Поиск по тексту')
+    args = parser.parse_args()
+
+    filters = ReviewFilters(args.source, args.sentiment, args.time, args.kind, args.search.strip())
+    output = args.output or export_filename(args.format)
+
+    with app.app_context():
+        try:
+            chunks = export_reviews(filters, args.format)
+        except ExportError as e:
+            print(f"✗ {e}", file=sys.stderr)
+            sys.exit(1)
+
+        started = time.perf_counter()
+        written = 0
+        stream = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+                written += len(chunk)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+
+    if output != '-':
+        print(f"✓ {output}: {written / 1024:.1f} КБ за {time.perf_counter() - started:.1f} с", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -264,6 +264,10 @@ def main():
         
         db.session.commit()
         
+        # Отметки синхронизации Telegram - только после записи отзывов
+        if hasattr(telegram_collector, 'commit_watermarks'):
+            telegram_collector.commit_watermarks()
+        
         total = Review.query.count()
         articles_count = Review.query.filter_by(is_comment=False).count()
         comments_count = Review.query.filter_by(is_comment=True).count()
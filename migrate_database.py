@@ -5,13 +5,25 @@ import sqlite3
 import os
 import logging
 
+from models import REVIEW_INDEXES
+from utils.sqlite_profile import apply_sqlite_profile
+from utils.review_search import install_review_search
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def migrate_database():
-    """Add parent_id and is_comment columns to reviews table"""
+# Колонки, добавленные в reviews после первой версии схемы
+REVIEW_COLUMNS = [
+    ('parent_id', 'INTEGER'),
+    ('is_comment', 'BOOLEAN DEFAULT 0'),
+    ('sentiment_analyzer', 'VARCHAR(50)'),
+    ('sentiment_model_version', 'VARCHAR(100)'),
+]
+
+def migrate_database(db_path='instance/reviews.db'):
+    """Add missing columns to reviews table"""
     
-    db_path = 'instance/reviews.db'
+    conn = None
     
     if not os.path.exists(db_path):
         logger.warning(f"Database not found at {db_path}. Creating new database with updated schema.")
@@ -26,25 +38,33 @@ def migrate_database():
         cursor.execute("PRAGMA table_info(reviews)")
         columns = [column[1] for column in cursor.fetchall()]
         
-        # Add parent_id column if it doesn't exist
-        if 'parent_id' not in columns:
-            logger.info("Adding parent_id column...")
-            cursor.execute("ALTER TABLE reviews ADD COLUMN parent_id INTEGER")
-            logger.info("✓ parent_id column added")
-        else:
-            logger.info("parent_id column already exists")
+        # Add missing columns
+        for column_name, column_ddl in REVIEW_COLUMNS:
+            if column_name not in columns:
+                logger.info(f"Adding {column_name} column...")
+                cursor.execute(f"ALTER TABLE reviews ADD COLUMN {column_name} {column_ddl}")
+                logger.info(f"✓ {column_name} column added")
+            else:
+                logger.info(f"{column_name} column already exists")
         
-        # Add is_comment column if it doesn't exist
-        if 'is_comment' not in columns:
-            logger.info("Adding is_comment column...")
-            cursor.execute("ALTER TABLE reviews ADD COLUMN is_comment BOOLEAN DEFAULT 0")
-            logger.info("✓ is_comment column added")
-        else:
-            logger.info("is_comment column already exists")
+        # Индексы под фильтры дашборда
+        for index_name, index_columns in REVIEW_INDEXES:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {index_name} ON reviews ({', '.join(index_columns)})"
+            )
+            logger.info(f"✓ index {index_name} ({', '.join(index_columns)})")
         
         # Commit changes
         conn.commit()
         
+        # WAL сохраняется в файле базы; статистика для планировщика по новым индексам
+        apply_sqlite_profile(conn)
+        cursor.execute("ANALYZE reviews")
+        conn.commit()
+        
+        # Полнотекстовый индекс для поиска (заполняется при создании)
+        install_review_search(conn)
+        
         logger.info("=" * 60)
         logger.info("Database migration completed successfully!")
         logger.info("=" * 60)
@@ -52,6 +72,11 @@ def migrate_database():
         logger.info("- Comments can now be linked to parent articles")
         logger.info("- Use collect_with_comments() in collectors to parse comments")
         logger.info("- Set collect_comments=True in Telegram and Zen collectors")
+        logger.info("- Reviews record which sentiment analyzer/model version scored them")
+        logger.info("- WAL journal and indexes on collected_date, source, sentiment_label, is_comment, parent_id")
+        logger.info("- FTS5 index reviews_fts for text search, kept in sync by triggers")
+        logger.info("- Hourly review_rollups for the dashboard: built on app start, rebuild with rebuild_rollups.py")
+        logger.info("- Incremental Telegram sync: telegram_watermarks created on app start, reset by clearing reviews")
         
     except Exception as e:
         logger.error(f"Migration failed: {e}")
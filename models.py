@@ -1,8 +1,23 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from datetime import datetime
+from utils.sqlite_profile import install_sqlite_profile
 
 db = SQLAlchemy()
 
+# WAL, synchronous=NORMAL, mmap, кэш и busy_timeout для каждого соединения SQLite
+install_sqlite_profile()
+
+# Индексы reviews под фильтры и сортировки дашборда: (имя, колонки).
+# Для существующих баз их создает migrate_database.py
+REVIEW_INDEXES = [
+    ('ix_reviews_collected_date', ('collected_date',)),
+    ('ix_reviews_source_collected', ('source', 'collected_date')),
+    ('ix_reviews_sentiment_collected', ('sentiment_label', 'collected_date')),
+    ('ix_reviews_comment_collected', ('is_comment', 'collected_date')),
+    ('ix_reviews_parent_sentiment', ('parent_id', 'sentiment_label')),
+]
+
 class Review(db.Model):
     __tablename__ = 'reviews'
     
@@ -25,6 +40,9 @@ class Review(db.Model):
     
     sentiment_score = db.Column(db.Float)
     sentiment_label = db.Column(db.String(20))
+    # Каким анализатором и какой версией модели посчитана тональность
+    sentiment_analyzer = db.Column(db.String(50))
+    sentiment_model_version = db.Column(db.String(100))
     keywords = db.Column(db.Text)
     
     is_moderated = db.Column(db.Boolean, default=False)
@@ -35,6 +53,8 @@ class Review(db.Model):
     processed = db.Column(db.Boolean, default=False)
     processed_date = db.Column(db.DateTime)
     
+    __table_args__ = tuple(db.Index(name, *columns) for name, columns in REVIEW_INDEXES)
+    
     def __repr__(self):
         return f'<Review {self.id} from {self.source}>'
     
@@ -51,6 +71,8 @@ class Review(db.Model):
             'collected_date': self.collected_date.isoformat() if self.collected_date else None,
             'sentiment_score': self.sentiment_score,
             'sentiment_label': self.sentiment_label,
+            'sentiment_analyzer': self.sentiment_analyzer,
+            'sentiment_model_version': self.sentiment_model_version,
             'keywords': self.keywords.split(',') if self.keywords else [],
             'is_moderated': self.is_moderated,
             'moderation_status': self.moderation_status,
@@ -59,6 +81,45 @@ class Review(db.Model):
             'processed': self.processed
         }
 
+class ReviewRollup(db.Model):
+    """Почасовые счетчики отзывов для дашборда (ведет utils/review_rollups.py)"""
+    __tablename__ = 'review_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Начало часа collected_date (UTC)
+    bucket = db.Column(db.DateTime, nullable=False)
+    source = db.Column(db.String(50), nullable=False)
+    # Пустая строка вместо NULL, чтобы ключ был уникальным
+    sentiment_label = db.Column(db.String(20), nullable=False, default='')
+    is_comment = db.Column(db.Boolean, nullable=False, default=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('bucket', 'source', 'sentiment_label', 'is_comment', name='uq_review_rollups_key'),
+    )
+    
+    def __repr__(self):
+        return f'<ReviewRollup {self.bucket} {self.source} {self.sentiment_label}: {self.count}>'
+
+class TelegramWatermark(db.Model):
+    """Последний полученный id по каналу Telegram (thread_id=0) и по ветке ответов (thread_id=id поста)"""
+    __tablename__ = 'telegram_watermarks'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    channel_id = db.Column(db.BigInteger, nullable=False)
+    thread_id = db.Column(db.Integer, nullable=False, default=0)
+    last_message_id = db.Column(db.Integer, nullable=False, default=0)
+    # Дата поста ветки: ответы отслеживаются, пока пост не старше окна сбора
+    message_date = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('channel_id', 'thread_id', name='uq_telegram_watermarks_thread'),
+    )
+    
+    def __repr__(self):
+        return f'<TelegramWatermark {self.channel_id}/{self.thread_id}: {self.last_message_id}>'
+
 class MonitoringLog(db.Model):
     __tablename__ = 'monitoring_logs'
     
@@ -72,3 +133,17 @@ class MonitoringLog(db.Model):
     
     def __repr__(self):
         return f'<MonitoringLog {self.id} - {self.source}>'
+
+
+# Добавленные, удаленные и измененные через ORM отзывы попадают в review_rollups
+# в той же транзакции (массовые вставки ReviewStore обновляют их сами).
+# Слушатели висят только на сессиях приложения (db.session), а не на всех Session процесса
+@event.listens_for(db.session, 'before_flush')
+def _track_review_rollup_changes(session, flush_context, instances):
+    from utils.review_rollups import track_changes
+    track_changes(session)
+
+@event.listens_for(db.session, 'after_flush')
+def _track_review_rollups(session, flush_context):
+    from utils.review_rollups import track_flush
+    track_flush(session)
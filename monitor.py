@@ -92,6 +92,10 @@ class ReviewMonitor:
                 
                 db.session.commit()
                 
+                # Отметки синхронизации Telegram - только после записи отзывов
+                if hasattr(collector, 'commit_watermarks'):
+                    collector.commit_watermarks()
+                
                 log = MonitoringLog.query.get(log_id)
                 log.completed_at = datetime.utcnow()
                 log.status = 'success'
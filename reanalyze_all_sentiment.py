@@ -62,6 +62,8 @@ def reanalyze_all():
                 # Обновляем
                 review.sentiment_score = sentiment['sentiment_score']
                 review.sentiment_label = sentiment['sentiment_label']
+                review.sentiment_analyzer = sentiment.get('analyzer')
+                review.sentiment_model_version = analyzer.model_version if sentiment.get('analyzer') == analyzer.analyzer_type else None
                 
                 updated += 1
                 
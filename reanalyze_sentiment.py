@@ -49,6 +49,8 @@ def reanalyze_all():
                 old_label = review.sentiment_label
                 review.sentiment_score = result['sentiment_score']
                 review.sentiment_label = result['sentiment_label']
+                review.sentiment_analyzer = result.get('analyzer')
+                review.sentiment_model_version = analyzer.model_version if result.get('analyzer') == analyzer.analyzer_type else None
                 
                 # Счетчики
                 if result['sentiment_label'] == 'positive':
@@ -0,0 +1,24 @@
+"""
+Пересчет почасовых агрегатов review_rollups по всей таблице reviews
+Нужен после массовых изменений в обход ORM (ручной SQL, импорт старой базы)
+"""
+from app_enhanced import app
+from models import db, Review
+from utils.review_rollups import rebuild_rollups
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    with app.app_context():
+        total = Review.query.count()
+        logger.info(f"Отзывов в базе: {total}")
+
+        rollups = rebuild_rollups()
+        db.session.commit()
+
+        logger.info(f"✓ Агрегатов: {rollups}")
+
+if __name__ == '__main__':
+    main()
@@ -204,6 +204,10 @@ def collect_once():
         
         db.session.commit()
         
+        # Отметки синхронизации Telegram - только после записи отзывов
+        if hasattr(telegram_collector, 'commit_watermarks'):
+            telegram_collector.commit_watermarks()
+        
         # Статистика
         total = Review.query.count()
         articles_count = Review.query.filter_by(is_comment=False).count()
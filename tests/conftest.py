@@ -0,0 +1,21 @@
+"""
+Общие фикстуры: приложение Flask с отдельной SQLite-базой на каждый тест
+"""
+import pytest
+from flask import Flask
+
+from models import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'reviews.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
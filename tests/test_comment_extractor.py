@@ -0,0 +1,66 @@
+"""
+utils.comment_extractor дает те же комментарии, что прежний разбор BeautifulSoup
+"""
+from pathlib import Path
+
+import pytest
+
+from benchmark_comment_parsing import FIXTURES, legacy_news, legacy_zen, with_comments
+from utils.comment_extractor import extract_comments
+
+ROOT = Path(__file__).resolve().parent.parent
+
+LEGACY = {'news': legacy_news, 'zen': legacy_zen}
+
+EXTRA_PAGES = {
+    'no markers': '<html><body><div class="post"><p>Новость про свет без обсуждения</p></div></body></html>',
+    'zen testid': (
+        '<html><body><article data-testid="comment"><a class="Author">Анна</a>'
+        '<div>Когда вернут электричество в Сормово?</div></article>'
+        '<li class="mg-comment">Спасибо, дали свет через час</li></body></html>'
+    ),
+    'nested and short': (
+        '<html><body><div id="comments"><div class="comment"><div class="user-name">Иван</div>'
+        '<div class="Comment-Content">Третий день без горячей воды</div>'
+        '<style>.x{}</style><div class="comment">коротко</div></div></div></body></html>'
+    ),
+}
+
+
+def _pages():
+    pages = []
+    for name in FIXTURES:
+        html = (ROOT / name).read_text(encoding='utf-8') if (ROOT / name).exists() else ''
+        if html.strip():
+            pages.append(pytest.param(html, id=name))
+            pages.append(pytest.param(with_comments(html, 40), id=f'{name} + comments'))
+    pages += [pytest.param(html, id=name) for name, html in EXTRA_PAGES.items()]
+    return pages
+
+
+@pytest.mark.parametrize('site', ['news', 'zen'])
+@pytest.mark.parametrize('html', _pages())
+def test_matches_legacy_parser(site, html):
+    assert extract_comments(site, html) == LEGACY[site](html)
+
+
+def test_injected_comments_are_found():
+    html = with_comments('<html><body></body></html>', 5)
+    comments = extract_comments('news', html)
+
+    assert comments
+    assert all('var c' not in text for text, _ in comments)
+    for text, author in comments:
+        number = author.rsplit(' ', 1)[1]
+        assert text == f'Опять отключили свет на улице {number}, когда починят?'
+
+
+def test_bytes_and_xml_declaration():
+    html = '<?xml version="1.0" encoding="utf-8"?>' + EXTRA_PAGES['zen testid']
+
+    assert extract_comments('zen', html) == extract_comments('zen', html.encode('utf-8')) == legacy_zen(html)
+
+
+def test_page_without_markers_is_not_parsed():
+    assert extract_comments('news', EXTRA_PAGES['no markers']) == []
+    assert extract_comments('news', '') == []
@@ -0,0 +1,78 @@
+"""
+Пакетные выборки комментариев совпадают с прежними запросами по одному посту
+"""
+from datetime import datetime, timedelta
+
+from models import db, Review
+from utils.comment_helper import CommentHelper
+
+NOW = datetime(2024, 5, 1, 12)
+
+
+def _posts():
+    posts = [
+        Review(source='vk', source_id=f'post_{i}', text=f'Пост {i}', is_comment=False,
+               published_date=NOW - timedelta(days=i))
+        for i in range(4)
+    ]
+    db.session.add_all(posts)
+    db.session.flush()
+
+    labels = ['positive', 'negative', 'neutral', None, 'mixed']
+    counts = {posts[0].id: 7, posts[1].id: 3, posts[2].id: 0, posts[3].id: 1}
+    for post in posts:
+        for j in range(counts[post.id]):
+            db.session.add(Review(
+                source='vk', source_id=f'{post.source_id}_c{j}', text=f'Комментарий {j}', is_comment=True,
+                parent_id=post.id,
+                # Даты вперемешку с порядком вставки: порядок задает запрос, а не id
+                published_date=NOW - timedelta(hours=(j * 5) % 7, minutes=j),
+                sentiment_label=labels[j % len(labels)],
+                sentiment_score=None if j == 2 else (j - 3) / 10,
+            ))
+    # Дочерняя запись без is_comment в комментарии и статистику не входит
+    db.session.add(Review(source='vk', source_id='repost', text='Репост', is_comment=False, parent_id=posts[0].id))
+    db.session.commit()
+    return [post.id for post in posts]
+
+
+def test_comments_match_per_post_query(app):
+    post_ids = _posts()
+
+    for limit in (2, 5, 100):
+        batch = CommentHelper.get_comments_for_posts(post_ids, limit=limit)
+
+        assert list(batch) == post_ids
+        for post_id in post_ids:
+            assert [c.id for c in batch[post_id]] == [
+                c.id for c in CommentHelper.get_post_comments(post_id, limit=limit)
+            ]
+
+    limited = CommentHelper.get_comments_for_posts(post_ids, limit=2)
+    assert [len(limited[post_id]) for post_id in post_ids] == [2, 2, 0, 1]
+
+
+def test_stats_match_per_post_counts(app):
+    post_ids = _posts()
+
+    batch = CommentHelper.get_comment_stats_batch(post_ids)
+
+    for post_id in post_ids:
+        assert batch[post_id] == CommentHelper.get_comment_stats(post_id)
+    assert batch[post_ids[2]] == CommentHelper._empty_stats()
+    assert batch[post_ids[0]]['total'] == 7
+
+
+def test_posts_with_comments(app):
+    post_ids = _posts()
+
+    posts = CommentHelper.get_posts_with_comments(source='vk', limit=3)
+
+    assert [item['post'].id for item in posts] == post_ids[:3]
+    assert [len(item['comments']) for item in posts] == [7, 3, 0]
+    assert [item['stats']['total'] for item in posts] == [7, 3, 0]
+
+
+def test_empty_input(app):
+    assert CommentHelper.get_comments_for_posts([]) == {}
+    assert CommentHelper.get_comment_stats_batch([]) == {}
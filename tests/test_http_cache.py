@@ -0,0 +1,172 @@
+"""
+Кэш HTTP-ответов, условная перепроверка и память разобранных страниц
+"""
+import itertools
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from utils import http_cache
+from utils.http_cache import HttpCache, ParsedMemo, body_hash
+from utils.http_fetch import FetchEngine
+
+
+def _response(body, status=200, headers=None, url='https://example.test/feed'):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers or {})
+    response.encoding = 'utf-8'
+    response.url = url
+    return response
+
+
+class FeedAdapter(BaseAdapter):
+    """Транспорт requests без сети: отдает body с ETag и 304 на совпавший If-None-Match"""
+
+    def __init__(self, body):
+        super().__init__()
+        self.body = body
+        self.conditional = []
+
+    def send(self, request, **kwargs):
+        etag = f'"{body_hash(self.body)}"'
+        self.conditional.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == etag:
+            response = _response(b'', status=304, url=request.url)
+        else:
+            response = _response(self.body, headers={'ETag': etag}, url=request.url)
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # accessed_at строго растет: порядок вытеснения не зависит от разрешения time.time()
+    ticks = itertools.count(1)
+
+    class Clock:
+        @staticmethod
+        def time():
+            return next(ticks)
+
+    monkeypatch.setattr(http_cache, 'time', Clock)
+
+
+def test_store_and_get(tmp_path, clock):
+    cache = HttpCache(str(tmp_path / 'http.db'), max_bytes=1000)
+    response = _response(b'<rss/>', headers={'ETag': '"v1"', 'Last-Modified': 'Wed, 01 May 2024 12:00:00 GMT'})
+
+    cache.store('https://a.test/', response, body_hash(response.content))
+    entry = cache.get('https://a.test/')
+
+    assert entry.body == b'<rss/>'
+    assert entry.content_hash == body_hash(b'<rss/>')
+    assert HttpCache.conditional_headers(entry) == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 01 May 2024 12:00:00 GMT'
+    }
+    assert cache.get('https://b.test/') is None
+
+
+def test_evicts_least_recently_requested(tmp_path, clock):
+    cache = HttpCache(str(tmp_path / 'http.db'), max_bytes=250)
+    for name in 'abc':
+        cache.store(f'https://{name}.test/', _response(b'x' * 100), 'hash')
+        if name == 'b':
+            # a запрошена позже b: вытеснена будет b
+            cache.get('https://a.test/')
+
+    assert cache.get('https://b.test/') is None
+    assert cache.get('https://a.test/') is not None
+    assert cache.stats()['size_bytes'] == 200
+    assert cache.evicted == 1
+
+
+def test_size_survives_reopen_and_replace(tmp_path, clock):
+    path = str(tmp_path / 'http.db')
+    cache = HttpCache(path, max_bytes=1000)
+    cache.store('https://a.test/', _response(b'x' * 100), 'hash')
+    cache.store('https://a.test/', _response(b'x' * 40), 'hash')
+
+    assert HttpCache(path, max_bytes=1000).stats()['size_bytes'] == 40
+
+
+def test_not_modified_feed_returns_cached_body(tmp_path, clock):
+    adapter = FeedAdapter(b'<rss>1</rss>')
+    engine = FetchEngine(host_delay=0, max_retries=0, cache=HttpCache(str(tmp_path / 'http.db'), 10000))
+    engine.session.mount('https://', adapter)
+
+    first = engine.get('https://example.test/feed')
+    second = engine.get('https://example.test/feed')
+    adapter.body = b'<rss>2</rss>'
+    third = engine.get('https://example.test/feed')
+
+    assert adapter.conditional[0] is None
+    assert (first.unchanged, second.unchanged, third.unchanged) == (False, True, False)
+    assert second.status_code == 200 and second.content == b'<rss>1</rss>'
+    assert second.content_hash == first.content_hash
+    assert third.content == b'<rss>2</rss>'
+    assert engine.stats['not_modified'] == 1
+
+
+class Page:
+    def __init__(self, content_hash):
+        self.content_hash = content_hash
+
+
+def test_memo_reuses_result_for_same_body():
+    memo = ParsedMemo()
+    calls = []
+
+    def parse(response):
+        calls.append(response.content_hash)
+        return [{'title': response.content_hash}]
+
+    first = memo.get_or_parse('feed', Page('h1'), parse)
+    first.append('изменен вызывающим')
+    second = memo.get_or_parse('feed', Page('h1'), parse)
+    memo.get_or_parse('feed', Page('h2'), parse)
+
+    assert second == [{'title': 'h1'}]
+    assert calls == ['h1', 'h2']
+    assert (memo.hits, memo.misses) == (1, 2)
+
+
+def test_memo_version_change_reparses():
+    memo = ParsedMemo()
+    calls = []
+
+    def parse(response):
+        calls.append(1)
+        return []
+
+    memo.get_or_parse('feed', Page('h1'), parse, version=1)
+    memo.get_or_parse('feed', Page('h1'), parse, version=1)
+    memo.get_or_parse('feed', Page('h1'), parse, version=2)
+
+    assert len(calls) == 2
+
+
+def test_memo_is_lru_and_skips_uncached_responses():
+    memo = ParsedMemo(max_entries=2)
+    calls = []
+
+    def parse(response):
+        calls.append(getattr(response, 'content_hash', None))
+        return []
+
+    memo.get_or_parse('a', Page('ha'), parse)
+    memo.get_or_parse('b', Page('hb'), parse)
+    memo.get_or_parse('a', Page('ha'), parse)
+    memo.get_or_parse('c', Page('hc'), parse)
+    memo.get_or_parse('a', Page('ha'), parse)
+    memo.get_or_parse('b', Page('hb'), parse)
+    # Без кэша у ответа нет content_hash - разбирается всегда
+    memo.get_or_parse('d', object(), parse)
+    memo.get_or_parse('d', object(), parse)
+
+    assert calls == ['ha', 'hb', 'hc', 'hb', None, None]
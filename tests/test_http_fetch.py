@@ -0,0 +1,138 @@
+"""
+FetchEngine: повторы, паузы перед ними и бюджет времени цикла
+"""
+import time
+
+import pytest
+import requests
+
+from utils import http_fetch
+from utils.http_fetch import BACKOFF_CAP, FetchBudgetExceeded, FetchEngine, FetchError
+
+
+def _response(status, headers=None, body=b'ok'):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeSession:
+    """
+    requests.Session.get без сети: ответы по URL из очереди
+
+    Элемент очереди - код статуса, (код, заголовки) или исключение requests.
+    Последний элемент повторяется.
+    """
+
+    def __init__(self, replies):
+        self.replies = {url: list(queue) for url, queue in replies.items()}
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        queue = self.replies[url]
+        reply = queue.pop(0) if len(queue) > 1 else queue[0]
+        if isinstance(reply, Exception):
+            raise reply
+        status, headers = reply if isinstance(reply, tuple) else (reply, None)
+        return _response(status, headers, body=url.encode())
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Паузы перед повторами записываются, а не выжидаются
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr(http_fetch.asyncio, 'sleep', sleep)
+    return delays
+
+
+def _engine(replies, **kwargs):
+    kwargs.setdefault('host_delay', 0)
+    kwargs.setdefault('max_retries', 3)
+    engine = FetchEngine(**kwargs)
+    engine.session = FakeSession(replies)
+    return engine
+
+
+def test_retry_on_503_then_success(sleeps):
+    engine = _engine({'https://a.test/': [503, 503, 200]})
+
+    response = engine.get('https://a.test/')
+
+    assert response.status_code == 200
+    assert len(engine.session.calls) == 3
+    assert engine.stats['retries'] == 2
+    assert len(sleeps) == 2
+    # Джиттер в пределах экспоненциального окна попытки
+    assert 0 <= sleeps[0] <= http_fetch.BACKOFF_BASE
+    assert 0 <= sleeps[1] <= http_fetch.BACKOFF_BASE * 2
+
+
+def test_retry_after_is_honoured(sleeps):
+    engine = _engine({'https://a.test/': [(429, {'Retry-After': '7'}), (503, {'Retry-After': '600'}), 200]})
+
+    engine.get('https://a.test/')
+
+    assert sleeps == [7.0, BACKOFF_CAP]
+
+
+def test_fetch_error_after_max_retries(sleeps):
+    engine = _engine({
+        'https://a.test/': [502],
+        'https://b.test/': [requests.ConnectionError('reset')],
+    }, max_retries=2)
+
+    with pytest.raises(FetchError, match='HTTP 502'):
+        engine.get('https://a.test/')
+    with pytest.raises(FetchError, match='reset'):
+        engine.get('https://b.test/')
+
+    assert len(engine.session.calls) == 6
+    assert engine.stats['failed'] == 2
+
+
+def test_other_statuses_are_returned_without_retry(sleeps):
+    engine = _engine({'https://a.test/': [404]})
+
+    assert engine.get('https://a.test/').status_code == 404
+    assert len(engine.session.calls) == 1
+    assert sleeps == []
+
+
+def test_cycle_budget(sleeps):
+    engine = _engine({'https://a.test/': [200]}, timeout=15)
+
+    engine.start_cycle(budget=5)
+    engine.get('https://a.test/')
+    # Таймаут запроса не выходит за остаток бюджета
+    assert engine.session.calls[0][1]['timeout'] <= 5
+
+    engine.start_cycle(budget=0.01)
+    time.sleep(0.02)
+    with pytest.raises(FetchBudgetExceeded):
+        engine.get('https://a.test/')
+    assert len(engine.session.calls) == 1
+
+    engine.start_cycle(budget=0)
+    assert engine.get('https://a.test/').status_code == 200
+
+
+def test_fetch_all_maps_failures_to_none_in_order(sleeps):
+    engine = _engine({
+        'https://a.test/': [200],
+        'https://b.test/': [500],
+        'https://c.test/': [200],
+        'https://d.test/': [requests.Timeout('timeout')],
+    }, max_retries=1)
+
+    responses = engine.get_many(['https://a.test/', 'https://b.test/', 'https://c.test/', 'https://d.test/'])
+
+    assert [response.content if response else None for response in responses] == [
+        b'https://a.test/', None, b'https://c.test/', None
+    ]
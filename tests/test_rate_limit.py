@@ -0,0 +1,79 @@
+"""
+TokenBucket: всплеск, равномерная выдача и пауза по ответу сервера
+"""
+import pytest
+
+from utils import rate_limit
+from utils.rate_limit import TokenBucket
+
+
+class FakeClock:
+    """Часы вместо time: sleep только сдвигает monotonic"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    return clock
+
+
+def test_burst_then_rate(clock):
+    bucket = TokenBucket(rate=3, capacity=3)
+
+    waits = [bucket.reserve() for _ in range(6)]
+
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3:] == pytest.approx([1 / 3, 2 / 3, 1.0])
+
+
+def test_tokens_refill_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.reserve()
+    bucket.reserve()
+
+    clock.now += 60
+
+    assert [bucket.reserve() for _ in range(3)] == pytest.approx([0, 0, 0.5])
+
+
+def test_acquire_sleeps_for_reserved_time(clock):
+    bucket = TokenBucket(rate=4, capacity=1)
+    bucket.acquire()
+    started = clock.now
+
+    assert bucket.acquire() == pytest.approx(0.25)
+    assert clock.now - started == pytest.approx(0.25)
+
+
+def test_pause_spaces_requests_after_it(clock):
+    bucket = TokenBucket(rate=3, capacity=3)
+
+    bucket.pause(2)
+    waits = [bucket.reserve() for _ in range(6)]
+
+    # Накопившиеся за паузу запросы идут после нее с частотой rate, а не разом
+    assert waits == pytest.approx([2 + i / 3 for i in range(1, 7)])
+
+
+def test_pause_does_not_shorten_longer_pause(clock):
+    bucket = TokenBucket(rate=1, capacity=1)
+
+    bucket.pause(5)
+    bucket.pause(1)
+
+    assert bucket.reserve() == pytest.approx(6.0)
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
@@ -0,0 +1,109 @@
+"""
+Потоковая выгрузка отзывов в CSV, JSONL и Parquet
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Review
+from utils import review_export
+from utils.review_export import (
+    EXPORT_COLUMNS,
+    ExportError,
+    export_filename,
+    export_reviews,
+    iter_review_rows,
+    write_jsonl,
+)
+from utils.review_query import ReviewFilters
+
+NOW = datetime(2024, 5, 1, 12)
+
+
+def _filters(**values):
+    defaults = {'source': '', 'sentiment': '', 'time_filter': 'all', 'kind': 'all', 'search': ''}
+    defaults.update(values)
+    return ReviewFilters(**defaults)
+
+
+@pytest.fixture
+def reviews(app):
+    for i in range(5):
+        db.session.add(Review(
+            source='vk' if i % 2 else 'telegram', source_id=str(i), text=f'Отзыв "{i}", с запятой',
+            author=None if i == 0 else f'Автор {i}', sentiment_label='negative' if i < 2 else 'neutral',
+            sentiment_score=-0.5 if i < 2 else 0.0, collected_date=NOW - timedelta(hours=i),
+            is_comment=False,
+        ))
+    db.session.commit()
+
+
+def test_csv_has_bom_and_header(reviews):
+    data = b''.join(export_reviews(_filters(), 'csv'))
+
+    assert data.startswith(b'\xef\xbb\xbf')
+    rows = list(csv.reader(io.StringIO(data.decode('utf-8-sig'))))
+    assert rows[0] == list(EXPORT_COLUMNS)
+    assert [row[EXPORT_COLUMNS.index('source_id')] for row in rows[1:]] == ['0', '1', '2', '3', '4']
+
+    first = dict(zip(EXPORT_COLUMNS, rows[1]))
+    assert first['text'] == 'Отзыв "0", с запятой'
+    assert first['author'] == ''
+    assert first['collected_date'] == NOW.isoformat()
+
+
+def test_jsonl_round_trip_across_chunks(reviews, monkeypatch):
+    # Несколько порций БД и несколько кусков вывода
+    monkeypatch.setattr(review_export, 'CHUNK_ROWS', 2)
+
+    chunks = list(write_jsonl(iter_review_rows(_filters(), yield_per=2)))
+    records = [json.loads(line) for line in b''.join(chunks).decode('utf-8').splitlines()]
+
+    assert len(chunks) == 3
+    assert [record['source_id'] for record in records] == ['0', '1', '2', '3', '4']
+    assert records[0]['author'] is None
+    assert records[1]['collected_date'] == (NOW - timedelta(hours=1)).isoformat()
+    stored = {review.source_id: review for review in Review.query}
+    for record in records:
+        assert record['text'] == stored[record['source_id']].text
+        assert record['sentiment_score'] == stored[record['source_id']].sentiment_score
+
+
+def test_filters_are_applied(reviews):
+    def source_ids(filters):
+        data = b''.join(export_reviews(filters, 'jsonl')).decode('utf-8')
+        return [json.loads(line)['source_id'] for line in data.splitlines()]
+
+    assert source_ids(_filters(source='vk')) == ['1', '3']
+    assert source_ids(_filters(sentiment='negative')) == ['0', '1']
+    assert source_ids(_filters(source='vk', sentiment='neutral')) == ['3']
+
+
+def test_unknown_format():
+    with pytest.raises(ExportError):
+        export_reviews(_filters(), 'xlsx')
+
+
+def test_parquet(reviews, monkeypatch):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    monkeypatch.setattr(review_export, 'PARQUET_ROW_GROUP', 2)
+
+    data = b''.join(export_reviews(_filters(), 'parquet'))
+    table = pq.read_table(pa.BufferReader(data))
+
+    assert table.column_names == list(EXPORT_COLUMNS)
+    assert pq.read_metadata(pa.BufferReader(data)).num_row_groups == 3
+    records = table.to_pylist()
+    assert [record['source_id'] for record in records] == ['0', '1', '2', '3', '4']
+    assert records[0]['collected_date'] == NOW
+    assert records[0]['author'] is None
+    assert records[0]['is_comment'] is False
+
+
+def test_filename():
+    assert export_filename('jsonl', now=NOW) == 'reviews_20240501_120000.jsonl'
@@ -0,0 +1,121 @@
+"""
+Фильтры списка отзывов и постраничная выдача по ключу
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Review
+from utils.review_query import (
+    InvalidCursor,
+    ReviewFilters,
+    approximate_total,
+    decode_cursor,
+    encode_cursor,
+    filter_reviews,
+    keyset_page,
+)
+from utils.review_search import install_for_engine
+
+NOW = datetime(2024, 5, 1, 12)
+
+
+def _add(source_id, collected_date=NOW, **fields):
+    values = {'source': 'vk', 'source_id': source_id, 'text': 'текст', 'sentiment_label': 'neutral',
+              'collected_date': collected_date, 'is_comment': False}
+    values.update(fields)
+    db.session.add(Review(**values))
+
+
+def _walk(query, per_page, rank=None):
+    pages = []
+    cursor = None
+    while True:
+        page = keyset_page(query, cursor, per_page, rank=rank)
+        pages.append([review.source_id for review in page.items])
+        if not page.has_more:
+            return pages
+        cursor = page.next_cursor
+
+
+def _filters(**values):
+    defaults = {'source': '', 'sentiment': '', 'time_filter': 'all', 'kind': 'all', 'search': ''}
+    defaults.update(values)
+    return ReviewFilters(**defaults)
+
+
+def test_date_pages_cover_every_review_once_in_order(app):
+    # Одинаковые даты (порядок по id), записи без даты - в конце
+    for i in range(7):
+        _add(f'd{i}', NOW - timedelta(hours=i // 2))
+    _add('u0')
+    _add('u1')
+    db.session.commit()
+    # default=utcnow подставляет дату при вставке: старые записи без даты - через UPDATE
+    Review.query.filter(Review.source_id.in_(['u0', 'u1'])).update(
+        {'collected_date': None}, synchronize_session=False)
+    db.session.commit()
+
+    pages = _walk(Review.query, per_page=3)
+
+    assert pages == [['d1', 'd0', 'd3'], ['d2', 'd5', 'd4'], ['d6', 'u1', 'u0']]
+
+
+def test_cursor_is_stable_when_new_reviews_arrive(app):
+    for i in range(4):
+        _add(f'd{i}', NOW - timedelta(hours=i))
+    db.session.commit()
+
+    first = keyset_page(Review.query, per_page=2)
+    _add('new', NOW + timedelta(hours=1))
+    db.session.commit()
+    second = keyset_page(Review.query, first.next_cursor, per_page=2)
+
+    assert [r.source_id for r in first.items] == ['d0', 'd1']
+    assert [r.source_id for r in second.items] == ['d2', 'd3']
+    assert not second.has_more
+
+
+def test_rank_pages_follow_relevance(app):
+    install_for_engine(db.engine)
+    _add('weak', text='Жалоба на счет, где-то упомянули свет среди прочего текста про оплату и квитанции')
+    _add('strong', text='Свет, свет и снова свет')
+    _add('other', text='Газ')
+    db.session.commit()
+
+    query, rank = filter_reviews(_filters(search='свет'))
+
+    assert _walk(query, per_page=1, rank=rank) == [['strong'], ['weak']]
+
+
+def test_cursor_errors():
+    with pytest.raises(InvalidCursor):
+        decode_cursor('не-курсор', 'd')
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor('r', 1.5, 10), 'd')
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor('d', 'вчера', 10), 'd')
+
+    assert decode_cursor(encode_cursor('d', NOW, 10), 'd') == (NOW, 10)
+    assert decode_cursor(encode_cursor('d', None, 3), 'd') == (None, 3)
+
+
+def test_filters_and_rollup_total(app):
+    _add('1')
+    _add('2', source='telegram', is_comment=True)
+    _add('3', sentiment_label='negative', collected_date=NOW - timedelta(days=3))
+    db.session.commit()
+
+    def ids(filters):
+        query, _ = filter_reviews(filters, now=NOW)
+        return sorted(review.source_id for review in query)
+
+    assert ids(_filters(source='vk')) == ['1', '3']
+    assert ids(_filters(kind='comments')) == ['2']
+    assert ids(_filters(kind='posts')) == ['1', '3']
+    assert ids(_filters(sentiment='negative')) == ['3']
+    assert ids(_filters(time_filter='day')) == ['1', '2']
+
+    assert approximate_total(_filters(source='vk')) == (2, False)
+    assert approximate_total(_filters(time_filter='day'), now=NOW) == (2, True)
+    assert approximate_total(_filters(search='свет')) == (None, False)
@@ -0,0 +1,101 @@
+"""
+review_rollups: ведение агрегатов при изменениях через ORM и пересчет
+"""
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from models import db, Review, ReviewRollup
+from utils.review_rollups import UNDATED_BUCKET, estimate_count, rebuild_rollups
+
+COLLECTED = datetime(2024, 5, 1, 10, 45)
+BUCKET = datetime(2024, 5, 1, 10)
+
+
+def _rollups():
+    return {
+        (row.bucket, row.source, row.sentiment_label, row.is_comment): row.count
+        for row in ReviewRollup.query.all()
+    }
+
+
+def _add(source_id, **fields):
+    values = {'source': 'vk', 'source_id': source_id, 'text': 'текст', 'sentiment_label': 'neutral',
+              'collected_date': COLLECTED, 'is_comment': False}
+    values.update(fields)
+    review = Review(**values)
+    db.session.add(review)
+    return review
+
+
+def test_insert_and_delete(app):
+    _add('1')
+    _add('2', is_comment=True)
+    db.session.commit()
+    assert _rollups() == {(BUCKET, 'vk', 'neutral', False): 1, (BUCKET, 'vk', 'neutral', True): 1}
+
+    db.session.delete(db.session.get(Review, 1))
+    db.session.commit()
+    assert _rollups() == {(BUCKET, 'vk', 'neutral', True): 1}
+
+
+def test_key_change_moves_count_even_if_old_value_was_not_loaded(app):
+    _add('1')
+    _add('2')
+    db.session.commit()
+
+    # После commit атрибуты просрочены: прежнее значение берется запросом к БД
+    review = db.session.get(Review, 1)
+    db.session.expire(review)
+    review.sentiment_label = 'negative'
+    db.session.commit()
+
+    assert _rollups() == {(BUCKET, 'vk', 'neutral', False): 1, (BUCKET, 'vk', 'negative', False): 1}
+
+
+def test_changes_within_one_transaction_are_counted_once(app):
+    review = _add('1')
+    db.session.flush()
+    review.source = 'telegram'
+    db.session.flush()
+    review.sentiment_label = 'positive'
+    db.session.commit()
+
+    assert _rollups() == {(BUCKET, 'telegram', 'positive', False): 1}
+
+
+def test_other_sessions_are_not_tracked(app):
+    with Session(db.engine) as session:
+        session.add(Review(source='vk', source_id='1', text='текст', collected_date=COLLECTED))
+        session.commit()
+
+    assert _rollups() == {}
+
+
+def test_rebuild_matches_incremental_counts(app):
+    _add('1')
+    _add('2', sentiment_label='negative', collected_date=datetime(2024, 5, 2, 0, 5))
+    _add('3', source='news', is_comment=True)
+    db.session.commit()
+    db.session.execute(db.text("UPDATE reviews SET collected_date = NULL WHERE source_id = '3'"))
+    incremental = _rollups()
+
+    assert rebuild_rollups() == 3
+    rebuilt = _rollups()
+
+    assert rebuilt[(UNDATED_BUCKET, 'news', 'neutral', True)] == 1
+    assert {key: count for key, count in rebuilt.items() if key[1] == 'vk'} == \
+        {key: count for key, count in incremental.items() if key[1] == 'vk'}
+
+
+def test_estimate_count(app):
+    _add('1')
+    _add('2', sentiment_label='negative', collected_date=datetime(2024, 5, 1, 12))
+    _add('3', source='news')
+    db.session.commit()
+
+    assert estimate_count() == 3
+    assert estimate_count(source='vk') == 2
+    assert estimate_count(sentiment='negative') == 1
+    assert estimate_count(is_comment=True) == 0
+    assert estimate_count(since=datetime(2024, 5, 1, 11, 30)) == 1
@@ -0,0 +1,83 @@
+"""
+Полнотекстовый поиск по отзывам: запрос MATCH, индекс FTS5 и запасной LIKE
+"""
+import pytest
+
+from models import db, Review
+from utils import review_search
+from utils.review_search import build_match_query, install_for_engine, text_search
+
+
+@pytest.fixture
+def indexed(app):
+    assert install_for_engine(db.engine)
+    return app
+
+
+def _add(source_id, text):
+    db.session.add(Review(source='vk', source_id=source_id, text=text))
+    db.session.commit()
+
+
+def _found(search):
+    query, _ = text_search(Review.query, search)
+    return sorted(review.source_id for review in query)
+
+
+def test_match_query_quotes_each_stemmed_word():
+    assert build_match_query('Отключили СВЕТ') == '"отключ"* "свет"*'
+    assert build_match_query('ёлка') == build_match_query('елка')
+    assert build_match_query('tns 52') == '"tns"* "52"*'
+    assert build_match_query('  ,.!  ') is None
+
+
+def test_match_query_drops_operators_and_limits_terms():
+    assert build_match_query('свет" OR "газ') == '"свет"* "or"* "газ"*'
+    assert len(build_match_query(' '.join(['слово'] * 20)).split()) == review_search.MAX_QUERY_TERMS
+
+
+def test_index_finds_inflected_forms(indexed):
+    _add('1', 'Опять отключение света на Бору')
+    _add('2', 'Свет отключили без предупреждения')
+    _add('3', 'Счет за газ пришел вовремя')
+
+    assert _found('отключили свет') == ['1', '2']
+    assert _found('газ') == ['3']
+    assert _found('вода') == []
+
+
+def test_index_folds_yo_and_case(indexed):
+    _add('1', 'Ещё раз пересчитали ЗАДОЛЖЕННОСТЬ')
+
+    assert _found('еще задолженность') == ['1']
+
+
+def test_index_follows_updates_and_deletes(indexed):
+    _add('1', 'Свет отключили')
+    review = Review.query.filter_by(source_id='1').one()
+
+    review.text = 'Счет пришел вовремя'
+    db.session.commit()
+    assert _found('свет') == []
+    assert _found('счет') == ['1']
+
+    db.session.delete(review)
+    db.session.commit()
+    assert _found('счет') == []
+
+
+def test_rank_orders_by_relevance(indexed):
+    _add('1', 'Свет, свет и снова свет отключили')
+    _add('2', 'Жалоба на счет, где-то упомянули свет среди прочего текста про оплату и квитанции')
+
+    query, rank = text_search(Review.query, 'свет')
+    assert rank is not None
+    assert [review.source_id for review in query.order_by(rank)] == ['1', '2']
+
+
+def test_without_index_falls_back_to_like(app):
+    _add('1', 'Свет отключили')
+
+    query, rank = text_search(Review.query, 'отключили')
+    assert rank is None
+    assert [review.source_id for review in query] == ['1']
@@ -0,0 +1,84 @@
+"""
+ReviewStore: дедупликация пачки и массовая вставка
+"""
+from datetime import datetime
+
+from models import db, Review, ReviewRollup
+from utils.review_store import ReviewStore
+
+
+def _review(source_id, **fields):
+    row = {'source': 'vk', 'source_id': source_id, 'text': f'Отзыв {source_id}', 'sentiment_label': 'neutral'}
+    row.update(fields)
+    return row
+
+
+def test_split_new_skips_saved_and_repeated(app):
+    db.session.add(Review(**_review('vk_1')))
+    db.session.commit()
+
+    store = ReviewStore()
+    new_reviews, existing = store.split_new([
+        _review('vk_1'), _review('vk_2'), _review('vk_2', text='повтор'), _review(None), _review('vk_3')
+    ])
+
+    assert [r['source_id'] for r in new_reviews] == ['vk_2', 'vk_3']
+    assert new_reviews[0]['text'] == 'Отзыв vk_2'
+    assert set(existing) == {'vk_1'}
+    assert store.stats['batch_size'] == 5
+    assert store.stats['existing'] == 1
+
+
+def test_find_existing_queries_in_chunks(app):
+    db.session.add_all([Review(**_review(f'vk_{i}')) for i in range(5)])
+    db.session.commit()
+
+    store = ReviewStore(chunk_size=2)
+    existing = store.find_existing([f'vk_{i}' for i in range(7)] + ['vk_0', None])
+
+    assert set(existing) == {f'vk_{i}' for i in range(5)}
+    assert store.stats['lookup_queries'] == 4
+
+
+def test_insert_rows_ignores_conflicts_and_unknown_fields(app):
+    db.session.add(Review(**_review('vk_1')))
+    db.session.commit()
+
+    store = ReviewStore()
+    inserted = store.insert_rows([
+        _review('vk_1', text='уже есть'),
+        _review('vk_2', parent_source_id='vk_1'),
+        _review('vk_3', sentiment_score=-0.5, sentiment_label='negative'),
+    ])
+    db.session.commit()
+
+    assert inserted == 2
+    assert store.stats['inserted'] == 2
+    assert Review.query.filter_by(source_id='vk_1').one().text == 'Отзыв vk_1'
+    assert Review.query.filter_by(source_id='vk_3').one().sentiment_score == -0.5
+
+
+def test_insert_rows_counts_only_inserted_rows_in_rollups(app):
+    collected = datetime(2024, 5, 1, 10, 30)
+    db.session.add(Review(**_review('vk_1', collected_date=collected)))
+    db.session.commit()
+
+    ReviewStore().insert_rows([
+        _review('vk_1', collected_date=collected),
+        _review('vk_2', collected_date=collected),
+        _review('vk_3', collected_date=collected, sentiment_label='negative'),
+    ])
+    db.session.commit()
+
+    counts = {
+        (row.bucket, row.sentiment_label): row.count
+        for row in ReviewRollup.query.all()
+    }
+    assert counts == {
+        (datetime(2024, 5, 1, 10), 'neutral'): 2,
+        (datetime(2024, 5, 1, 10), 'negative'): 1,
+    }
+
+
+def test_insert_rows_empty(app):
+    assert ReviewStore().insert_rows([]) == 0
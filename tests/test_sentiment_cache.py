@@ -0,0 +1,93 @@
+"""
+SentimentCache: ключи по нормализованному тексту, LRU в памяти и SQLite-уровень
+"""
+from analyzers.sentiment_analyzer import SentimentAnalyzer
+from analyzers.sentiment_cache import SentimentCache, normalize_text
+
+RESULT = {'sentiment_score': -0.8, 'sentiment_label': 'negative', 'analyzer': 'rule_based'}
+
+
+def test_key_ignores_whitespace_and_normalization_but_not_case():
+    key = SentimentCache.make_key('rule_based', 'v1', 'Свет  отключили\n опять')
+
+    assert SentimentCache.make_key('rule_based', 'v1', ' Свет отключили опять ') == key
+    assert SentimentCache.make_key('rule_based', 'v1', 'свет отключили опять') != key
+    assert SentimentCache.make_key('rule_based', 'v2', 'Свет отключили опять') != key
+    # й в NFD (и + кратка) и в NFC - один ключ
+    assert normalize_text('\u0438\u0306') == '\u0439'
+
+
+def test_memory_tier_is_lru():
+    cache = SentimentCache(max_size=2)
+    cache.set('a', RESULT)
+    cache.set('b', RESULT)
+    cache.get('a')
+    cache.set('c', RESULT)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == RESULT
+    assert cache.get('c') == RESULT
+    assert cache.stats()['memory_size'] == 2
+
+
+def test_get_returns_copy():
+    cache = SentimentCache()
+    cache.set('a', dict(RESULT))
+    cache.get('a')['sentiment_label'] = 'positive'
+
+    assert cache.get('a')['sentiment_label'] == 'negative'
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / 'cache' / 'sentiment.db')
+    SentimentCache(db_path=path).set('a', RESULT)
+
+    cache = SentimentCache(db_path=path)
+    assert cache.get('a') == RESULT
+    assert cache.get('a') == RESULT
+    assert (cache.disk_hits, cache.memory_hits, cache.misses) == (1, 1, 0)
+
+
+def test_disk_only_when_memory_disabled(tmp_path):
+    cache = SentimentCache(max_size=0, db_path=str(tmp_path / 'sentiment.db'))
+    cache.set('a', RESULT)
+
+    assert cache.get('a') == RESULT
+    assert cache.stats()['memory_size'] == 0
+    assert cache.disk_hits == 1
+
+
+def test_clear_and_stats(tmp_path):
+    cache = SentimentCache(db_path=str(tmp_path / 'sentiment.db'))
+    cache.set('a', RESULT)
+    cache.get('a')
+    cache.get('b')
+    assert cache.stats()['hit_rate'] == 0.5
+
+    cache.clear()
+    assert cache.get('a') is None
+    assert cache.stats()['hits'] == 0
+
+
+def test_analyzer_scores_repeated_texts_once():
+    cache = SentimentCache()
+    analyzer = SentimentAnalyzer(cache=cache)
+    texts = ['Ужасная служба, опять отключили свет', 'ужасная  служба, опять отключили свет', 'Спасибо, быстро починили']
+
+    first = analyzer.analyze_sentiments(texts)
+    assert cache.misses == 3
+    assert cache.stats()['memory_size'] == 3
+
+    second = analyzer.analyze_sentiments(texts)
+    assert second == first
+    assert cache.hits == 3
+    assert analyzer.analyze(texts[0]) == first[0]
+
+
+def test_analyzer_does_not_cache_fallback_results():
+    cache = SentimentCache()
+    analyzer = SentimentAnalyzer(cache=cache)
+    key = analyzer._cache_key('текст')
+
+    analyzer._cache_store(key, dict(RESULT, analyzer='other'))
+    assert cache.get(key) is None
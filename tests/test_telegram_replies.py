@@ -0,0 +1,81 @@
+"""
+source_id ответов Telegram и слияние накопленных дубликатов
+"""
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from models import db, Review
+from utils.telegram_replies import compact_reply_duplicates, reply_source_id
+
+PARENT = 'telegram_-100_42'
+POSTED = datetime(2024, 5, 1, 12)
+
+
+def _reply(source_id, text='Когда дадут свет?', author_id='7', published_date=POSTED):
+    review = Review(source='telegram', source_id=source_id, text=text, author_id=author_id,
+                    published_date=published_date, sentiment_label='neutral', is_comment=True)
+    db.session.add(review)
+    return review
+
+
+def test_reply_source_id_formats():
+    assert reply_source_id(PARENT, 1234) == f'{PARENT}_reply_1234'
+
+    by_text = reply_source_id(PARENT, text='Когда дадут свет?')
+    assert by_text.startswith(f'{PARENT}_reply_h')
+    assert len(by_text.rsplit('_reply_', 1)[1]) == 17
+    assert reply_source_id(PARENT, text='Когда дадут свет?') == by_text
+    assert reply_source_id(PARENT, text='Другой текст') != by_text
+
+
+def test_text_id_is_the_same_in_another_process():
+    # Прежний hash(text) менялся от процесса к процессу
+    code = f"from utils.telegram_replies import reply_source_id; print(reply_source_id({PARENT!r}, text='свет'))"
+    other = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                           check=True, cwd=Path(__file__).resolve().parent.parent).stdout.strip()
+
+    assert other == reply_source_id(PARENT, text='свет')
+
+
+def test_compaction_keeps_message_id_row(app):
+    legacy = _reply(f'{PARENT}_reply_-8123456789012345678')
+    hashed = _reply(reply_source_id(PARENT, text='Когда дадут свет?'))
+    by_id = _reply(f'{PARENT}_reply_1234')
+    # Другой автор и другой текст - не дубликаты
+    _reply(f'{PARENT}_reply_1235', author_id='8')
+    _reply(f'{PARENT}_reply_1236', text='Спасибо')
+    db.session.commit()
+    ids = {review.id: review.source_id for review in (legacy, hashed, by_id)}
+
+    assert compact_reply_duplicates() == 2
+    db.session.commit()
+
+    remaining = {review.source_id for review in Review.query}
+    assert remaining == {f'{PARENT}_reply_1234', f'{PARENT}_reply_1235', f'{PARENT}_reply_1236'}
+    # Оставшаяся запись не переименована и не пересоздана
+    assert db.session.get(Review, by_id.id).source_id == ids[by_id.id]
+
+
+def test_compaction_prefers_text_hash_over_legacy(app):
+    _reply(f'{PARENT}_reply_-8123456789012345678')
+    hashed = reply_source_id(PARENT, text='Когда дадут свет?')
+    _reply(hashed)
+    db.session.commit()
+
+    compact_reply_duplicates()
+    db.session.commit()
+
+    assert [review.source_id for review in Review.query] == [hashed]
+
+
+def test_dry_run_deletes_nothing(app):
+    _reply(f'{PARENT}_reply_-8123456789012345678')
+    _reply(f'{PARENT}_reply_1234')
+    db.session.commit()
+
+    assert compact_reply_duplicates(dry_run=True) == 1
+    db.session.commit()
+
+    assert Review.query.count() == 2
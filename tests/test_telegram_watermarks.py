@@ -0,0 +1,61 @@
+"""
+Отметки инкрементальной синхронизации Telegram
+"""
+from datetime import datetime, timedelta, timezone
+
+from models import TelegramWatermark
+from utils.telegram_watermarks import THREAD_WINDOW_DAYS, clear_watermarks, load_watermarks, save_watermarks
+
+NOW = datetime(2024, 5, 1, 12)
+
+
+def test_round_trip(app):
+    posted = NOW - timedelta(days=1)
+
+    save_watermarks({-100: (500, {42: (7, posted), 43: (0, None)})}, now=NOW)
+
+    assert load_watermarks(now=NOW) == {-100: (500, {42: (7, posted), 43: (0, None)})}
+
+
+def test_marks_only_grow(app):
+    posted = NOW - timedelta(days=1)
+    save_watermarks({-100: (500, {42: (7, posted)})}, now=NOW)
+
+    # Повторный прогон с устаревшими отметками (например, пустая выдача) не откатывает их
+    save_watermarks({-100: (300, {42: (3, None)})}, now=NOW)
+    save_watermarks({-100: (800, {42: (9, None)})}, now=NOW)
+
+    assert load_watermarks(now=NOW) == {-100: (800, {42: (9, posted)})}
+
+
+def test_old_threads_are_dropped(app):
+    old = NOW - timedelta(days=THREAD_WINDOW_DAYS + 1)
+    fresh = NOW - timedelta(days=1)
+    save_watermarks({-100: (500, {1: (5, old), 2: (6, fresh)}), -200: (10, {3: (1, old)})}, now=NOW)
+
+    # Устаревшая ветка не возвращается, даже пока строка еще есть
+    assert load_watermarks(now=NOW)[-100] == (500, {2: (6, fresh)})
+
+    # Следующее сохранение канала удаляет ветки вне окна; другой канал не трогается
+    save_watermarks({-100: (600, {})}, now=NOW)
+    threads = {
+        (row.channel_id, row.thread_id) for row in TelegramWatermark.query.filter(TelegramWatermark.thread_id != 0)
+    }
+
+    assert threads == {(-100, 2), (-200, 3)}
+
+
+def test_aware_dates_are_stored_as_naive_utc(app):
+    posted = datetime(2024, 4, 30, 15, tzinfo=timezone(timedelta(hours=3)))
+
+    save_watermarks({-100: (1, {42: (1, posted)})}, now=NOW)
+
+    assert load_watermarks(now=NOW)[-100][1][42] == (1, datetime(2024, 4, 30, 12))
+
+
+def test_clear(app):
+    save_watermarks({-100: (500, {})}, now=NOW)
+
+    clear_watermarks()
+
+    assert load_watermarks(now=NOW) == {}
@@ -0,0 +1,109 @@
+"""
+VKFetchEngine: упаковка в execute, догрузка комментариев и повтор при лимите
+"""
+import json
+import re
+
+import pytest
+
+vk_api = pytest.importorskip('vk_api')
+
+from collectors.vk_fetch import EXECUTE_LIMIT, VKFetchEngine
+
+
+class FakeSession:
+    """
+    vk_api.VkApi без сети: wall.getComments отдает comments[post][offset:offset+count]
+
+    errors - очередь кодов ошибок, которые вернут ближайшие запросы.
+    """
+
+    def __init__(self, comments, errors=()):
+        self.comments = comments
+        self.errors = list(errors)
+        self.requests = []
+
+    def _comments(self, params):
+        items = self.comments[(params['owner_id'], params['post_id'])]
+        offset = params['offset']
+        return {
+            'count': len(items),
+            'current_level_count': len(items),
+            'items': items[offset:offset + params['count']],
+        }
+
+    def method(self, method, params):
+        self.requests.append(method)
+        if self.errors:
+            code = self.errors.pop(0)
+            raise vk_api.ApiError(self, method, params, {}, {'error_code': code, 'error_msg': 'fake'})
+
+        if method == 'wall.getComments':
+            return self._comments(params)
+        assert method == 'execute'
+        calls = re.findall(r'API\.wall\.getComments\((\{.*?\})\)', params['code'])
+        return [self._comments(json.loads(call)) for call in calls]
+
+
+def _engine(session):
+    # Высокая частота - тесты не ждут ведро
+    return VKFetchEngine(session, requests_per_second=1000)
+
+
+def test_comment_pages_follow_offsets():
+    session = FakeSession({
+        (-1, 10): list(range(250)),
+        (-1, 11): list(range(30)),
+        (-1, 12): [],
+    })
+
+    pages = _engine(session).wall_comments([(-1, 10), (-1, 11), (-1, 12)], max_comments=1000)
+
+    assert [item for page in pages[(-1, 10)] for item in page['items']] == list(range(250))
+    assert [item for page in pages[(-1, 11)] for item in page['items']] == list(range(30))
+    assert len(pages[(-1, 12)]) == 1
+    # Первые страницы трех постов - один execute, затем по одному запросу на вторую и третью страницы поста 10
+    assert session.requests == ['execute', 'wall.getComments', 'wall.getComments']
+
+
+def test_max_comments_limits_paging():
+    session = FakeSession({(-1, 10): list(range(500))})
+
+    pages = _engine(session).wall_comments([(-1, 10)], max_comments=150)
+
+    assert len(pages[(-1, 10)]) == 2
+
+
+def test_batch_splits_into_execute_chunks():
+    posts = {(-1, post_id): [post_id] for post_id in range(EXECUTE_LIMIT + 5)}
+    session = FakeSession(posts)
+    engine = _engine(session)
+
+    results = engine.batch('wall.getComments', [
+        {'owner_id': owner_id, 'post_id': post_id, 'offset': 0, 'count': 100}
+        for owner_id, post_id in posts
+    ])
+
+    assert [result['items'] for result in results] == [[post_id] for _, post_id in posts]
+    assert session.requests == ['execute', 'execute']
+    assert engine.stats['calls'] == EXECUTE_LIMIT + 5
+
+
+def test_rate_limit_error_is_retried():
+    session = FakeSession({(-1, 10): [1, 2]}, errors=[6])
+    engine = _engine(session)
+
+    result = engine.call('wall.getComments', owner_id=-1, post_id=10, offset=0, count=100)
+
+    assert result['items'] == [1, 2]
+    assert engine.stats['requests'] == 2
+
+
+def test_failed_batch_returns_none_per_call():
+    session = FakeSession({}, errors=[5])
+    engine = _engine(session)
+
+    results = engine.batch('wall.getComments', [{'owner_id': -1, 'post_id': 1}, {'owner_id': -1, 'post_id': 2}])
+
+    assert results == [None, None]
+    assert engine.stats['failed_calls'] == 2
@@ -0,0 +1,251 @@
+"""
+Пул прогретых браузеров для Selenium-коллекторов
+Запуск браузера занимал большую часть цикла Дзена и OK: теперь браузеры
+живут между циклами, у каждого свой профиль (cookies сохраняются при
+перезапуске), а после max_pages страниц или падения браузер пересоздается
+"""
+import atexit
+import glob
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from config import Config
+from utils.webdriver_helper import (
+    block_heavy_resources,
+    create_chrome_driver,
+    create_edge_driver,
+    hide_webdriver_signature,
+)
+
+logger = logging.getLogger(__name__)
+
+FACTORIES = {
+    'chrome': create_chrome_driver,
+    'edge': create_edge_driver,
+}
+
+# Таймауты драйвера: загрузка страницы и неявное ожидание элементов, секунд
+PAGE_LOAD_TIMEOUT = 30
+IMPLICIT_WAIT = 10
+
+
+class BrowserUnavailable(Exception):
+    """Не удалось запустить браузер или дождаться свободного"""
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_stale_profiles():
+    """
+    Удалить профили браузеров завершенных процессов
+
+    Returns:
+        Количество удаленных каталогов
+    """
+    removed = 0
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), 'tns_browser_*_pid*')):
+        pid = path.rsplit('_pid', 1)[1]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info(f"[BROWSER] Удалено профилей завершенных процессов: {removed}")
+    return removed
+
+
+class _Slot:
+    """Место в пуле: драйвер, его профиль и счетчик открытых страниц"""
+
+    def __init__(self, index, profile_dir):
+        self.index = index
+        self.profile_dir = profile_dir
+        self.driver = None
+        self.pages = 0
+
+
+class BrowserPool:
+    """
+    Пул headless-браузеров
+
+    Драйверы выдаются через контекстный менеджер driver() (или acquire/release);
+    браузер запускается при первой выдаче слота и переиспользуется. Страницы
+    открываются со стратегией eager, картинки/шрифты/медиа блокируются через CDP.
+
+    Args:
+        browser: 'chrome' или 'edge'
+        size: Браузеров в пуле (Config.BROWSER_POOL_SIZE)
+        max_pages: Страниц до перезапуска браузера (Config.BROWSER_MAX_PAGES)
+        block_resources: Блокировать тяжелые ресурсы (Config.BROWSER_BLOCK_RESOURCES)
+        headless: Без окна
+    """
+
+    def __init__(self, browser='chrome', size=None, max_pages=None, block_resources=None, headless=True):
+        self.browser = browser
+        self.factory = FACTORIES[browser]
+        self.size = size or Config.BROWSER_POOL_SIZE
+        self.max_pages = max_pages or Config.BROWSER_MAX_PAGES
+        self.block_resources = Config.BROWSER_BLOCK_RESOURCES if block_resources is None else block_resources
+        self.headless = headless
+
+        self._slots = {}
+        self._free = queue.LifoQueue()
+        for index in range(self.size):
+            profile_dir = os.path.join(tempfile.gettempdir(), f'tns_browser_{browser}_{index}_pid{os.getpid()}')
+            self._free.put(_Slot(index, profile_dir))
+        self.started = 0
+        self.recycled = 0
+
+    def _start(self, slot=None, proxy=None):
+        driver = self.factory(
+            headless=self.headless, user_data_dir=slot.profile_dir if slot else None, proxy=proxy
+        )
+        if driver is None:
+            raise BrowserUnavailable(f"Не удалось запустить {self.browser}")
+
+        hide_webdriver_signature(driver)
+        if self.block_resources:
+            block_heavy_resources(driver)
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        driver.implicitly_wait(IMPLICIT_WAIT)
+
+        self.started += 1
+        if slot is not None:
+            # Счетчик страниц для перезапуска: переходы идут через driver.get
+            open_page = driver.get
+
+            def get(url):
+                slot.pages += 1
+                return open_page(url)
+
+            driver.get = get
+            slot.driver = driver
+            slot.pages = 0
+            logger.info(f"[BROWSER] Запущен {self.browser} #{slot.index}")
+        return driver
+
+    @staticmethod
+    def _alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"[BROWSER] Ошибка закрытия браузера: {e}")
+
+    def acquire(self, timeout=None):
+        """
+        Свободный прогретый драйвер (ждет, если все заняты)
+
+        Raises:
+            BrowserUnavailable: браузер не запустился или не освободился за timeout
+        """
+        try:
+            slot = self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise BrowserUnavailable(f"Нет свободного {self.browser} за {timeout} с")
+
+        try:
+            if slot.driver is not None and not self._alive(slot.driver):
+                logger.warning(f"[BROWSER] {self.browser} #{slot.index} не отвечает, перезапуск")
+                self._quit(slot.driver)
+                slot.driver = None
+            if slot.driver is None:
+                self._start(slot)
+        except Exception:
+            self._free.put(slot)
+            raise
+
+        self._slots[id(slot.driver)] = slot
+        return slot.driver
+
+    def release(self, driver, failed=False):
+        """
+        Вернуть драйвер в пул
+
+        Args:
+            failed: Браузер упал - закрыть и запустить заново при следующей выдаче
+        """
+        slot = self._slots.pop(id(driver), None)
+        if slot is None:
+            return
+
+        if failed or slot.pages >= self.max_pages or not self._alive(driver):
+            logger.info(f"[BROWSER] Перезапуск {self.browser} #{slot.index} после {slot.pages} страниц")
+            self._quit(driver)
+            slot.driver = None
+            self.recycled += 1
+        self._free.put(slot)
+
+    @contextmanager
+    def driver(self, proxy=None, timeout=None):
+        """
+        Драйвер на время блока with
+
+        С proxy запускается отдельный браузер, который закрывается после блока
+        (прокси задается только при запуске). Если браузер после блока
+        не отвечает, он перезапускается.
+        """
+        if proxy:
+            driver = self._start(proxy=proxy)
+            try:
+                yield driver
+            finally:
+                self._quit(driver)
+            return
+
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Закрыть все браузеры и удалить профили"""
+        for slot in list(self._slots.values()):
+            self._free.put(slot)
+        self._slots.clear()
+
+        while True:
+            try:
+                slot = self._free.get_nowait()
+            except queue.Empty:
+                break
+            if slot.driver is not None:
+                self._quit(slot.driver)
+            shutil.rmtree(slot.profile_dir, ignore_errors=True)
+
+        logger.info(f"[BROWSER] Пул {self.browser} закрыт: запусков {self.started}, перезапусков {self.recycled}")
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_browser_pool(browser='chrome'):
+    """Общий пул процесса для браузера, закрывается при выходе"""
+    with _pools_lock:
+        if browser not in _pools:
+            if not _pools:
+                cleanup_stale_profiles()
+            _pools[browser] = BrowserPool(browser)
+            atexit.register(_pools[browser].close)
+        return _pools[browser]
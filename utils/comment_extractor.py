@@ -0,0 +1,146 @@
+"""
+Извлечение комментариев со страниц статей через lxml
+Селекторы сайтов компилируются в XPath один раз; кандидаты всех селекторов
+находятся за один обход дерева, а страницы без разметки комментариев не разбираются
+"""
+import logging
+
+import lxml.html
+from cssselect import GenericTranslator
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+_translator = GenericTranslator()
+
+# Текст элемента как у BeautifulSoup.get_text(strip=True): без script/style и HTML-комментариев
+_TEXT_NODES = etree.XPath('descendant-or-self::text()[not(parent::script or parent::style)]')
+
+
+def _class_contains_xpath(tags, words):
+    """Первый потомок с тегом из tags, в class которого есть одно из words (без учета регистра)"""
+    lowered = "translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+    tag_test = ' or '.join(f'self::{tag}' for tag in tags)
+    class_test = ' or '.join(f"contains({lowered}, '{word}')" for word in words)
+    return etree.XPath(f'(descendant::*[{tag_test}][@class and ({class_test})])[1]')
+
+
+def element_text(element):
+    """Текст элемента с обрезанными фрагментами, склеенными без разделителя"""
+    return ''.join(part.strip() for part in _TEXT_NODES(element))
+
+
+class CommentSelectors:
+    """
+    Селекторы комментариев одного сайта
+
+    Args:
+        containers: CSS-селекторы блока комментария в порядке приоритета;
+            используется первый, давший хотя бы один комментарий
+        text_classes: Подстроки class элемента с текстом внутри блока (p/div);
+            без него или если не найден - текст всего блока
+        author_classes: Подстроки class элемента с автором (span/a/div)
+        limit: Сколько блоков одного селектора разбирать
+        min_length: Более короткие тексты пропускаются
+        markers: Строки, которые обязательно есть в атрибутах блока комментария:
+            страница без них не разбирается вовсе, а в дереве селекторы
+            проверяются только у элементов с такими атрибутами
+    """
+
+    def __init__(self, containers, text_classes=None, author_classes=(), limit=20, min_length=10,
+                 markers=('comment',)):
+        self.containers = list(containers)
+        self.limit = limit
+        self.min_length = min_length
+        self.markers = tuple(markers)
+        self._byte_markers = tuple(marker.encode('utf-8') for marker in self.markers)
+
+        tests = [_translator.css_to_xpath(css, prefix='self::') for css in self.containers]
+        # Один обход: элемент - кандидат, если подходит под любой из селекторов;
+        # дешевая проверка маркеров в атрибутах отсекает почти все элементы до селекторов
+        marker_test = ' or '.join(f"contains(., '{marker}')" for marker in self.markers)
+        self._candidates = etree.XPath(
+            f'descendant-or-self::*[@*[{marker_test}]]['
+            + ' or '.join(f'({test})' for test in tests) + ']'
+        )
+        self._tests = [etree.XPath(test) for test in tests]
+        self._text = _class_contains_xpath(('p', 'div'), text_classes) if text_classes else None
+        self._author = _class_contains_xpath(('span', 'a', 'div'), author_classes) if author_classes else None
+
+    def _parse(self, html):
+        markers = self._byte_markers if isinstance(html, bytes) else self.markers
+        if not html or not any(marker in html for marker in markers):
+            return None
+        # Строку с объявлением кодировки XML lxml не принимает - разбираем байты
+        if isinstance(html, str) and html.lstrip().startswith('<?xml'):
+            html = html.encode('utf-8')
+        try:
+            return lxml.html.document_fromstring(html)
+        except etree.ParserError as e:
+            logger.debug(f"Не удалось разобрать HTML: {e}")
+            return None
+
+    def _comment(self, element):
+        text_element = self._text(element) if self._text is not None else None
+        text = element_text(text_element[0] if text_element else element)
+        if len(text) < self.min_length:
+            return None
+
+        author_element = self._author(element) if self._author is not None else None
+        author = element_text(author_element[0]) if author_element else None
+        return text, author
+
+    def extract(self, html):
+        """
+        Комментарии страницы
+
+        Args:
+            html: Страница (str или bytes)
+
+        Returns:
+            Список (текст, автор или None)
+        """
+        root = self._parse(html)
+        if root is None:
+            return []
+
+        groups = [[] for _ in self.containers]
+        for element in self._candidates(root):
+            for test, group in zip(self._tests, groups):
+                if len(group) < self.limit and test(element):
+                    group.append(element)
+
+        for group in groups:
+            comments = [comment for comment in map(self._comment, group) if comment]
+            if comments:
+                return comments
+        return []
+
+
+# Селекторы по сайтам; коллектор берет свой набор по имени
+SITE_SELECTORS = {
+    'news': CommentSelectors(
+        containers=[
+            f'{tag}{selector}'
+            for selector in ('.comment', '.comment-item', '.comment-body', '.comment-content',
+                             '.user-comment', '#comments', '.comments', '.comment-list')
+            for tag in ('div', 'li')
+        ],
+        text_classes=('text', 'content'),
+        author_classes=('author', 'user'),
+        limit=20,
+    ),
+    'zen': CommentSelectors(
+        containers=[
+            f'div{selector}, li{selector}, article{selector}'
+            for selector in ('.comment', '.comments-item', '[data-testid="comment"]', '.mg-comment')
+        ],
+        author_classes=('author',),
+        limit=30,
+    ),
+}
+
+
+def extract_comments(site, html):
+    """Комментарии страницы по селекторам сайта из SITE_SELECTORS"""
+    return SITE_SELECTORS[site].extract(html)
@@ -3,6 +3,7 @@
 Обеспечивает правильную связь между постами и комментариями
 """
 from models import Review, db
+from utils.review_store import SQLITE_MAX_VARIABLES
 import logging
 
 logger = logging.getLogger(__name__)
@@ -117,7 +118,8 @@ class CommentHelper:
         valid_fields = {
             'source', 'source_id', 'author', 'author_id', 'text', 'url',
             'published_date', 'collected_date', 'parent_id', 'is_comment',
-            'sentiment_score', 'sentiment_label', 'keywords',
+            'sentiment_score', 'sentiment_label', 'sentiment_analyzer',
+            'sentiment_model_version', 'keywords',
             'is_moderated', 'moderation_status', 'moderation_reason',
             'requires_manual_review', 'processed', 'processed_date'
         }
@@ -233,11 +235,112 @@ class CommentHelper:
                 'avg_sentiment': 0.0
             }
     
+    @staticmethod
+    def _empty_stats():
+        return {
+            'total': 0,
+            'positive': 0,
+            'negative': 0,
+            'neutral': 0,
+            'avg_sentiment': 0.0
+        }
+    
+    @staticmethod
+    def get_comments_for_posts(post_ids, limit=100):
+        """
+        Комментарии к нескольким постам одним оконным запросом
+        
+        Для каждого поста берутся limit последних комментариев
+        (ROW_NUMBER() OVER (PARTITION BY parent_id ORDER BY published_date DESC)),
+        порядок внутри поста - как в get_post_comments.
+        
+        Args:
+            post_ids: Список ID постов
+            limit: Максимальное количество комментариев на пост
+        
+        Returns:
+            Словарь {post_id: [Review]} (для постов без комментариев - пустой список)
+        """
+        result = {post_id: [] for post_id in post_ids}
+        ids = list(result)
+        
+        for i in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            chunk = ids[i:i + SQLITE_MAX_VARIABLES]
+            
+            ranked = db.session.query(
+                Review.id.label('id'),
+                db.func.row_number().over(
+                    partition_by=Review.parent_id,
+                    order_by=Review.published_date.desc()
+                ).label('position')
+            ).filter(
+                Review.parent_id.in_(chunk),
+                Review.is_comment == True
+            ).subquery()
+            
+            comments = Review.query.join(
+                ranked, ranked.c.id == Review.id
+            ).filter(
+                ranked.c.position <= limit
+            ).order_by(Review.parent_id, ranked.c.position).all()
+            
+            for comment in comments:
+                result[comment.parent_id].append(comment)
+        
+        return result
+    
+    @staticmethod
+    def get_comment_stats_batch(post_ids):
+        """
+        Статистика комментариев к нескольким постам одним GROUP BY parent_id, sentiment_label
+        
+        Args:
+            post_ids: Список ID постов
+        
+        Returns:
+            Словарь {post_id: stats} в формате get_comment_stats
+        """
+        totals = {post_id: [CommentHelper._empty_stats(), 0.0] for post_id in post_ids}
+        ids = list(totals)
+        
+        for i in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            chunk = ids[i:i + SQLITE_MAX_VARIABLES]
+            
+            rows = db.session.query(
+                Review.parent_id,
+                Review.sentiment_label,
+                db.func.count(Review.id),
+                db.func.sum(db.func.coalesce(Review.sentiment_score, 0.0))
+            ).filter(
+                Review.parent_id.in_(chunk),
+                Review.is_comment == True
+            ).group_by(Review.parent_id, Review.sentiment_label).all()
+            
+            for parent_id, label, count, score_sum in rows:
+                entry = totals[parent_id]
+                stats = entry[0]
+                label = label or 'neutral'
+                if label in ('positive', 'negative', 'neutral'):
+                    stats[label] += count
+                stats['total'] += count
+                entry[1] += score_sum or 0.0
+        
+        result = {}
+        for post_id, (stats, score_sum) in totals.items():
+            if stats['total']:
+                stats['avg_sentiment'] = round(score_sum / stats['total'], 3)
+            result[post_id] = stats
+        
+        return result
+    
     @staticmethod
     def get_posts_with_comments(source=None, limit=50):
         """
         Получить посты вместе с их комментариями
         
+        Три запроса вместо 2N+1: посты, комментарии всех постов
+        (get_comments_for_posts) и их статистика (get_comment_stats_batch).
+        
         Args:
             source: Фильтр по источнику (опционально)
             limit: Максимальное количество постов
@@ -252,19 +355,19 @@ class CommentHelper:
                 query = query.filter_by(source=source)
             
             posts = query.order_by(Review.published_date.desc()).limit(limit).all()
+            post_ids = [post.id for post in posts]
             
-            result = []
-            for post in posts:
-                comments = CommentHelper.get_post_comments(post.id)
-                stats = CommentHelper.get_comment_stats(post.id)
-                
-                result.append({
-                    'post': post,
-                    'comments': comments,
-                    'stats': stats
-                })
+            comments = CommentHelper.get_comments_for_posts(post_ids)
+            stats = CommentHelper.get_comment_stats_batch(post_ids)
             
-            return result
+            return [
+                {
+                    'post': post,
+                    'comments': comments[post.id],
+                    'stats': stats[post.id]
+                }
+                for post in posts
+            ]
             
         except Exception as e:
             logger.error(f"Error getting posts with comments: {e}")
@@ -0,0 +1,131 @@
+"""
+Счетчики дашборда одним запросом
+Условная агрегация по почасовым агрегатам review_rollups и короткий TTL-кэш,
+общий для всех запросов
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func
+
+from config import Config
+from models import db, ReviewRollup
+
+logger = logging.getLogger(__name__)
+
+
+def _day_start(day):
+    return datetime(day.year, day.month, day.day)
+
+
+def compute_dashboard_stats(now=None):
+    """
+    Все счетчики дашборда за один проход по review_rollups
+
+    Один SELECT ... GROUP BY source, sentiment_label, is_comment с SUM(CASE ...)
+    по периодам над почасовыми агрегатами: читается несколько сотен строк
+    вместо всей таблицы reviews. Итоги и разбивки складываются в Python.
+
+    Returns:
+        Словарь: total, today, yesterday, week, by_source, by_sentiment и
+        comments (total, posts, by_source, by_sentiment - только комментарии)
+    """
+    now = now or datetime.utcnow()
+    today_start = _day_start(now.date())
+    tomorrow_start = today_start + timedelta(days=1)
+    yesterday_start = today_start - timedelta(days=1)
+    week_start = today_start - timedelta(days=7)
+
+    def count_between(start, end=None):
+        condition = ReviewRollup.bucket >= start
+        if end is not None:
+            condition = condition & (ReviewRollup.bucket < end)
+        return func.coalesce(func.sum(case((condition, ReviewRollup.count), else_=0)), 0)
+
+    rows = db.session.query(
+        ReviewRollup.source,
+        ReviewRollup.sentiment_label,
+        ReviewRollup.is_comment,
+        func.sum(ReviewRollup.count),
+        count_between(today_start, tomorrow_start),
+        count_between(yesterday_start, today_start),
+        count_between(week_start)
+    ).group_by(ReviewRollup.source, ReviewRollup.sentiment_label, ReviewRollup.is_comment).all()
+
+    stats = {
+        'total': 0,
+        'today': 0,
+        'yesterday': 0,
+        'week': 0,
+        'by_source': {},
+        'by_sentiment': {},
+        'comments': {
+            'total': 0,
+            'posts': 0,
+            'by_source': {},
+            'by_sentiment': {}
+        }
+    }
+    comments = stats['comments']
+
+    for source, sentiment_label, is_comment, total, today, yesterday, week in rows:
+        # В агрегатах отсутствие тональности хранится пустой строкой
+        sentiment_label = sentiment_label or None
+
+        stats['total'] += total
+        stats['today'] += today
+        stats['yesterday'] += yesterday
+        stats['week'] += week
+        stats['by_source'][source] = stats['by_source'].get(source, 0) + total
+        stats['by_sentiment'][sentiment_label] = stats['by_sentiment'].get(sentiment_label, 0) + total
+
+        if is_comment:
+            comments['total'] += total
+            comments['by_source'][source] = comments['by_source'].get(source, 0) + total
+            comments['by_sentiment'][sentiment_label] = comments['by_sentiment'].get(sentiment_label, 0) + total
+        else:
+            comments['posts'] += total
+
+    return stats
+
+
+class DashboardStatsCache:
+    """
+    Результат compute_dashboard_stats, общий для всех запросов на ttl секунд
+
+    Одновременные запросы после истечения TTL считают статистику один раз:
+    остальные ждут на блокировке и получают свежий результат.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = Config.DASHBOARD_STATS_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires_at = 0.0
+
+    def get(self):
+        """Статистика из кэша или свежая (должна вызываться внутри app_context)"""
+        if self._value is not None and time.monotonic() < self._expires_at:
+            return self._value
+
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                return self._value
+
+            started = time.perf_counter()
+            self._value = compute_dashboard_stats()
+            self._expires_at = time.monotonic() + self.ttl
+            logger.debug(f"[STATS] Счетчики дашборда посчитаны за {(time.perf_counter() - started) * 1000:.1f} мс")
+
+            return self._value
+
+    def invalidate(self):
+        """Сбросить кэш (после удаления или массовой загрузки данных)"""
+        with self._lock:
+            self._value = None
+            self._expires_at = 0.0
+
+
+dashboard_stats = DashboardStatsCache()
@@ -0,0 +1,193 @@
+"""
+Кэш HTTP-ответов с условной перепроверкой (ETag / Last-Modified)
+Тела хранятся в SQLite-файле с вытеснением давно не запрошенных страниц по
+суммарному размеру; по хэшу тела неизмененные страницы не разбираются повторно
+"""
+import copy
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# После вытеснения кэш занимает не больше этой доли лимита (запас до следующей чистки)
+EVICT_TO = 0.9
+
+CacheEntry = namedtuple('CacheEntry', ['url', 'etag', 'last_modified', 'content_hash', 'body', 'encoding'])
+
+
+def body_hash(content):
+    """blake2b-хэш тела ответа"""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class HttpCache:
+    """
+    Постоянный кэш ответов по URL
+
+    Args:
+        db_path: Путь к SQLite-файлу
+        max_bytes: Лимит суммарного размера тел; сверх него удаляются давно не запрошенные
+    """
+
+    def __init__(self, db_path, max_bytes):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = 0
+        self.evicted = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS http_cache ('
+            'url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT NOT NULL, '
+            'body BLOB NOT NULL, encoding TEXT, size INTEGER NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_http_cache_accessed ON http_cache (accessed_at)')
+        self._conn.commit()
+        self._size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache').fetchone()[0]
+        logger.info(f"[HTTP CACHE] {db_path}: {self._size / 1024 / 1024:.1f} МБ")
+
+    def get(self, url):
+        """Запись для URL или None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, etag, last_modified, content_hash, body, encoding FROM http_cache WHERE url = ?',
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE http_cache SET accessed_at = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+            return CacheEntry(*row)
+
+    @staticmethod
+    def conditional_headers(entry):
+        """If-None-Match / If-Modified-Since для перепроверки записи"""
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self, url, response, content_hash):
+        """Сохранить ответ 200 и при необходимости вытеснить старые записи"""
+        body = response.content
+        with self._lock:
+            try:
+                old = self._conn.execute('SELECT size FROM http_cache WHERE url = ?', (url,)).fetchone()
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO http_cache '
+                    '(url, etag, last_modified, content_hash, body, encoding, size, accessed_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                     content_hash, body, response.encoding, len(body), time.time())
+                )
+                self._size += len(body) - (old[0] if old else 0)
+                if self._size > self.max_bytes:
+                    self._evict()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.debug(f"[HTTP CACHE] Ошибка записи {url}: {e}")
+
+    def _evict(self):
+        target = self.max_bytes * EVICT_TO
+        rows = self._conn.execute('SELECT url, size FROM http_cache ORDER BY accessed_at').fetchall()
+        removed = []
+        for url, size in rows:
+            if self._size <= target:
+                break
+            removed.append((url,))
+            self._size -= size
+        self._conn.executemany('DELETE FROM http_cache WHERE url = ?', removed)
+        self.evicted += len(removed)
+        logger.debug(f"[HTTP CACHE] Вытеснено записей: {len(removed)}")
+
+    def stats(self):
+        return {'size_bytes': self._size, 'max_bytes': self.max_bytes, 'evicted': self.evicted, 'path': self.db_path}
+
+
+class ParsedMemo:
+    """
+    Результаты разбора страниц по (URL, хэш тела, версия)
+
+    Страница, вернувшая 304 или то же тело, не разбирается повторно:
+    возвращается копия прошлого результата. Если результат зависит не только
+    от тела (например, от ключевых слов фильтра), вызывающий передает version,
+    и при ее смене страница разбирается заново.
+
+    Args:
+        max_entries: Сколько страниц помнить (LRU)
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_parse(self, url, response, parse, version=None):
+        """
+        Args:
+            url: Ключ страницы
+            response: Ответ FetchEngine (с content_hash, если включен кэш)
+            parse: Функция response -> результат
+            version: Версия внешних настроек, от которых зависит parse
+        """
+        content_hash = getattr(response, 'content_hash', None)
+        if content_hash:
+            with self._lock:
+                item = self._items.get(url)
+                if item and item[0] == (content_hash, version):
+                    self._items.move_to_end(url)
+                    self.hits += 1
+                    return copy.deepcopy(item[1])
+
+        result = parse(response)
+        self.misses += 1
+
+        if content_hash:
+            with self._lock:
+                self._items[url] = ((content_hash, version), copy.deepcopy(result))
+                self._items.move_to_end(url)
+                while len(self._items) > self.max_entries:
+                    self._items.popitem(last=False)
+        return result
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Общий кэш процесса, настроенный из Config
+
+    Возвращает None, если кэш отключен (пустой HTTP_CACHE_PATH или HTTP_CACHE_MAX_MB=0).
+    """
+    global _default_cache
+
+    if not Config.HTTP_CACHE_PATH or Config.HTTP_CACHE_MAX_MB <= 0:
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = HttpCache(Config.HTTP_CACHE_PATH, Config.HTTP_CACHE_MAX_MB * 1024 * 1024)
+            except Exception as e:
+                logger.warning(f"[HTTP CACHE] Не удалось открыть {Config.HTTP_CACHE_PATH}: {e}, кэш отключен")
+                return None
+        return _default_cache
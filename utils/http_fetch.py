@@ -0,0 +1,266 @@
+"""
+Общий HTTP-движок коллекторов новостей, Дзена, OK и сайтов
+asyncio поверх пула keep-alive соединений requests: параллельные запросы
+с лимитом на хост, вежливая пауза по домену вместо глобальных sleep,
+повторы с джиттером и общий бюджет времени на цикл сбора
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+from utils.http_cache import body_hash
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Ответы, после которых запрос стоит повторить
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Пауза перед повтором: случайная в [0, min(BACKOFF_CAP, BACKOFF_BASE * 2^попытка)]
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+# Хостов с отдельным пулом соединений
+POOL_HOSTS = 32
+
+
+class FetchError(Exception):
+    """Запрос не удался после всех повторов"""
+
+
+class FetchBudgetExceeded(FetchError):
+    """Бюджет времени цикла сбора исчерпан"""
+
+
+class FetchEngine:
+    """
+    HTTP-клиент коллектора
+
+    Один requests.Session с пулом соединений на хост; блокирующие вызовы
+    выполняются в пуле потоков, а планирование - в asyncio, поэтому
+    get_many() загружает страницы параллельно. На каждый хост не больше
+    per_host_concurrency одновременных запросов и не чаще одного запроса
+    в host_delay секунд.
+
+    Args:
+        headers: Заголовки сессии
+        per_host_concurrency: Одновременных запросов к хосту (Config.HTTP_PER_HOST_CONCURRENCY)
+        host_delay: Секунд между запросами к одному хосту (Config.HTTP_HOST_DELAY)
+        max_retries: Повторов после сетевой ошибки или RETRY_STATUSES (Config.HTTP_MAX_RETRIES)
+        timeout: Таймаут одного запроса, секунд
+        verify: Проверять SSL-сертификаты
+        cache: utils.http_cache.HttpCache - условные запросы по ETag/Last-Modified
+    """
+
+    def __init__(self, headers=None, per_host_concurrency=None, host_delay=None,
+                 max_retries=None, timeout=15, verify=True, cache=None):
+        self.per_host_concurrency = per_host_concurrency or Config.HTTP_PER_HOST_CONCURRENCY
+        self.host_delay = Config.HTTP_HOST_DELAY if host_delay is None else host_delay
+        self.max_retries = Config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = timeout
+        self.cache = cache
+
+        self.session = requests.Session()
+        self.session.verify = verify
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=self.per_host_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.per_host_concurrency * 4, thread_name_prefix='http-fetch'
+        )
+        self._buckets = {}
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._deadline = None
+        self.stats = self._empty_stats()
+
+    def start_cycle(self, budget=None):
+        """
+        Начать цикл сбора: обнулить статистику и задать бюджет времени
+
+        Args:
+            budget: Секунд на все запросы цикла (по умолчанию Config.HTTP_CYCLE_BUDGET, 0 - без ограничения)
+        """
+        budget = Config.HTTP_CYCLE_BUDGET if budget is None else budget
+        self._deadline = time.monotonic() + budget if budget else None
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats():
+        return {'requests': 0, 'retries': 0, 'failed': 0, 'wait_s': 0.0, 'not_modified': 0, 'unchanged': 0}
+
+    def _remaining(self):
+        if self._deadline is None:
+            return None
+        return self._deadline - time.monotonic()
+
+    def _bucket(self, host):
+        with self._lock:
+            if host not in self._buckets:
+                # capacity=1: без всплесков, ровно один запрос в host_delay
+                self._buckets[host] = TokenBucket(1.0 / self.host_delay, capacity=1) if self.host_delay else None
+            return self._buckets[host]
+
+    def _semaphore(self, host):
+        # Семафор привязан к event loop: у каждого run() свой набор
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        if host not in semaphores:
+            semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return semaphores[host]
+
+    def pause_host(self, url, seconds):
+        """Не обращаться к хосту seconds секунд (капча, бан по частоте)"""
+        bucket = self._bucket(urlparse(url).netloc)
+        if bucket:
+            bucket.pause(seconds)
+
+    def _apply_cache(self, url, response, entry):
+        # 304 - тело из кэша; 200 - сохранить и сравнить хэш с прошлым телом
+        if response.status_code == 304 and entry is not None:
+            self.stats['not_modified'] += 1
+            response.status_code = 200
+            response._content = entry.body
+            response.encoding = entry.encoding
+            response.content_hash = entry.content_hash
+            response.unchanged = True
+        elif response.status_code == 200:
+            response.content_hash = body_hash(response.content)
+            response.unchanged = entry is not None and entry.content_hash == response.content_hash
+            if response.unchanged:
+                self.stats['unchanged'] += 1
+            self.cache.store(url, response, response.content_hash)
+        else:
+            response.unchanged = False
+        return response
+
+    @staticmethod
+    def _backoff(attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(BACKOFF_CAP, float(retry_after))
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+    async def fetch(self, url, proxies=None, on_proxy_error=None, max_retries=None, timeout=None, **kwargs):
+        """
+        GET с ограничениями хоста и повторами
+
+        Args:
+            url: Адрес
+            proxies: dict для requests или функция без аргументов, возвращающая его (на каждую попытку)
+            on_proxy_error: Вызывается с proxies неудавшейся попытки (ротация бесплатных прокси)
+            max_retries, timeout: Переопределить значения движка
+            **kwargs: Прочие аргументы requests.Session.get
+
+        Returns:
+            requests.Response (статус не из RETRY_STATUSES; raise_for_status - на вызывающем).
+            С кэшем у ответа есть content_hash и unchanged (304 или то же тело, что в прошлый раз);
+            на 304 возвращается тело из кэша со статусом 200
+
+        Raises:
+            FetchError: сетевая ошибка или RETRY_STATUSES после всех повторов
+            FetchBudgetExceeded: бюджет цикла исчерпан
+        """
+        loop = asyncio.get_running_loop()
+        host = urlparse(url).netloc
+        bucket = self._bucket(host)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        timeout = timeout or self.timeout
+        kwargs.setdefault('allow_redirects', True)
+
+        entry = None
+        if self.cache is not None:
+            entry = await loop.run_in_executor(self._executor, self.cache.get, url)
+            if entry is not None:
+                kwargs['headers'] = dict(kwargs.get('headers') or {}, **self.cache.conditional_headers(entry))
+
+        error = None
+        for attempt in range(max_retries + 1):
+            async with self._semaphore(host):
+                wait = bucket.reserve() if bucket else 0
+                if wait:
+                    self.stats['wait_s'] += wait
+                    await asyncio.sleep(wait)
+
+                remaining = self._remaining()
+                if remaining is not None and remaining <= 0:
+                    raise FetchBudgetExceeded(f"{url}: бюджет времени цикла исчерпан")
+
+                attempt_proxies = proxies() if callable(proxies) else proxies
+                response = None
+                self.stats['requests'] += 1
+                try:
+                    response = await loop.run_in_executor(self._executor, partial(
+                        self.session.get, url, proxies=attempt_proxies,
+                        timeout=min(timeout, remaining) if remaining is not None else timeout,
+                        **kwargs
+                    ))
+                    if response.status_code not in RETRY_STATUSES:
+                        if self.cache is not None:
+                            return await loop.run_in_executor(
+                                self._executor, self._apply_cache, url, response, entry
+                            )
+                        return response
+                    error = FetchError(f"{url}: HTTP {response.status_code}")
+                except requests.RequestException as e:
+                    error = e
+                    if attempt_proxies and on_proxy_error:
+                        on_proxy_error(attempt_proxies)
+
+            if attempt < max_retries:
+                self.stats['retries'] += 1
+                delay = self._backoff(attempt, response)
+                logger.warning(f"Request failed (attempt {attempt + 1}/{max_retries + 1}): {error}, повтор через {delay:.1f} с")
+                await asyncio.sleep(delay)
+
+        self.stats['failed'] += 1
+        if isinstance(error, FetchError):
+            raise error
+        raise FetchError(f"{url}: {error}") from error
+
+    async def fetch_all(self, urls, **kwargs):
+        """
+        Параллельная загрузка (лимиты хостов соблюдаются)
+
+        Returns:
+            Список requests.Response в порядке urls (None для неудавшихся)
+        """
+        results = await asyncio.gather(*(self.fetch(url, **kwargs) for url in urls), return_exceptions=True)
+        responses = []
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                logger.debug(f"Error fetching {url}: {result}")
+                result = None
+            responses.append(result)
+        return responses
+
+    def run(self, coro):
+        """Выполнить корутину движка из синхронного кода коллектора"""
+        return asyncio.run(coro)
+
+    def get(self, url, **kwargs):
+        """Синхронный fetch()"""
+        return self.run(self.fetch(url, **kwargs))
+
+    def get_many(self, urls, **kwargs):
+        """Синхронный fetch_all()"""
+        return self.run(self.fetch_all(list(urls), **kwargs))
+
+    def log_stats(self, prefix):
+        logger.info(
+            f"{prefix} HTTP: запросов {self.stats['requests']}, повторов {self.stats['retries']}, "
+            f"ошибок {self.stats['failed']}, ожидание хостов {self.stats['wait_s']:.1f} с"
+            + (f", не изменилось {self.stats['not_modified']} (304) + {self.stats['unchanged']}" if self.cache else '')
+        )
@@ -1,26 +1,123 @@
 import re
 
+import numpy as np
+
+# Классы символов по кодовой точке: 1 - кириллица (а-я, А-Я, ё, Ё), 2 - латиница (a-z, A-Z)
+_SCRIPT_LIMIT = 0x460
+_SCRIPT_TABLE = np.zeros(_SCRIPT_LIMIT, dtype=np.uint8)
+_SCRIPT_TABLE[0x410:0x450] = 1
+_SCRIPT_TABLE[[0x401, 0x451]] = 1
+_SCRIPT_TABLE[ord('A'):ord('Z') + 1] = 2
+_SCRIPT_TABLE[ord('a'):ord('z') + 1] = 2
+
+
 class LanguageDetector:
     def __init__(self):
-        self.cyrillic_pattern = re.compile(r'[а-яА-ЯёЁ]')
-        self.latin_pattern = re.compile(r'[a-zA-Z]')
-    
+        self.non_letter_pattern = re.compile(r'[^а-яА-ЯёЁa-zA-Z]+')
+
+    def count_scripts(self, text):
+        """
+        Количество кириллических и латинских букв без списков совпадений
+
+        Returns:
+            (cyrillic_count, latin_count)
+        """
+        if not text:
+            return 0, 0
+
+        # Остаются только буквы; латиница - ровно ASCII-часть
+        letters = self.non_letter_pattern.sub('', text)
+        latin_count = len(letters.encode('ascii', 'ignore'))
+        return len(letters) - latin_count, latin_count
+
+    @staticmethod
+    def count_scripts_batch(texts):
+        """
+        Подсчет букв для многих текстов одной гистограммой по кодовым точкам
+
+        Все тексты склеиваются в один массив UTF-32, символы классифицируются
+        таблицей, а суммы по текстам берутся одним np.add.reduceat.
+
+        Returns:
+            (cyrillic_counts, latin_counts) - списки той же длины, что texts
+        """
+        texts = [text or '' for text in texts]
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        cyrillic = np.zeros(len(texts), dtype=np.int64)
+        latin = np.zeros(len(texts), dtype=np.int64)
+
+        if lengths.sum():
+            # surrogatepass: одиночный суррогат из битого текста - одна кодовая точка, а не ошибка всей пачки
+            codes = np.frombuffer(''.join(texts).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+            classes = _SCRIPT_TABLE[np.minimum(codes, _SCRIPT_LIMIT - 1)]
+
+            # reduceat требует строго возрастающих границ - пустые тексты пропускаем
+            starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            non_empty = lengths > 0
+            bounds = starts[non_empty]
+            cyrillic[non_empty] = np.add.reduceat((classes == 1).astype(np.int32), bounds)
+            latin[non_empty] = np.add.reduceat((classes == 2).astype(np.int32), bounds)
+
+        return cyrillic.tolist(), latin.tolist()
+
+    @staticmethod
+    def _result(text, cyrillic_count, latin_count):
+        total_letters = cyrillic_count + latin_count
+        cyrillic_ratio = cyrillic_count / total_letters if total_letters else 0.0
+        latin_ratio = latin_count / total_letters if total_letters else 0.0
+
+        if not text or len(text.strip()) < 3 or total_letters == 0:
+            is_russian = True
+        else:
+            is_russian = cyrillic_ratio > 0.5
+
+        return {
+            'language': 'ru' if is_russian else 'other',
+            'is_russian': is_russian,
+            'cyrillic_ratio': cyrillic_ratio,
+            'latin_ratio': latin_ratio,
+            'letters': total_letters
+        }
+
     def is_russian(self, text):
         if not text or len(text.strip()) < 3:
             return True
-        
-        cyrillic_count = len(self.cyrillic_pattern.findall(text))
-        latin_count = len(self.latin_pattern.findall(text))
-        
+
+        cyrillic_count, latin_count = self.count_scripts(text)
+
         total_letters = cyrillic_count + latin_count
-        
+
         if total_letters == 0:
             return True
-        
+
         cyrillic_ratio = cyrillic_count / total_letters
-        
+
         return cyrillic_ratio > 0.5
-    
+
+    def detect(self, text):
+        """Язык и доли кириллицы/латиницы для одного текста"""
+        return self._result(text, *self.count_scripts(text))
+
+    def detect_batch(self, texts):
+        """
+        Определение языка для списка текстов
+
+        Returns:
+            Список словарей {'language', 'is_russian', 'cyrillic_ratio',
+            'latin_ratio', 'letters'} в порядке texts
+        """
+        texts = list(texts)
+        cyrillic_counts, latin_counts = self.count_scripts_batch(texts)
+
+        return [
+            self._result(text, cyrillic_count, latin_count)
+            for text, cyrillic_count, latin_count in zip(texts, cyrillic_counts, latin_counts)
+        ]
+
+    def is_russian_batch(self, texts):
+        """Список флагов is_russian для texts"""
+        return [result['is_russian'] for result in self.detect_batch(texts)]
+
     def detect_language(self, text):
         if self.is_russian(text):
             return 'ru'
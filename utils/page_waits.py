@@ -0,0 +1,222 @@
+"""
+Ожидания Selenium-коллекторов по событиям страницы
+Вместо фиксированных пауз после перехода и прокрутки ждем DOM-условия:
+появление блока, затишье сети (CDP-события из performance-лога), стабильную
+высоту страницы. Время каждого ожидания записывается по страницам
+"""
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from utils.browser_pool import IMPLICIT_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Частота опроса условий, секунд
+POLL_INTERVAL = 0.1
+
+_IN_FLIGHT_START = 'Network.requestWillBeSent'
+_IN_FLIGHT_END = ('Network.loadingFinished', 'Network.loadingFailed')
+
+
+@contextmanager
+def no_implicit_wait(driver):
+    """Поиск элементов без неявного ожидания (отсутствие элемента - не повод ждать 10 с)"""
+    driver.implicitly_wait(0)
+    try:
+        yield driver
+    finally:
+        driver.implicitly_wait(IMPLICIT_WAIT)
+
+
+def drain_network_log(driver):
+    """
+    Прочитать накопленные CDP-события Network из performance-лога
+
+    Returns:
+        Список (метод, requestId) или None, если лог не включен
+    """
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return None
+
+    events = []
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, TypeError, ValueError):
+            continue
+        if message.get('method', '').startswith('Network.'):
+            events.append((message['method'], message.get('params', {}).get('requestId')))
+    return events
+
+
+class Page:
+    """
+    Ожидания на одной открытой странице; timings - секунды по шагам
+
+    Каждый метод возвращает True, если условие выполнилось до таймаута.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.timings = defaultdict(float)
+        self._in_flight = set()
+        self._network_log = True
+
+    def _record(self, label, started):
+        self.timings[label] += time.monotonic() - started
+
+    def _until(self, check, timeout):
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=POLL_INTERVAL).until(lambda driver: check())
+            return True
+        except TimeoutException:
+            return False
+
+    def open(self, url):
+        # События прошлых страниц не должны считаться незавершенными запросами этой
+        self._network_log = drain_network_log(self.driver) is not None
+        self._in_flight.clear()
+        started = time.monotonic()
+        try:
+            self.driver.get(url)
+        finally:
+            self._record('load', started)
+
+    def condition(self, check, timeout=10, label='condition'):
+        """Ждать, пока check() не вернет истину"""
+        started = time.monotonic()
+        try:
+            return self._until(check, timeout)
+        finally:
+            self._record(label, started)
+
+    def element(self, selectors, timeout=10, label='element'):
+        """
+        Ждать появления элемента по любому из CSS-селекторов
+
+        Проверка идет через querySelector, поэтому неявное ожидание драйвера не мешает.
+        """
+        css = ', '.join(selectors) if isinstance(selectors, (list, tuple)) else selectors
+        return self.condition(
+            lambda: self.driver.execute_script('return document.querySelector(arguments[0]) !== null', css),
+            timeout, label
+        )
+
+    def _network_quiet(self):
+        events = drain_network_log(self.driver) if self._network_log else None
+        if events is None:
+            # Без performance-лога - по числу завершенных загрузок (Resource Timing)
+            self._network_log = False
+            return self.driver.execute_script(
+                "return document.readyState === 'complete' ? "
+                "performance.getEntriesByType('resource').length : -1"
+            )
+
+        for method, request_id in events:
+            if method == _IN_FLIGHT_START:
+                self._in_flight.add(request_id)
+            elif method in _IN_FLIGHT_END:
+                self._in_flight.discard(request_id)
+        return len(self._in_flight)
+
+    def network_idle(self, idle=0.5, timeout=10, max_in_flight=0, label='network'):
+        """
+        Ждать затишья сети: не больше max_in_flight запросов в течение idle секунд
+        """
+        state = {'since': None, 'last': None}
+
+        def quiet():
+            now = time.monotonic()
+            value = self._network_quiet()
+            if self._network_log:
+                calm = value <= max_in_flight
+            else:
+                calm = value >= 0 and value == state['last']
+                state['last'] = value
+            if not calm:
+                state['since'] = None
+                return False
+            if state['since'] is None:
+                state['since'] = now
+            return now - state['since'] >= idle
+
+        return self.condition(quiet, timeout, label)
+
+    def scroll(self, fraction=1.0, stable=0.5, timeout=8, label='scroll'):
+        """
+        Прокрутить на долю высоты и ждать, пока подгрузка не перестанет менять высоту
+        """
+        state = {'height': None, 'since': None}
+        script = f'window.scrollTo(0, document.body.scrollHeight * {fraction}); return document.body.scrollHeight'
+
+        def settled():
+            now = time.monotonic()
+            height = self.driver.execute_script(script)
+            if height != state['height']:
+                state['height'] = height
+                state['since'] = now
+                return False
+            return now - state['since'] >= stable
+
+        return self.condition(settled, timeout, label)
+
+
+class PageWaits:
+    """
+    Ожидания коллектора и статистика времени за цикл сбора
+
+    Args:
+        prefix: Префикс логов коллектора
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.pages = 0
+        self.totals = defaultdict(float)
+
+    @contextmanager
+    def page(self, driver, url=None):
+        """
+        Открыть url; после блока время ожиданий страницы попадает в лог и статистику
+
+        Без url ожидания идут на текущей странице (например, после отправки формы).
+        """
+        page = Page(driver)
+        try:
+            if url:
+                page.open(url)
+            yield page
+        finally:
+            if url:
+                self.pages += 1
+            for label, seconds in page.timings.items():
+                self.totals[label] += seconds
+            logger.info(f"{self.prefix} Ожидание {(url or 'текущей страницы')[:80]}: {self._format(page.timings)}")
+
+    def jitter(self, min_sec, max_sec):
+        """Случайная пауза между страницами - только там, где ее ждет антибот (поиск, OK)"""
+        started = time.monotonic()
+        time.sleep(random.uniform(min_sec, max_sec))
+        self.totals['jitter'] += time.monotonic() - started
+
+    @staticmethod
+    def _format(timings):
+        total = sum(timings.values())
+        steps = ', '.join(f"{label} {seconds:.1f}" for label, seconds in timings.items())
+        return f"{total:.1f} с ({steps})" if steps else '0.0 с'
+
+    def reset(self):
+        self.pages = 0
+        self.totals = defaultdict(float)
+
+    def log_stats(self):
+        logger.info(f"{self.prefix} Страниц: {self.pages}, ожидания: {self._format(self.totals)}")
@@ -0,0 +1,71 @@
+"""
+Ограничение частоты запросов к внешним API
+Token bucket вместо фиксированных пауз: всплеск до capacity запросов, дальше - rate в секунду
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Потокобезопасное ведро токенов
+
+    Запрос забирает токен; токены восстанавливаются со скоростью rate в секунду
+    до capacity. Если токенов нет, acquire() ждет ровно до появления нужного
+    количества, а не фиксированную паузу.
+
+    Args:
+        rate: Токенов в секунду (разрешенная частота запросов)
+        capacity: Размер ведра - допустимый всплеск (по умолчанию rate)
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError('rate должен быть положительным')
+
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        # Во время паузы _updated в будущем: токены начнут копиться только после нее
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def reserve(self, tokens=1):
+        """
+        Забрать токены, не ожидая
+
+        Returns:
+            Сколько секунд нужно подождать до использования токенов (0 - можно сразу)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+
+            wait = max(0.0, self._updated - now) + max(0.0, -self._tokens / self.rate)
+            return wait
+
+    def acquire(self, tokens=1):
+        """Дождаться и забрать токены (блокирует поток)"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """
+        Остановить выдачу токенов на seconds (сервер ответил "слишком много запросов")
+
+        Ведро пустеет, а пополнение начинается с конца паузы, поэтому
+        запросы, накопившиеся за паузу, после нее идут с частотой rate, а не разом.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, now + seconds)
@@ -0,0 +1,219 @@
+"""
+Потоковая выгрузка отзывов в CSV, JSONL и Parquet
+Строки читаются из БД порциями (yield_per) и сразу пишутся в выходной поток
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+
+from models import Review
+from utils.review_query import filter_reviews
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Порядок колонок выгрузки
+EXPORT_COLUMNS = (
+    'id', 'source', 'source_id', 'author', 'author_id', 'text', 'url',
+    'published_date', 'collected_date', 'parent_id', 'is_comment',
+    'sentiment_score', 'sentiment_label', 'sentiment_analyzer', 'sentiment_model_version',
+    'keywords', 'is_moderated', 'moderation_status', 'moderation_reason',
+    'requires_manual_review', 'processed'
+)
+
+# Сколько строк драйвер БД отдает за одну выборку
+YIELD_PER = 1000
+
+# Строк в одном куске CSV/JSONL и в одной группе строк Parquet
+CHUNK_ROWS = 500
+PARQUET_ROW_GROUP = 10000
+
+# Формат -> (Content-Type, расширение файла)
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+class ExportError(ValueError):
+    """Неизвестный формат или недоступна зависимость формата"""
+
+
+def check_format(export_format):
+    """
+    Проверить формат до начала выгрузки
+
+    Raises:
+        ExportError: формат неизвестен или для Parquet не установлен pyarrow
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"Неизвестный формат: {export_format} (доступны: {', '.join(EXPORT_FORMATS)})")
+    if export_format == 'parquet' and pa is None:
+        raise ExportError("Для выгрузки в Parquet установите pyarrow: pip install pyarrow")
+
+
+def iter_review_rows(filters, yield_per=YIELD_PER):
+    """
+    Строки отзывов (кортежи в порядке EXPORT_COLUMNS) без загрузки всей таблицы
+
+    Фильтры и порядок - как у /api/reviews/filtered: по дате сбора,
+    при поиске по тексту - по релевантности.
+    """
+    query, rank = filter_reviews(filters)
+    order = (rank, Review.id.desc()) if rank is not None else (Review.collected_date.desc(), Review.id.desc())
+
+    rows = query.with_entities(
+        *(getattr(Review, name) for name in EXPORT_COLUMNS)
+    ).order_by(*order).yield_per(yield_per)
+
+    for row in rows:
+        yield tuple(row)
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def write_csv(rows):
+    """CSV с заголовком; BOM - чтобы Excel распознал UTF-8"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_COLUMNS)
+
+    for batch in _batches(rows, CHUNK_ROWS):
+        writer.writerows(
+            ['' if value is None else value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in batch
+        )
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def write_jsonl(rows):
+    """Один JSON-объект на строку"""
+    for batch in _batches(rows, CHUNK_ROWS):
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False, default=_json_default) + '\n'
+            for row in batch
+        ).encode('utf-8')
+
+
+class _ChunkSink:
+    """Файлоподобный приемник: ParquetWriter пишет в него, а выгрузка забирает накопленные байты"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_schema():
+    string = pa.string()
+    timestamp = pa.timestamp('us')
+    types = {
+        'id': pa.int64(), 'parent_id': pa.int64(),
+        'published_date': timestamp, 'collected_date': timestamp,
+        'is_comment': pa.bool_(), 'is_moderated': pa.bool_(),
+        'requires_manual_review': pa.bool_(), 'processed': pa.bool_(),
+        'sentiment_score': pa.float64(),
+    }
+    return pa.schema([(name, types.get(name, string)) for name in EXPORT_COLUMNS])
+
+
+def write_parquet(rows):
+    """Parquet: каждая группа строк пишется и отдается сразу, в памяти - одна группа"""
+    check_format('parquet')
+
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+
+    try:
+        for batch in _batches(rows, PARQUET_ROW_GROUP):
+            columns = [pa.array(column, type=field.type) for column, field in zip(zip(*batch), schema)]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+
+    yield sink.drain()
+
+
+WRITERS = {
+    'csv': write_csv,
+    'jsonl': write_jsonl,
+    'parquet': write_parquet,
+}
+
+
+def export_reviews(filters, export_format):
+    """
+    Выгрузка отзывов кусками байтов
+
+    Память не зависит от размера таблицы: в ней одна порция строк БД
+    и один кусок выходного файла.
+
+    Args:
+        filters: ReviewFilters
+        export_format: 'csv', 'jsonl' или 'parquet'
+
+    Returns:
+        Генератор bytes
+
+    Raises:
+        ExportError: формат недоступен (проверяется до чтения БД)
+    """
+    check_format(export_format)
+    return WRITERS[export_format](iter_review_rows(filters))
+
+
+def export_filename(export_format, now=None):
+    """Имя файла выгрузки с отметкой времени"""
+    return f"reviews_{(now or datetime.utcnow()).strftime('%Y%m%d_%H%M%S')}.{EXPORT_FORMATS[export_format][1]}"
@@ -0,0 +1,219 @@
+"""
+Фильтры списка отзывов и постраничная выдача по ключу (keyset)
+Курсор - непрозрачный токен с позицией последней записи страницы вместо OFFSET
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+
+from models import Review
+from utils.review_rollups import estimate_count
+from utils.review_search import text_search
+
+TIME_FILTERS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'month': timedelta(days=30),
+    'year': timedelta(days=365),
+}
+
+# Предел размера страницы для API
+MAX_PER_PAGE = 500
+
+
+class InvalidCursor(ValueError):
+    """Курсор поврежден или выдан для другого порядка сортировки"""
+
+
+class ReviewFilters(namedtuple('ReviewFilters', ['source', 'sentiment', 'time_filter', 'kind', 'search'])):
+    """Фильтры списка отзывов (страница /reviews, /api/reviews/filtered, экспорт)"""
+
+    @classmethod
+    def from_args(cls, args):
+        """Фильтры из request.args"""
+        return cls(
+            source=args.get('source', ''),
+            sentiment=args.get('sentiment', ''),
+            time_filter=args.get('time', 'all'),
+            kind=args.get('kind', 'all'),
+            search=args.get('search', '').strip()
+        )
+
+    def since(self, now=None):
+        """Начало периода или None для 'all'"""
+        delta = TIME_FILTERS.get(self.time_filter)
+        return (now or datetime.utcnow()) - delta if delta else None
+
+
+def filter_reviews(filters, query=None, now=None):
+    """
+    Применить фильтры к запросу отзывов
+
+    Returns:
+        (query, rank) - запрос и колонка релевантности полнотекстового поиска
+        (None без поиска или при поиске через LIKE)
+    """
+    query = Review.query if query is None else query
+
+    if filters.source:
+        query = query.filter(Review.source == filters.source)
+
+    if filters.sentiment:
+        query = query.filter(Review.sentiment_label == filters.sentiment)
+
+    if filters.kind == 'comments':
+        query = query.filter(Review.is_comment.is_(True))
+    elif filters.kind == 'posts':
+        query = query.filter((Review.is_comment.is_(False)) | (Review.is_comment.is_(None)))
+
+    since = filters.since(now)
+    if since is not None:
+        query = query.filter(Review.collected_date >= since)
+
+    rank = None
+    if filters.search:
+        query, rank = text_search(query, filters.search)
+
+    return query, rank
+
+
+def approximate_total(filters, now=None):
+    """
+    Количество отзывов по почасовым агрегатам без обращения к reviews
+
+    Returns:
+        (total, approximate) или (None, False), если фильтры не выражаются
+        через агрегаты (поиск по тексту). Период округляется до часа,
+        поэтому с фильтром по времени число приблизительное.
+    """
+    if filters.search:
+        return None, False
+
+    since = filters.since(now)
+    total = estimate_count(
+        source=filters.source or None,
+        sentiment=filters.sentiment or None,
+        is_comment={'comments': True, 'posts': False}.get(filters.kind),
+        since=since
+    )
+    return total, since is not None
+
+
+def encode_cursor(mode, value, review_id):
+    """Курсор после записи: mode 'd' - по дате сбора, 'r' - по релевантности"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([mode, value, review_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, mode):
+    """
+    Позиция из курсора
+
+    Returns:
+        (value, review_id)
+
+    Raises:
+        InvalidCursor: курсор поврежден или выдан для другого режима
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        cursor_mode, value, review_id = json.loads(payload)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor(f'Неверный курсор: {e}') from e
+
+    if cursor_mode != mode or not isinstance(review_id, int):
+        raise InvalidCursor('Курсор выдан для другого порядка сортировки')
+
+    if mode == 'd' and value is not None:
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError) as e:
+            raise InvalidCursor(f'Неверная дата в курсоре: {e}') from e
+    elif mode == 'r' and not isinstance(value, (int, float)):
+        raise InvalidCursor('Неверная релевантность в курсоре')
+
+    return value, review_id
+
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor', 'has_more'])
+
+
+def _rank_page(query, rank, cursor, per_page):
+    """Страница результатов поиска: (релевантность, id)"""
+    if cursor:
+        value, review_id = decode_cursor(cursor, 'r')
+        query = query.filter(or_(rank > value, and_(rank == value, Review.id < review_id)))
+
+    rows = query.add_columns(rank).order_by(rank, Review.id.desc()).limit(per_page + 1).all()
+
+    items = [review for review, _ in rows[:per_page]]
+    next_cursor = None
+    if len(rows) > per_page:
+        last_review, last_rank = rows[per_page - 1]
+        next_cursor = encode_cursor('r', last_rank, last_review.id)
+
+    return KeysetPage(items, next_cursor, next_cursor is not None)
+
+
+def _date_page(query, cursor, per_page):
+    """
+    Страница по (collected_date DESC, id DESC)
+
+    Условие курсора - диапазон по индексу collected_date (id хранится в индексе
+    как rowid), поэтому глубокие страницы стоят столько же, сколько первая.
+    Записи без даты сбора идут в конце отдельным диапазоном по id.
+    """
+    value, review_id = decode_cursor(cursor, 'd') if cursor else (None, None)
+    in_undated = cursor is not None and value is None
+
+    rows = []
+    if not in_undated:
+        dated = query.filter(Review.collected_date.isnot(None))
+        if cursor:
+            dated = dated.filter(or_(
+                Review.collected_date < value,
+                and_(Review.collected_date == value, Review.id < review_id)
+            ))
+        rows = dated.order_by(Review.collected_date.desc(), Review.id.desc()).limit(per_page + 1).all()
+
+    if len(rows) <= per_page:
+        undated = query.filter(Review.collected_date.is_(None))
+        if in_undated:
+            undated = undated.filter(Review.id < review_id)
+        rows += undated.order_by(Review.id.desc()).limit(per_page + 1 - len(rows)).all()
+
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor('d', last.collected_date, last.id)
+
+    return KeysetPage(items, next_cursor, next_cursor is not None)
+
+
+def keyset_page(query, cursor=None, per_page=50, rank=None):
+    """
+    Одна страница отзывов без OFFSET и COUNT
+
+    Args:
+        query: Отфильтрованный запрос (см. filter_reviews), без order_by
+        cursor: Курсор из предыдущей страницы или None для первой
+        per_page: Размер страницы
+        rank: Колонка релевантности поиска - сортировать по ней вместо даты
+
+    Returns:
+        KeysetPage(items, next_cursor, has_more)
+
+    Raises:
+        InvalidCursor: курсор поврежден
+    """
+    if rank is not None:
+        return _rank_page(query, rank, cursor, per_page)
+    return _date_page(query, cursor, per_page)
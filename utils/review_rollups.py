@@ -0,0 +1,264 @@
+"""
+Почасовые агрегаты отзывов (таблица review_rollups)
+Ключ: (час collected_date, source, sentiment_label, is_comment) -> количество
+"""
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import delete, func, inspect, select, update
+
+from models import db, Review, ReviewRollup
+
+logger = logging.getLogger(__name__)
+
+# Корзина для записей без collected_date: учитываются в итогах, но не в периодах
+UNDATED_BUCKET = datetime(1970, 1, 1)
+
+KEY_FIELDS = ('source', 'sentiment_label', 'is_comment', 'collected_date')
+
+
+def hour_bucket(value):
+    """Начало часа для даты сбора"""
+    if value is None:
+        return UNDATED_BUCKET
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_key(source, sentiment_label, is_comment, collected_date):
+    """Ключ агрегата для одной записи"""
+    return hour_bucket(collected_date), source, sentiment_label or '', bool(is_comment)
+
+
+def count_rows(rows):
+    """
+    Счетчики по ключам агрегатов
+
+    Args:
+        rows: Словари с полями source, sentiment_label, is_comment, collected_date
+
+    Returns:
+        Counter {(bucket, source, sentiment_label, is_comment): количество}
+    """
+    return Counter(
+        rollup_key(row.get('source'), row.get('sentiment_label'), row.get('is_comment'), row.get('collected_date'))
+        for row in rows
+    )
+
+
+def _upsert_statement(dialect):
+    """INSERT ... ON CONFLICT DO UPDATE count = count + excluded.count, если диалект это умеет"""
+    table = ReviewRollup.__table__
+    key = ['bucket', 'source', 'sentiment_label', 'is_comment']
+
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(table)
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        stmt = pg_insert(table)
+    else:
+        return None
+
+    return stmt.on_conflict_do_update(
+        index_elements=key,
+        set_={'count': table.c['count'] + stmt.excluded['count']}
+    )
+
+
+def apply_deltas(deltas, connection=None):
+    """
+    Прибавить счетчики к review_rollups в текущей транзакции
+
+    Args:
+        deltas: Counter/словарь {ключ: изменение}, изменения могут быть отрицательными
+        connection: Соединение (по умолчанию соединение db.session)
+    """
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not deltas:
+        return
+
+    connection = connection or db.session.connection()
+    table = ReviewRollup.__table__
+    rows = [
+        {'bucket': bucket, 'source': source, 'sentiment_label': label, 'is_comment': is_comment, 'count': value}
+        for (bucket, source, label, is_comment), value in deltas.items()
+    ]
+
+    stmt = _upsert_statement(connection.dialect.name)
+    if stmt is not None:
+        connection.execute(stmt, rows)
+    else:
+        # Для остальных БД: UPDATE, а для отсутствующих ключей INSERT
+        for row in rows:
+            result = connection.execute(
+                update(table)
+                .where(table.c.bucket == row['bucket'])
+                .where(table.c.source == row['source'])
+                .where(table.c.sentiment_label == row['sentiment_label'])
+                .where(table.c.is_comment == row['is_comment'])
+                .values(count=table.c['count'] + row['count'])
+            )
+            if not result.rowcount:
+                connection.execute(table.insert(), row)
+
+    if any(value < 0 for value in deltas.values()):
+        connection.execute(delete(table).where(table.c['count'] <= 0))
+
+
+def _state_key(state):
+    """Ключ агрегата по загруженным значениям объекта"""
+    values = {field: state.dict.get(field) for field in KEY_FIELDS}
+    return rollup_key(values['source'], values['sentiment_label'], values['is_comment'], values['collected_date'])
+
+
+def track_changes(session, chunk_size=900):
+    """
+    Перенести счетчики отзывов, у которых меняется ключ агрегата
+
+    Вызывается из события before_flush (см. models.py): прежние значения
+    source, sentiment_label, is_comment и collected_date читаются из БД одним
+    запросом до записи изменений, поэтому не зависят от того, были ли
+    атрибуты загружены до присваивания.
+    """
+    changed = [
+        obj for obj in session.dirty
+        if isinstance(obj, Review) and obj.id is not None
+        and any(inspect(obj).attrs[field].history.has_changes() for field in KEY_FIELDS)
+    ]
+    if not changed:
+        return
+
+    old_keys = {}
+    ids = [obj.id for obj in changed]
+    for start in range(0, len(ids), chunk_size):
+        rows = session.execute(
+            select(Review.id, Review.source, Review.sentiment_label, Review.is_comment, Review.collected_date)
+            .where(Review.id.in_(ids[start:start + chunk_size]))
+        )
+        old_keys.update((row[0], rollup_key(*row[1:])) for row in rows)
+
+    deltas = Counter()
+    for obj in changed:
+        if obj.id in old_keys:
+            deltas[old_keys[obj.id]] -= 1
+            deltas[rollup_key(obj.source, obj.sentiment_label, obj.is_comment, obj.collected_date)] += 1
+
+    apply_deltas(deltas, session.connection())
+
+
+def track_flush(session):
+    """
+    Обновить агрегаты по объектам Review, записанным текущим flush
+
+    Вызывается из события after_flush (см. models.py): новые записи
+    прибавляются, удаленные вычитаются. Смену ключа у существующих
+    записей учитывает track_changes до flush.
+    """
+    deltas = Counter()
+
+    for obj in session.new:
+        if isinstance(obj, Review):
+            deltas[_state_key(inspect(obj))] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Review):
+            deltas[_state_key(inspect(obj))] -= 1
+
+    apply_deltas(deltas, session.connection())
+
+
+def _hour_expression(dialect):
+    """SQL-выражение начала часа collected_date или None, если диалект не поддержан"""
+    if dialect == 'sqlite':
+        return func.strftime('%Y-%m-%d %H:00:00', Review.collected_date)
+    if dialect == 'postgresql':
+        return func.date_trunc('hour', Review.collected_date)
+    return None
+
+
+def _parse_bucket(value):
+    if value is None:
+        return UNDATED_BUCKET
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def rebuild_rollups():
+    """
+    Пересчитать review_rollups по всей таблице reviews
+
+    Группировка по часу выполняется в БД; старые агрегаты заменяются
+    в той же транзакции. Коммит - на вызывающей стороне.
+
+    Returns:
+        Количество строк агрегатов
+    """
+    started = time.perf_counter()
+    hour = _hour_expression(db.engine.dialect.name)
+
+    if hour is not None:
+        rows = db.session.execute(
+            select(hour, Review.source, Review.sentiment_label, Review.is_comment, func.count(Review.id))
+            .group_by(hour, Review.source, Review.sentiment_label, Review.is_comment)
+        ).all()
+        counts = Counter()
+        for bucket, source, label, is_comment, count in rows:
+            counts[(_parse_bucket(bucket), source, label or '', bool(is_comment))] += count
+    else:
+        rows = db.session.execute(
+            select(Review.source, Review.sentiment_label, Review.is_comment, Review.collected_date)
+            .execution_options(yield_per=10000)
+        )
+        counts = Counter(rollup_key(*row) for row in rows)
+
+    db.session.execute(delete(ReviewRollup.__table__))
+    apply_deltas(counts)
+
+    logger.info(f"[ROLLUPS] Пересчитано {len(counts)} агрегатов за {time.perf_counter() - started:.2f} с")
+    return len(counts)
+
+
+def ensure_rollups():
+    """Построить агрегаты, если таблица пуста, а отзывы уже есть (первый запуск после обновления)"""
+    has_rollups = db.session.query(ReviewRollup.id).limit(1).first() is not None
+    if has_rollups or db.session.query(Review.id).limit(1).first() is None:
+        return False
+
+    rebuild_rollups()
+    db.session.commit()
+    return True
+
+
+def estimate_count(source=None, sentiment=None, is_comment=None, since=None):
+    """
+    Количество отзывов по агрегатам
+
+    Args:
+        source: Источник (None - все)
+        sentiment: Тональность (None - все)
+        is_comment: True/False - только комментарии/публикации, None - все
+        since: Начало периода, округляется вниз до часа (None - за все время)
+
+    Returns:
+        Количество записей
+    """
+    query = db.session.query(func.coalesce(func.sum(ReviewRollup.count), 0))
+
+    if source:
+        query = query.filter(ReviewRollup.source == source)
+    if sentiment:
+        query = query.filter(ReviewRollup.sentiment_label == sentiment)
+    if is_comment is not None:
+        query = query.filter(ReviewRollup.is_comment == is_comment)
+    if since is not None:
+        query = query.filter(ReviewRollup.bucket >= hour_bucket(since))
+
+    return query.scalar()
+
+
+def clear_rollups():
+    """Удалить все агрегаты (вместе с массовым удалением отзывов)"""
+    db.session.execute(delete(ReviewRollup.__table__))
@@ -0,0 +1,183 @@
+"""
+Полнотекстовый поиск по отзывам (SQLite FTS5)
+Индекс reviews_fts синхронизируется с reviews триггерами, запрос проходит стемминг
+"""
+import logging
+import re
+import sqlite3
+
+from sqlalchemy import column, literal_column, table
+
+from models import db, Review
+
+logger = logging.getLogger(__name__)
+
+try:
+    from nltk.stem.snowball import SnowballStemmer
+    _snowball = SnowballStemmer('russian')
+except ImportError:
+    _snowball = None
+
+FTS_TABLE = 'reviews_fts'
+
+# Индексируется текст с ё -> е: unicode61 сворачивает регистр, но не ё
+_NORMALIZED_TEXT = "replace(replace({}.text, 'ё', 'е'), 'Ё', 'Е')"
+
+FTS_SCHEMA = [
+    # Источник внешнего содержимого: FTS5 читает его при 'rebuild'
+    f"""CREATE VIEW IF NOT EXISTS {FTS_TABLE}_source AS
+        SELECT id, {_NORMALIZED_TEXT.format('reviews')} AS text FROM reviews""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, content='{FTS_TABLE}_source', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON reviews BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, {_NORMALIZED_TEXT.format('new')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON reviews BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, {_NORMALIZED_TEXT.format('old')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF text ON reviews BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, {_NORMALIZED_TEXT.format('old')});
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, {_NORMALIZED_TEXT.format('new')});
+    END""",
+]
+
+# Окончания для упрощенного стемминга, если nltk не установлен (длинные - первыми)
+_RUSSIAN_ENDINGS = sorted([
+    'ениями', 'ениях', 'ением', 'ения', 'ение', 'ении', 'ений', 'ания', 'ание', 'ании', 'аний',
+    'ости', 'ость', 'иями', 'ями', 'ами', 'ией', 'иях', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими',
+    'ать', 'ять', 'ить', 'еть', 'ала', 'яла', 'ила', 'или', 'али', 'яли',
+    'ая', 'яя', 'ое', 'ее', 'ие', 'ые', 'ой', 'ей', 'ий', 'ый', 'ом', 'ем', 'ам', 'ям',
+    'ах', 'ях', 'ую', 'юю', 'ов', 'ев', 'ть', 'ла', 'ли', 'ло', 'ет', 'ит', 'ут', 'ют',
+    'ат', 'ят', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й'
+], key=len, reverse=True)
+
+# Основа короче этого не обрезается: слишком короткий префикс совпадает почти со всем
+MIN_STEM_LENGTH = 4
+
+# Не больше стольких слов из строки поиска
+MAX_QUERY_TERMS = 10
+
+_word_pattern = re.compile(r'\w+')
+
+fts = table(FTS_TABLE, column('rowid'), column('rank'))
+
+_available = {}
+
+
+def install_review_search(connection):
+    """
+    Создать FTS5-индекс и триггеры синхронизации (соединение sqlite3)
+
+    Новый индекс сразу заполняется из reviews. Повторный вызов ничего не меняет.
+
+    Returns:
+        True, если индекс доступен (SQLite собран с FTS5)
+    """
+    cursor = connection.cursor()
+    try:
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).fetchone() is not None
+
+        for statement in FTS_SCHEMA:
+            cursor.execute(statement)
+
+        if not exists:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            logger.info(f"[SEARCH] Индекс {FTS_TABLE} построен")
+
+        connection.commit()
+        return True
+    except sqlite3.Error as e:
+        connection.rollback()
+        logger.warning(f"[SEARCH] FTS5 недоступен, поиск через LIKE: {e}")
+        return False
+    finally:
+        cursor.close()
+
+
+def install_for_engine(engine):
+    """install_review_search для движка SQLAlchemy (для других БД ничего не делает)"""
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    raw = engine.raw_connection()
+    try:
+        _available[str(engine.url)] = install_review_search(raw.driver_connection)
+    finally:
+        raw.close()
+    return _available[str(engine.url)]
+
+
+def fts_available():
+    """Есть ли FTS-индекс в текущей базе (проверяется один раз на движок)"""
+    engine = db.engine
+    key = str(engine.url)
+
+    if key not in _available:
+        if engine.dialect.name != 'sqlite':
+            _available[key] = False
+        else:
+            _available[key] = db.session.execute(
+                db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE}
+            ).first() is not None
+
+    return _available[key]
+
+
+def stem(word):
+    """Основа русского слова (латиница и цифры не меняются)"""
+    if not re.search('[а-я]', word):
+        return word
+
+    if _snowball is not None:
+        stemmed = _snowball.stem(word)
+        return stemmed if len(stemmed) >= MIN_STEM_LENGTH else word
+
+    for ending in _RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def build_match_query(search):
+    """
+    Строка поиска -> выражение FTS5 MATCH
+
+    Каждое слово приводится к основе и ищется как префикс ("отключ"*
+    находит "отключили", "отключение"); слова объединяются через AND.
+
+    Returns:
+        Выражение MATCH или None, если в строке нет слов
+    """
+    words = _word_pattern.findall(search.lower().replace('ё', 'е'))[:MAX_QUERY_TERMS]
+    if not words:
+        return None
+    return ' '.join(f'"{stem(word)}"*' for word in words)
+
+
+def text_search(query, search):
+    """
+    Отфильтровать запрос по тексту отзыва
+
+    При наличии FTS-индекса - MATCH по индексу; иначе - прежний поиск
+    подстроки через LIKE.
+
+    Args:
+        query: Запрос Review.query с уже примененными фильтрами
+        search: Строка поиска
+
+    Returns:
+        (query, rank) - отфильтрованный запрос и колонка релевантности bm25
+        (меньше - релевантнее) или None, если поиск шел через LIKE
+    """
+    match = build_match_query(search) if fts_available() else None
+    if match is None:
+        return query.filter(Review.text.contains(search)), None
+
+    query = query.join(fts, fts.c.rowid == Review.id).filter(
+        literal_column(f'{FTS_TABLE}.{FTS_TABLE}').op('MATCH')(match)
+    )
+    return query, fts.c.rank
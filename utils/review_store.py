@@ -0,0 +1,192 @@
+"""
+Пакетное сохранение отзывов
+Дедупликация по source_id одним IN-запросом и массовая вставка
+"""
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from models import db, Review
+from utils.review_rollups import apply_deltas, count_rows, rollup_key
+
+logger = logging.getLogger(__name__)
+
+# SQLite по умолчанию ограничивает число параметров запроса (999 в старых сборках)
+SQLITE_MAX_VARIABLES = 900
+
+# Поля модели Review, которые можно передавать в массовую вставку
+REVIEW_COLUMNS = {
+    'source', 'source_id', 'author', 'author_id', 'text', 'url',
+    'published_date', 'collected_date', 'parent_id', 'is_comment',
+    'sentiment_score', 'sentiment_label', 'sentiment_analyzer',
+    'sentiment_model_version', 'keywords',
+    'is_moderated', 'moderation_status', 'moderation_reason',
+    'requires_manual_review', 'processed', 'processed_date'
+}
+
+
+def _chunks(items, size):
+    """Разбивает список на куски не длиннее size"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class ReviewStore:
+    """
+    Этап сохранения для мониторов: вместо SELECT на каждую запись
+    существующие source_id ищутся пачками, а новые строки вставляются
+    одним INSERT ... ON CONFLICT(source_id) DO NOTHING. Почасовые агрегаты
+    review_rollups обновляются в той же транзакции по реально вставленным строкам.
+
+    Должен использоваться внутри app.app_context().
+    """
+
+    def __init__(self, chunk_size=SQLITE_MAX_VARIABLES):
+        self.chunk_size = chunk_size
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats():
+        return {
+            'batch_size': 0,
+            'existing': 0,
+            'inserted': 0,
+            'lookup_queries': 0,
+            'lookup_ms': 0.0,
+            'insert_ms': 0.0
+        }
+
+    def reset_stats(self):
+        """Сбросить счетчики перед новой пачкой"""
+        self.stats = self._empty_stats()
+
+    def find_existing(self, source_ids):
+        """
+        Найти уже сохраненные записи
+
+        Args:
+            source_ids: Итерируемый набор source_id
+
+        Returns:
+            Словарь {source_id: id} для записей, которые уже есть в БД
+        """
+        unique_ids = [sid for sid in dict.fromkeys(source_ids) if sid]
+        existing = {}
+
+        started = time.perf_counter()
+        for chunk in _chunks(unique_ids, self.chunk_size):
+            rows = db.session.query(Review.source_id, Review.id).filter(
+                Review.source_id.in_(chunk)
+            ).all()
+            existing.update({source_id: review_id for source_id, review_id in rows})
+            self.stats['lookup_queries'] += 1
+        self.stats['lookup_ms'] += (time.perf_counter() - started) * 1000
+
+        return existing
+
+    def split_new(self, reviews):
+        """
+        Отделить новые записи от уже сохраненных
+
+        Дубликаты внутри самой пачки тоже отбрасываются (остается первая запись).
+
+        Args:
+            reviews: Список словарей от коллектора
+
+        Returns:
+            (new_reviews, existing) - новые записи и словарь {source_id: id} существующих
+        """
+        self.stats['batch_size'] += len(reviews)
+
+        existing = self.find_existing(r.get('source_id') for r in reviews)
+        self.stats['existing'] += len(existing)
+
+        new_reviews = []
+        seen = set()
+        for review_data in reviews:
+            source_id = review_data.get('source_id')
+            if not source_id or source_id in existing or source_id in seen:
+                continue
+            seen.add(source_id)
+            new_reviews.append(review_data)
+
+        return new_reviews, existing
+
+    def _insert_statement(self):
+        """INSERT, игнорирующий конфликт по source_id, если диалект это умеет"""
+        dialect = db.engine.dialect.name
+
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+            return sqlite_insert(Review.__table__).on_conflict_do_nothing(index_elements=['source_id'])
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as pg_insert
+            return pg_insert(Review.__table__).on_conflict_do_nothing(index_elements=['source_id'])
+
+        # Для остальных БД полагаемся на предварительную дедупликацию
+        return insert(Review.__table__)
+
+    def insert_rows(self, rows):
+        """
+        Массовая вставка новых записей
+
+        Args:
+            rows: Список словарей с полями модели Review
+
+        Returns:
+            Количество вставленных строк
+        """
+        if not rows:
+            return 0
+
+        clean_rows = [
+            {k: v for k, v in row.items() if k in REVIEW_COLUMNS}
+            for row in rows
+        ]
+
+        # executemany требует одинаковый набор ключей, поэтому группируем
+        groups = {}
+        for row in clean_rows:
+            groups.setdefault(frozenset(row), []).append(row)
+
+        # Ключи агрегатов берутся из RETURNING, чтобы не учитывать строки, пропущенные ON CONFLICT
+        returning = db.engine.dialect.insert_executemany_returning
+        deltas = Counter()
+        
+        inserted = 0
+        started = time.perf_counter()
+        for group in groups.values():
+            stmt = self._insert_statement()
+            if returning:
+                stmt = stmt.returning(
+                    Review.source, Review.sentiment_label, Review.is_comment, Review.collected_date
+                )
+                keys = [rollup_key(*row) for row in db.session.execute(stmt, group)]
+                inserted += len(keys)
+                deltas.update(keys)
+            else:
+                result = db.session.execute(stmt, group)
+                inserted += result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(group)
+                now = datetime.utcnow()
+                deltas.update(count_rows(
+                    dict(row, collected_date=row.get('collected_date') or now) for row in group
+                ))
+        
+        apply_deltas(deltas)
+        self.stats['insert_ms'] += (time.perf_counter() - started) * 1000
+        
+        self.stats['inserted'] += inserted
+        return inserted
+
+    def format_stats(self):
+        """Строка с таймингами для логов"""
+        return (
+            f"пачка: {self.stats['batch_size']}, "
+            f"уже в БД: {self.stats['existing']}, "
+            f"вставлено: {self.stats['inserted']}, "
+            f"поиск: {self.stats['lookup_ms']:.1f} мс ({self.stats['lookup_queries']} запр.), "
+            f"вставка: {self.stats['insert_ms']:.1f} мс"
+        )
@@ -0,0 +1,59 @@
+"""
+Профиль производительности SQLite
+PRAGMA применяются к каждому соединению при его создании движком
+"""
+import logging
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_installed = False
+
+
+def sqlite_pragmas():
+    """PRAGMA профиля в порядке применения"""
+    return [
+        ('journal_mode', Config.SQLITE_JOURNAL_MODE),
+        ('synchronous', Config.SQLITE_SYNCHRONOUS),
+        ('busy_timeout', Config.SQLITE_BUSY_TIMEOUT_MS),
+        ('mmap_size', Config.SQLITE_MMAP_SIZE),
+        # Отрицательное значение - размер в КБ, а не в страницах
+        ('cache_size', -abs(Config.SQLITE_CACHE_SIZE_KB)),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+def apply_sqlite_profile(connection):
+    """
+    Применить профиль к соединению sqlite3
+
+    Ошибка отдельной PRAGMA (например, WAL на read-only файле) не мешает
+    остальным и только пишется в лог.
+    """
+    cursor = connection.cursor()
+    try:
+        for name, value in sqlite_pragmas():
+            try:
+                cursor.execute(f'PRAGMA {name}={value}')
+            except sqlite3.Error as e:
+                logger.warning(f"[SQLITE] PRAGMA {name}={value} не применена: {e}")
+    finally:
+        cursor.close()
+
+
+def _on_connect(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_profile(dbapi_connection)
+
+
+def install_sqlite_profile():
+    """Подключить профиль ко всем движкам SQLAlchemy процесса (повторный вызов ничего не делает)"""
+    global _installed
+    if not _installed:
+        event.listen(Engine, 'connect', _on_connect)
+        _installed = True
@@ -0,0 +1,86 @@
+"""
+Стабильные source_id ответов Telegram и слияние накопленных дубликатов
+Раньше id ответа строился из hash(text), который в Python меняется от
+процесса к процессу, поэтому один и тот же ответ сохранялся после каждого перезапуска
+"""
+import hashlib
+import logging
+from collections import defaultdict
+
+from models import db, Review
+
+logger = logging.getLogger(__name__)
+
+REPLY_MARKER = '_reply_'
+
+
+def reply_source_id(parent_source_id, reply_id=None, text=''):
+    """
+    source_id ответа: по id сообщения Telegram, без него - по blake2b текста
+
+    Оба варианта одинаковы в любом процессе, поэтому повторный сбор
+    находит уже сохраненный ответ.
+    """
+    if reply_id:
+        return f"{parent_source_id}{REPLY_MARKER}{reply_id}"
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+    return f"{parent_source_id}{REPLY_MARKER}h{digest}"
+
+
+def _keep_rank(source_id):
+    """
+    Приоритет записи при слиянии: id сообщения Telegram, затем хеш текста, затем старый формат
+
+    Коллектор всегда выдает id по сообщению Telegram, поэтому остается именно
+    такая запись: повторный полный сбор найдет ее и не вставит ответ заново.
+    """
+    suffix = source_id.rsplit(REPLY_MARKER, 1)[1]
+    # id сообщений Telegram - 32-битные; hash() старого формата - 64-битный, часто отрицательный
+    if suffix.isdigit() and int(suffix) < 2 ** 31:
+        return 0
+    if suffix.startswith('h') and len(suffix) == 17:
+        return 1
+    return 2
+
+
+def compact_reply_duplicates(dry_run=False):
+    """
+    Слить дубликаты ответов Telegram
+
+    Дубликаты - ответы одного поста с тем же автором, временем и текстом.
+    Остается одна запись по _keep_rank (при равенстве - самая ранняя).
+    id записей не меняются: у строк старого формата id сообщения Telegram
+    неизвестен, а другой формат коллектор не выдает. Такие строки сливаются
+    с записью по id сообщения, когда следующий сбор ее вставит.
+    Удаление идет через ORM, поэтому review_rollups и reviews_fts обновляются.
+    Должен вызываться внутри app.app_context().
+
+    Returns:
+        Количество удаленных дубликатов
+    """
+    replies = [
+        review for review in Review.query.filter(Review.source_id.like('telegram%_reply_%')).order_by(Review.id)
+        if REPLY_MARKER in review.source_id
+    ]
+
+    groups = defaultdict(list)
+    for review in replies:
+        parent_source_id = review.source_id.rsplit(REPLY_MARKER, 1)[0]
+        groups[(parent_source_id, review.author_id, review.published_date, review.text)].append(review)
+
+    removed = 0
+    for reviews in groups.values():
+        # min() устойчив: при равном приоритете остается запись с меньшим id
+        keep = min(reviews, key=lambda review: _keep_rank(review.source_id))
+
+        for review in reviews:
+            if review is not keep:
+                removed += 1
+                if not dry_run:
+                    db.session.delete(review)
+
+    if not dry_run:
+        db.session.flush()
+
+    logger.info(f"[TELEGRAM] Ответов: {len(replies)}, дубликатов: {removed}")
+    return removed
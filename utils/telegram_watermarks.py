@@ -0,0 +1,117 @@
+"""
+Инкрементальная синхронизация Telegram (таблица telegram_watermarks)
+По каждому каналу хранится последний полученный id сообщения, по каждой
+отслеживаемой ветке ответов - последний id ответа; следующий цикл запрашивает
+только min_id > отметки
+"""
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask import has_app_context
+from sqlalchemy import delete
+
+from models import db, TelegramWatermark
+
+logger = logging.getLogger(__name__)
+
+# thread_id строки с отметкой истории канала
+CHANNEL_THREAD = 0
+
+# Сколько дней после публикации поста проверять его ветку на новые ответы
+THREAD_WINDOW_DAYS = 30
+
+
+@contextmanager
+def _app_context():
+    # Коллекторы работают в потоках executor без контекста приложения
+    if has_app_context():
+        yield
+        return
+
+    from app_enhanced import app
+    with app.app_context():
+        yield
+
+
+def _naive_utc(value):
+    if value is not None and value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - (value.utcoffset() or timedelta(0))
+    return value
+
+
+def load_watermarks(now=None):
+    """
+    Отметки всех каналов одним запросом
+
+    Returns:
+        {channel_id: (last_message_id, {thread_id: (last_reply_id, message_date)})};
+        ветки старше THREAD_WINDOW_DAYS не возвращаются
+    """
+    since = (now or datetime.utcnow()) - timedelta(days=THREAD_WINDOW_DAYS)
+    marks = {}
+
+    with _app_context():
+        for row in TelegramWatermark.query.all():
+            last_message_id, threads = marks.setdefault(row.channel_id, (0, {}))
+            if row.thread_id == CHANNEL_THREAD:
+                marks[row.channel_id] = (row.last_message_id, threads)
+            elif row.message_date is None or row.message_date >= since:
+                threads[row.thread_id] = (row.last_message_id, row.message_date)
+
+    return marks
+
+
+def save_watermarks(marks, now=None):
+    """
+    Сохранить отметки после цикла сбора (одна транзакция)
+
+    Отметки только растут; ветки старше THREAD_WINDOW_DAYS удаляются.
+
+    Args:
+        marks: {channel_id: (last_message_id, {thread_id: (last_reply_id, message_date)})}
+    """
+    if not marks:
+        return
+
+    since = (now or datetime.utcnow()) - timedelta(days=THREAD_WINDOW_DAYS)
+
+    with _app_context():
+        try:
+            rows = {
+                (row.channel_id, row.thread_id): row
+                for row in TelegramWatermark.query.filter(TelegramWatermark.channel_id.in_(list(marks)))
+            }
+
+            for channel_id, (last_message_id, threads) in marks.items():
+                values = {CHANNEL_THREAD: (last_message_id, None)}
+                values.update(threads)
+
+                for thread_id, (last_id, message_date) in values.items():
+                    message_date = _naive_utc(message_date)
+                    row = rows.pop((channel_id, thread_id), None)
+                    if row is None:
+                        db.session.add(TelegramWatermark(
+                            channel_id=channel_id,
+                            thread_id=thread_id,
+                            last_message_id=last_id,
+                            message_date=message_date
+                        ))
+                    else:
+                        row.last_message_id = max(row.last_message_id, last_id)
+                        row.message_date = row.message_date or message_date
+
+            # Устаревшие ветки больше не отслеживаются
+            for row in rows.values():
+                if row.thread_id != CHANNEL_THREAD and row.message_date is not None and row.message_date < since:
+                    db.session.delete(row)
+
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"[TELEGRAM] Не удалось сохранить отметки синхронизации: {e}")
+
+
+def clear_watermarks():
+    """Удалить все отметки (вместе с удалением отзывов, чтобы следующий сбор был полным)"""
+    db.session.execute(delete(TelegramWatermark.__table__))
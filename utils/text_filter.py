@@ -0,0 +1,230 @@
+"""
+Общий фильтр текстов для коллекторов: релевантность компании, регион, язык
+Наборы ключевых слов собираются один раз и пересобираются при изменении настроек
+"""
+from collections import namedtuple
+
+from config import Config
+from utils.language_detector import LanguageDetector
+
+# Конкуренты и нерелевантные упоминания (VK, Web, Telegram)
+COMPETITOR_EXCLUDES = [
+    'газпром', 'т плюс', 'т-плюс', 'росатом', 'энергосбыт плюс',
+    'энергосбыт луганск', 'энергосбыт волга', 'энергосбыт тюмень',
+    'тнс тула', 'тнс великий новгород', 'тнс ярославль',
+    'вакансия', 'вакансии', 'требуется'
+]
+
+# Упоминания именно нижегородской ТНС
+COMPANY_PATTERNS = [
+    'тнс энерго нн',
+    'тнс энерго нижний',
+    'тнс энерго нижегородск',
+    'тнс нн',
+    'тнс нижний новгород'
+]
+
+# Короткий список исключений для коллекторов с поиском по COMPANY_KEYWORDS (Zen, OK)
+KEYWORD_EXCLUDES = [
+    'газпром', 'т плюс', 'т-плюс',
+    'тнс тула', 'тнс ярославль',
+    'вакансия', 'требуется'
+]
+
+
+# Номер версии настроек: фильтры пересобирают наборы, когда он меняется
+_settings_version = 0
+
+
+def settings_changed():
+    """Сообщить фильтрам, что ключевые слова или флаги в Config изменились"""
+    global _settings_version
+    _settings_version += 1
+
+
+def settings_version():
+    """Текущая версия настроек (для кэшей результатов, зависящих от фильтров)"""
+    return _settings_version
+
+
+def company_keywords():
+    """Ключевые слова компании из текущих настроек"""
+    return Config.COMPANY_KEYWORDS
+
+
+def geo_keywords():
+    """Гео-ключевые слова из текущих настроек"""
+    return Config.GEO_KEYWORDS
+
+
+FilterResult = namedtuple('FilterResult', ['relevant', 'geo', 'russian'])
+
+
+def _contains_any(text_lower, phrases):
+    for phrase in phrases:
+        if phrase in text_lower:
+            return True
+    return False
+
+
+class TextFilter:
+    """
+    Фильтр релевантности, региона и языка
+
+    Include-, exclude- и гео-наборы приводятся к нижнему регистру и
+    дедуплицируются один раз при сборке; текст приводится к нижнему регистру
+    один раз на все проверки. Сами проверки - подстрочный поиск `in`
+    по заранее собранным кортежам: на наборах из десятка коротких фраз
+    он быстрее любого регулярного выражения (см. benchmark_text_filter.py).
+
+    Источник ключевых слов - список или функция без аргументов
+    (например, company_keywords). Источники перечитываются, когда вызван
+    settings_changed() (после сохранения настроек), или по reload().
+
+    Семантика совпадает с прежними проверками `keyword.lower() in text.lower()`,
+    включая пустое ключевое слово (совпадает с любым текстом); пустой текст
+    релевантным не считается.
+
+    Args:
+        include: Фразы компании, достаточно любой
+        exclude: Фразы-исключения, любая делает текст нерелевантным
+        geo: Гео-фразы
+        include_groups: Дополнительные правила релевантности - кортежи наборов
+            фраз; правило выполнено, если в тексте есть фраза из каждого набора
+        match_all_if_no_include: Без include и групп считать релевантным любой текст
+        geo_filter: Включен ли гео-фильтр (None - Config.GEO_FILTER_ENABLED)
+        language_filter: Включен ли фильтр языка (None - Config.LANGUAGE_FILTER_ENABLED)
+        language_detector: Детектор языка (по умолчанию создается новый)
+    """
+
+    def __init__(self, include=(), exclude=(), geo=geo_keywords, include_groups=(),
+                 match_all_if_no_include=False, geo_filter=None, language_filter=None,
+                 language_detector=None):
+        self.include = include
+        self.exclude = exclude
+        self.geo = geo
+        self.include_groups = tuple(tuple(tuple(group) for group in rule) for rule in include_groups)
+        self.match_all_if_no_include = match_all_if_no_include
+        self.geo_filter = geo_filter
+        self.language_filter = language_filter
+        self.language_detector = language_detector or LanguageDetector()
+
+        self._version = None
+        self._compile()
+
+    @staticmethod
+    def _resolve(source):
+        return source() if callable(source) else source
+
+    @staticmethod
+    def _phrases(keywords):
+        """Уникальные фразы в нижнем регистре в исходном порядке"""
+        return tuple(dict.fromkeys(keyword.lower() for keyword in keywords if keyword is not None))
+
+    def _compile(self):
+        self._include = self._phrases(self._resolve(self.include))
+        self._exclude = self._phrases(self._resolve(self.exclude))
+        self._geo = self._phrases(self._resolve(self.geo))
+        self._groups = tuple(tuple(self._phrases(group) for group in rule) for rule in self.include_groups)
+        self._version = _settings_version
+
+    def reload(self):
+        """Пересобрать наборы из текущих настроек"""
+        self._compile()
+
+    def _lower(self, text):
+        """Проверить версию настроек и привести текст к нижнему регистру (один раз на все проверки)"""
+        if self._version != _settings_version:
+            self._compile()
+        return text.lower() if text else ''
+
+    def _relevant(self, text_lower):
+        if not text_lower or _contains_any(text_lower, self._exclude):
+            return False
+
+        if not self._include and not self._groups:
+            return self.match_all_if_no_include
+
+        if _contains_any(text_lower, self._include):
+            return True
+
+        for rule in self._groups:
+            if all(_contains_any(text_lower, group) for group in rule):
+                return True
+
+        return False
+
+    def _geo_enabled(self):
+        return Config.GEO_FILTER_ENABLED if self.geo_filter is None else self.geo_filter
+
+    def _language_enabled(self):
+        return Config.LANGUAGE_FILTER_ENABLED if self.language_filter is None else self.language_filter
+
+    def _in_region(self, text_lower):
+        return not self._geo_enabled() or _contains_any(text_lower, self._geo)
+
+    def _in_language(self, text):
+        return not self._language_enabled() or self.language_detector.is_russian(text)
+
+    def check(self, text, language=True):
+        """
+        Все проверки по одному приведенному к нижнему регистру тексту
+
+        Args:
+            text: Текст
+            language: Определять ли язык (иначе russian=None)
+
+        Returns:
+            FilterResult(relevant, geo, russian)
+        """
+        text_lower = self._lower(text)
+
+        return FilterResult(
+            self._relevant(text_lower),
+            self._in_region(text_lower),
+            self._in_language(text) if language else None
+        )
+
+    def accepts(self, text):
+        """Текст релевантен, про регион и на русском (язык - последним, он дороже)"""
+        text_lower = self._lower(text)
+
+        return (
+            self._relevant(text_lower)
+            and self._in_region(text_lower)
+            and self._in_language(text)
+        )
+
+    def accepts_batch(self, texts):
+        """
+        accepts() для списка текстов: язык определяется одним батчем
+        и только для прошедших фильтр релевантности и региона
+
+        Returns:
+            Список флагов в порядке texts
+        """
+        texts = list(texts)
+        accepted = []
+        for text in texts:
+            text_lower = self._lower(text)
+            accepted.append(self._relevant(text_lower) and self._in_region(text_lower))
+
+        if self._language_enabled():
+            candidates = [index for index, ok in enumerate(accepted) if ok]
+            flags = self.language_detector.is_russian_batch([texts[index] for index in candidates])
+            for index, is_russian in zip(candidates, flags):
+                accepted[index] = is_russian
+
+        return accepted
+
+    def is_relevant(self, text):
+        """Текст про компанию и не попадает под исключения"""
+        return self._relevant(self._lower(text))
+
+    def is_nizhny_region(self, text):
+        """Текст упоминает регион (всегда True при выключенном гео-фильтре)"""
+        return self._in_region(self._lower(text))
+
+    def is_russian(self, text):
+        """Текст на русском (всегда True при выключенном фильтре языка)"""
+        return self._in_language(text)
@@ -0,0 +1,125 @@
+"""
+Поиск множества фраз в тексте за один проход
+Фразы сливаются в префиксное дерево (trie) и компилируются в одно регулярное выражение
+"""
+import re
+
+
+def _build_trie(phrases):
+    root = {}
+    for phrase in phrases:
+        node = root
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return root
+
+
+def _trie_pattern(node):
+    """Регулярное выражение для поддерева префиксного дерева"""
+    branches = []
+    single_chars = []
+
+    for char, child in sorted(node.items()):
+        if not char:
+            continue
+        tail = _trie_pattern(child)
+        if tail:
+            branches.append(re.escape(char) + tail)
+        else:
+            single_chars.append(re.escape(char))
+
+    if single_chars:
+        branches.append(single_chars[0] if len(single_chars) == 1 else '[' + ''.join(single_chars) + ']')
+
+    if not branches:
+        return ''
+
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return f'(?:{body})?' if '' in node else body
+
+
+def compile_phrases(phrases, flags=0):
+    """
+    Скомпилировать набор фраз в одно регулярное выражение-дерево
+
+    Общие префиксы фраз сливаются (trie), поэтому поиск `search()`
+    проверяет все фразы за один проход движка re без перебора списка.
+    Находит совпадение тогда и только тогда, когда в тексте есть хотя бы одна фраза.
+
+    Returns:
+        re.Pattern или None для пустого набора
+    """
+    root = _build_trie(phrase for phrase in phrases if phrase)
+    if not root:
+        return None
+
+    return re.compile(_trie_pattern(root), flags)
+
+
+class PhraseMatcher:
+    """
+    Набор фраз, скомпилированный один раз
+
+    Находит все фразы, встречающиеся в тексте (в том числе перекрывающиеся
+    и вложенные), за один проход: регулярное выражение-дерево под lookahead
+    проверяется в каждой позиции и возвращает самую длинную фразу, начинающуюся
+    там; более короткие фразы с той же позицией - ее префиксы и добавляются
+    из заранее посчитанного замыкания. Поиск подстрочный - так же, как `phrase in text`.
+
+    Args:
+        phrases: Итерируемый набор фраз (пустые игнорируются)
+        lowercase: Приводить фразы и текст к нижнему регистру
+    """
+
+    def __init__(self, phrases, lowercase=True):
+        self.lowercase = lowercase
+
+        self.phrases = []
+        seen = set()
+        for phrase in phrases:
+            if not phrase:
+                continue
+            key = phrase.lower() if lowercase else phrase
+            if key not in seen:
+                seen.add(key)
+                self.phrases.append(key)
+
+        self._search_re = compile_phrases(self.phrases)
+        self._all_re = None
+        self._prefixes = {}
+
+        if self._search_re is not None:
+            self._all_re = re.compile(f'(?=({self._search_re.pattern}))')
+            self._prefixes = {
+                phrase: frozenset(phrase[:i] for i in range(1, len(phrase) + 1) if phrase[:i] in seen)
+                for phrase in self.phrases
+            }
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def _prepare(self, text):
+        if not text:
+            return ''
+        return text.lower() if self.lowercase else text
+
+    def find_all(self, text):
+        """Множество фраз, встречающихся в тексте"""
+        found = set()
+        if self._all_re is None:
+            return found
+
+        prefixes = self._prefixes
+        for longest in set(self._all_re.findall(self._prepare(text))):
+            found |= prefixes[longest]
+
+        return found
+
+    def search(self, text):
+        """Первая найденная фраза или None (аналог any(phrase in text ...))"""
+        if self._search_re is None:
+            return None
+
+        match = self._search_re.search(self._prepare(text))
+        return match.group(0) if match else None
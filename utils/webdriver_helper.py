@@ -4,49 +4,112 @@ Helper для инициализации WebDriver с fallback логикой
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service
 from selenium.webdriver.edge.options import Options
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.chrome.options import Options as ChromeOptions
 import logging
 
 logger = logging.getLogger(__name__)
 
-def create_edge_driver(headless=True):
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'
+
+# Тяжелые ресурсы, которые не нужны для разбора страниц (Network.setBlockedURLs)
+BLOCKED_RESOURCES = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico', '*.bmp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3', '*.ogg', '*.wav',
+]
+
+# CDP-события сети в performance-логе: по ним коллекторы ждут затишья сети (utils.page_waits)
+PERFORMANCE_LOG = {'performance': 'ALL'}
+
+
+# Загруженные драйверы по браузеру: путь запоминается только после успешной загрузки
+_driver_paths = {}
+
+
+def _driver_path(browser):
     """
-    Создает Edge WebDriver с автоматическим fallback
+    Путь к драйверу через webdriver-manager - один раз на процесс
     
-    Args:
-        headless: Запускать в headless режиме (без окна)
+    Неудача не запоминается: после сетевой ошибки следующий запуск
+    браузера снова попробует загрузить драйвер.
     
     Returns:
-        WebDriver instance или None при ошибке
+        Путь или None (Selenium 4+ найдет драйвер сам)
     """
-    edge_options = Options()
+    if browser in _driver_paths:
+        return _driver_paths[browser]
     
+    try:
+        if browser == 'edge':
+            from webdriver_manager.microsoft import EdgeChromiumDriverManager
+            logger.info("[WEBDRIVER] Попытка загрузки EdgeDriver через webdriver-manager...")
+            path = EdgeChromiumDriverManager().install()
+        else:
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+    except Exception as e:
+        logger.debug(f"[WEBDRIVER] webdriver-manager недоступен: {e}")
+        return None
+    
+    if path:
+        _driver_paths[browser] = path
+    return path
+
+
+def _apply_common_options(options, headless, user_data_dir, proxy):
     if headless:
-        edge_options.add_argument('--headless=new')
+        options.add_argument('--headless=new')
+    
+    # DOMContentLoaded вместо полной загрузки: разбор не ждет картинок и счетчиков
+    options.page_load_strategy = 'eager'
+    
+    if user_data_dir:
+        options.add_argument(f'--user-data-dir={user_data_dir}')
+    if proxy:
+        options.add_argument(f'--proxy-server={proxy}')
     
     # Базовые настройки
-    edge_options.add_argument('--no-sandbox')
-    edge_options.add_argument('--disable-dev-shm-usage')
-    edge_options.add_argument('--disable-blink-features=AutomationControlled')
-    edge_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    edge_options.add_experimental_option('useAutomationExtension', False)
-    edge_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-    edge_options.add_argument('--window-size=1920,1080')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.add_argument(f'user-agent={USER_AGENT}')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--lang=ru-RU')
+    options.add_argument('--log-level=3')
     
     # Отключение загрузки изображений для скорости
     prefs = {'profile.managed_default_content_settings.images': 2}
-    edge_options.add_experimental_option('prefs', prefs)
+    options.add_experimental_option('prefs', prefs)
+
+
+def create_edge_driver(headless=True, user_data_dir=None, proxy=None):
+    """
+    Создает Edge WebDriver с автоматическим fallback
     
-    # Метод 1: Попробовать webdriver-manager (если есть интернет)
-    try:
-        from webdriver_manager.microsoft import EdgeChromiumDriverManager
-        logger.info("[WEBDRIVER] Попытка загрузки EdgeDriver через webdriver-manager...")
-        driver_path = EdgeChromiumDriverManager().install()
-        service = Service(driver_path)
-        driver = webdriver.Edge(service=service, options=edge_options)
-        logger.info("[WEBDRIVER] ✓ WebDriver запущен через webdriver-manager")
-        return driver
-    except Exception as e:
-        logger.debug(f"[WEBDRIVER] webdriver-manager недоступен: {e}")
+    Args:
+        headless: Запускать в headless режиме (без окна)
+        user_data_dir: Каталог профиля (cookies и кэш переживают перезапуск браузера)
+        proxy: Адрес прокси для --proxy-server
+    
+    Returns:
+        WebDriver instance или None при ошибке
+    """
+    edge_options = Options()
+    _apply_common_options(edge_options, headless, user_data_dir, proxy)
+    edge_options.set_capability('ms:loggingPrefs', PERFORMANCE_LOG)
+    
+    # Метод 1: webdriver-manager (путь загружается один раз на процесс)
+    driver_path = _driver_path('edge')
+    if driver_path:
+        try:
+            driver = webdriver.Edge(service=Service(driver_path), options=edge_options)
+            logger.info("[WEBDRIVER] ✓ WebDriver запущен через webdriver-manager")
+            return driver
+        except Exception as e:
+            logger.debug(f"[WEBDRIVER] Не удалось запустить Edge через webdriver-manager: {e}")
     
     # Метод 2: Selenium 4+ может автоматически найти Edge без указания пути
     try:
@@ -58,6 +121,65 @@ def create_edge_driver(headless=True):
         logger.error(f"[WEBDRIVER] Не удалось запустить Edge: {e}")
         return None
 
+def create_chrome_driver(headless=True, user_data_dir=None, proxy=None):
+    """
+    Создает Chrome WebDriver (Дзен, OK)
+    
+    Args:
+        headless: Запускать в headless режиме (без окна)
+        user_data_dir: Каталог профиля (cookies и кэш переживают перезапуск браузера)
+        proxy: Адрес прокси для --proxy-server
+    
+    Returns:
+        WebDriver instance или None при ошибке
+    """
+    chrome_options = ChromeOptions()
+    _apply_common_options(chrome_options, headless, user_data_dir, proxy)
+    chrome_options.set_capability('goog:loggingPrefs', PERFORMANCE_LOG)
+    
+    # Стабилизация Chrome
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--disable-software-rasterizer')
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--remote-debugging-port=0')  # Динамический выбор порта
+    chrome_options.add_argument('--disable-background-networking')
+    chrome_options.add_argument('--disable-background-timer-throttling')
+    chrome_options.add_argument('--disable-backgrounding-occluded-windows')
+    chrome_options.add_argument('--disable-breakpad')
+    chrome_options.add_argument('--disable-component-extensions-with-background-pages')
+    chrome_options.add_argument('--disable-features=TranslateUI,BlinkGenPropertyTrees')
+    chrome_options.add_argument('--disable-ipc-flooding-protection')
+    chrome_options.add_argument('--disable-renderer-backgrounding')
+    chrome_options.add_argument('--enable-features=NetworkService,NetworkServiceInProcess')
+    chrome_options.add_argument('--force-color-profile=srgb')
+    chrome_options.add_argument('--hide-scrollbars')
+    chrome_options.add_argument('--metrics-recording-only')
+    chrome_options.add_argument('--mute-audio')
+    
+    try:
+        driver_path = _driver_path('chrome')
+        service = ChromeService(driver_path) if driver_path else ChromeService()
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        logger.info("[WEBDRIVER] ✓ Chrome драйвер запущен")
+        return driver
+    except Exception as e:
+        logger.error(f"[WEBDRIVER] Не удалось запустить Chrome: {e}")
+        return None
+
+def block_heavy_resources(driver, patterns=None):
+    """
+    Блокирует загрузку картинок, шрифтов и медиа через CDP
+    
+    Args:
+        driver: WebDriver instance (Chrome/Edge)
+        patterns: Шаблоны URL (по умолчанию BLOCKED_RESOURCES)
+    """
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns or BLOCKED_RESOURCES})
+    except Exception as e:
+        logger.debug(f"[WEBDRIVER] Не удалось включить блокировку ресурсов: {e}")
+
 def hide_webdriver_signature(driver):
     """
     Скрывает признаки автоматизации в WebDriver